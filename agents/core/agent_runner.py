@@ -1,6 +1,7 @@
 # agents/core/agent_runner.py
 
 import logging
+import uuid
 
 from langsmith import traceable
 from agents.core.extractor import extract_structured_request
@@ -17,38 +18,33 @@ logging.basicConfig(
 
 
 @traceable(name="Pharmacy-Agent-Run")
-def run_agent(user_input: str):
+def run_agent(user_input: str, message_id: str = None):
+
+    # Writes are keyed by the message: a redelivery with the same id
+    # replays the first result
+    message_id = message_id or str(uuid.uuid4())
 
     try:
 
         # ================================
         # 1️⃣ Extract structured intent
         # ================================
+        # One extraction and one controller pass per message: a second
+        # LLM extraction could differ and reach the backend with the
+        # same idempotency keys
         structured = extract_structured_request(user_input)
-        print("🔎 Structured Request:", structured)
+        logging.info("Structured Request: %s", structured)
 
         # ================================
         # 2️⃣ Handle business logic
         # ================================
-        backend_result = traced_controller(structured, user_input)
-        print("⚙ Backend Result:", backend_result)
+        backend_result = traced_controller(structured, user_input, message_id)
+        logging.info("Backend Result: %s", backend_result)
 
         # ================================
         # 3️⃣ Generate final response
         # ================================
-
-
-        structured_request = extract_structured_request(user_input)
-
-        logging.info("Structured Request: %s", structured_request)
-
-        backend_result = handle_intent(structured_request, user_input)
-
-        logging.info("Backend Result: %s", backend_result)
-
-
         final_response = generate_response(user_input, backend_result)
-
         logging.info("Final Response: %s", final_response)
 
         return {
@@ -56,9 +52,9 @@ def run_agent(user_input: str):
             "response": final_response
         }
 
-    except Exception as e:
+    except Exception:
 
-        print("🚨 AGENT CRASH:", str(e))
+        logging.exception("Agent run failed")
 
         return {
 
@@ -68,6 +64,6 @@ def run_agent(user_input: str):
 
 
 @traceable(name="Intent-Controller")
-def traced_controller(structured, user_input):
-    return handle_intent(structured, user_input)
+def traced_controller(structured, user_input, message_id=None):
+    return handle_intent(structured, user_input, message_id)
 
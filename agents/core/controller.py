@@ -1,5 +1,7 @@
 # agents/core/controller.py
 
+import hashlib
+
 from langsmith import traceable
 from datetime import datetime
 from agents.tools.webhook import trigger_admin_alert
@@ -8,8 +10,9 @@ from agents.utils.safe_execute import safe_execute
 from agents.tools.tools import (
     check_inventory,
     create_order,
+    reserve_stock,
+    confirm_reservation,
     verify_prescription,
-    check_prescription_status,
     get_customer_history,
     cancel_order,
     get_order_status,
@@ -18,9 +21,63 @@ from agents.tools.tools import (
 
 DEFAULT_CUSTOMER = "PAT001"
 
+# Minimum fuzzy score to accept a corrected medicine name for a stock check
+FUZZY_ACCEPT_SCORE = 0.5
+
+
+def idempotency_key(message_id, step):
+    """Backend Idempotency-Key for one write of one incoming message, or None."""
+
+    if not message_id:
+        return None
+
+    digest = hashlib.sha256(str(message_id).encode()).hexdigest()[:32]
+    return f"agent-{step}-{digest}"
+
+
+def lookup_inventory(medicine, accept_corrections=True):
+    """
+    Inventory rows for a medicine name. A misspelled name falls back to
+    the backend's fuzzy candidates: accepted as-is for a stock check, but
+    returned for confirmation (code confirm_medicine) when the caller
+    would act on the row, so a typo never orders a different drug.
+    """
+
+    inventory = safe_execute(check_inventory, medicine)
+
+    if inventory.get("code") != "not_found":
+        return inventory
+
+    # Misspelled transcripts ("paracetmol"): the backend already ranked
+    # typo-tolerant candidates, take the confident ones
+    suggestions = [
+        item for item in inventory.get("suggestions", [])
+        if item.get("score", 0) >= FUZZY_ACCEPT_SCORE
+    ]
+
+    if not suggestions:
+        return inventory
+
+    if not accept_corrections:
+        names = ", ".join(item.get("name") for item in suggestions)
+        return {
+            "status": "error",
+            "code": "confirm_medicine",
+            "message": f"Medicine not found. Did you mean: {names}? Please confirm the name.",
+            "suggestions": suggestions,
+            "corrected_from": medicine
+        }
+
+    return {
+        "status": "success",
+        "count": len(suggestions),
+        "data": suggestions,
+        "corrected_from": medicine
+    }
+
 
 @traceable(name="Controller-Decision")
-def handle_intent(request, user_input=None):
+def handle_intent(request, user_input=None, message_id=None):
 
     try:
 
@@ -41,7 +98,8 @@ def handle_intent(request, user_input=None):
         if "cancel order" in user_input_lower:
             try:
                 order_id = int(user_input_lower.split("cancel order")[1].strip())
-                return safe_execute(cancel_order, order_id)
+                return safe_execute(cancel_order, order_id,
+                                    idempotency_key(message_id, "cancel"))
             except Exception:
                 return {"status": "error", "message": "Invalid order ID"}
 
@@ -69,7 +127,7 @@ def handle_intent(request, user_input=None):
             if not medicine:
                 return {"status": "error", "code": "missing_medicine"}
 
-            return safe_execute(check_inventory, medicine)
+            return lookup_inventory(medicine)
 
         # --------------------------------------------------
         # ORDER
@@ -87,7 +145,7 @@ def handle_intent(request, user_input=None):
                     "message": "Quantity must be greater than 0"
                 }
 
-            inventory = safe_execute(check_inventory, medicine)
+            inventory = lookup_inventory(medicine, accept_corrections=False)
 
             if inventory.get("status") != "success":
                 return inventory
@@ -100,29 +158,31 @@ def handle_intent(request, user_input=None):
             item = data_list[0]
 
             medicine_id = item.get("medicine_id")
-            prescription_required = item.get("prescription_required") == "Yes"
-
-            # Prescription check
-            if prescription_required:
 
-                status_check = safe_execute(
-                    check_prescription_status,
-                    customer_id,
-                    item.get("name")
-                )
+            # Hold the stock first: the backend checks the prescription
+            # and takes the units in one call, so they cannot vanish
+            # before the order is confirmed
+            hold = safe_execute(
+                reserve_stock,
+                customer_id,
+                medicine_id,
+                quantity,
+                idempotency_key=idempotency_key(message_id, "reserve")
+            )
 
-                if status_check.get("status") != "valid":
+            if hold.get("status") != "success":
+                if hold.get("code") == "prescription_required":
                     return {
                         "status": "error",
                         "code": "prescription_required"
                     }
+                return hold
 
-            # Create order
+            # Confirm the hold into an order
             result = safe_execute(
-                create_order,
-                customer_id,
-                medicine_id,
-                quantity
+                confirm_reservation,
+                hold["data"]["hold_id"],
+                customer_id
             )
 
             # webhook safe
@@ -158,7 +218,7 @@ def handle_intent(request, user_input=None):
             if not medicine:
                 return {"status": "error", "code": "missing_medicine"}
 
-            inventory = safe_execute(check_inventory, medicine)
+            inventory = lookup_inventory(medicine, accept_corrections=False)
 
             if inventory.get("status") != "success":
                 return inventory
@@ -3,7 +3,7 @@
 import csv
 import os
 from datetime import datetime
-from agents.tools.tools import get_customer_history
+from agents.tools.tools import get_customer_history, get_monthly_quantity
 
 RULES_PATH = os.path.join(
     os.path.dirname(__file__),
@@ -113,36 +113,16 @@ def check_monthly_limit(customer_id: str, medicine_name: str, requested_quantity
     except Exception:
         return {"allowed": True}
 
-    history = get_customer_history(customer_id)
+    # Month-to-date units, summed by the backend with one indexed query
+    usage = get_monthly_quantity(customer_id, medicine_key)
 
-    if history.get("status") != "ok":
+    if usage.get("status") != "success":
         return {"allowed": True}
 
-    orders = history.get("orders", [])
-
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-
-    total_this_month = 0
-
-    for order in orders:
-        order_medicine = order.get("medicine", "")
-        if medicine_key in order_medicine.lower():
-
-            date_str = order.get("date")
-            if not date_str:
-                continue
-
-            try:
-                order_date = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-            except Exception:
-                continue
-
-            if order_date.month == current_month and order_date.year == current_year:
-                try:
-                    total_this_month += int(order.get("quantity", 0))
-                except Exception:
-                    continue
+    try:
+        total_this_month = int(usage["data"]["quantity"])
+    except Exception:
+        return {"allowed": True}
 
     if max_limit and (total_this_month + requested_quantity > max_limit):
         return {
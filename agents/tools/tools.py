@@ -1,4 +1,5 @@
 import os
+import uuid
 import requests
 from dotenv import load_dotenv
 from langsmith import traceable
@@ -7,19 +8,34 @@ load_dotenv()
 
 BASE_URL = os.getenv("AGENT_BASE_URL", "http://localhost:5000")
 
+# Writes carrying an Idempotency-Key can be resent safely: the backend
+# answers a duplicate from the stored result. Callers pass the key
+# derived from the incoming message (controller.idempotency_key), so a
+# redelivered webhook or a re-run agent reuses it too; without one, a
+# fresh key still covers the retry below.
+IDEMPOTENT_RETRIES = 1
+
 
 def safe_request(method, endpoint, **kwargs):
 
+    retries = IDEMPOTENT_RETRIES if "Idempotency-Key" in kwargs.get("headers", {}) else 0
+
     try:
 
         url = f"{BASE_URL}{endpoint}"
 
-        response = requests.request(
-            method,
-            url,
-            timeout=5,
-            **kwargs
-        )
+        for attempt in range(retries + 1):
+            try:
+                response = requests.request(
+                    method,
+                    url,
+                    timeout=5,
+                    **kwargs
+                )
+                break
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                if attempt == retries:
+                    raise
 
         if not response.text:
             return {"status": "error", "reason": "Empty response"}
@@ -78,11 +94,12 @@ def update_stock(medicine, delta, admin_token):
 # ORDERS
 
 @traceable(name="Create-Order")
-def create_order(customer_id, medicine_id, quantity):
+def create_order(customer_id, medicine_id, quantity, idempotency_key=None):
 
     return safe_request(
         "POST",
         "/create-order",
+        headers={"Idempotency-Key": idempotency_key or str(uuid.uuid4())},
         json={
             "customer_id": customer_id,
             "medicine_id": medicine_id,
@@ -91,6 +108,43 @@ def create_order(customer_id, medicine_id, quantity):
     )
 
 
+# Hold stock first, confirm into an order once the conversation settles
+
+@traceable(name="Reserve-Stock")
+def reserve_stock(customer_id, medicine_id, quantity, ttl=None, idempotency_key=None):
+
+    return safe_request(
+        "POST",
+        "/reserve-stock",
+        headers={"Idempotency-Key": idempotency_key or str(uuid.uuid4())},
+        json={
+            "customer_id": customer_id,
+            "medicine_id": medicine_id,
+            "quantity": quantity,
+            "ttl": ttl
+        }
+    )
+
+
+@traceable(name="Confirm-Reservation")
+def confirm_reservation(hold_id, customer_id=None):
+
+    return safe_request(
+        "POST",
+        "/confirm-reservation",
+        json={"hold_id": hold_id, "customer_id": customer_id}
+    )
+
+
+def release_reservation(hold_id, customer_id=None):
+
+    return safe_request(
+        "POST",
+        "/release-reservation",
+        json={"hold_id": hold_id, "customer_id": customer_id}
+    )
+
+
 @traceable(name="Get-History")
 def get_customer_history(customer_id):
 
@@ -100,11 +154,21 @@ def get_customer_history(customer_id):
     )
 
 
-def cancel_order(order_id):
+def get_monthly_quantity(customer_id, medicine_name):
+
+    return safe_request(
+        "GET",
+        f"/monthly-quantity/{customer_id}",
+        params={"medicine": medicine_name}
+    )
+
+
+def cancel_order(order_id, idempotency_key=None):
 
     return safe_request(
         "POST",
         "/cancel-order",
+        headers={"Idempotency-Key": idempotency_key or str(uuid.uuid4())},
         json={"order_id": order_id}
     )
 
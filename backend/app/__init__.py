@@ -1,4 +1,6 @@
 import os
+import threading
+
 from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
@@ -20,8 +22,9 @@ print("AZURE KEY:", os.getenv("AZURE_OPENAI_API_KEY"))
 # IMPORT AFTER ENV LOAD
 # ==================================================
 
-from app.models.database import init_db, get_db
-from app.utils.excel_loader import load_all_data
+from app.models.database import check_schema, pool_stats
+from app.services.fuzzy_match_service import rebuild_medicine_index
+from app.services.reservation_service import HoldSweeper
 
 from app.routes.inventory import inventory_bp
 from app.routes.order import order_bp
@@ -31,8 +34,6 @@ from app.routes.webhook import webhook_bp
 from app.routes.analytics import analytics_bp
 from app.routes.auth import auth_bp
 
-from werkzeug.security import generate_password_hash
-
 
 # ==================================================
 # APP FACTORY
@@ -43,44 +44,17 @@ def create_app():
     app = Flask(__name__)
     CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 
-    # Initialize database
-    init_db()
-
-    # -------------------------------------------------
-    # SEED DEFAULT USERS
-    # -------------------------------------------------
-    conn = get_db()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT * FROM users WHERE email = ?", ("admin@pharmacy.com",))
-    if not cursor.fetchone():
-        cursor.execute("""
-            INSERT INTO users (name, email, password_hash, role)
-            VALUES (?, ?, ?, ?)
-        """, (
-            "Admin",
-            "admin@pharmacy.com",
-            generate_password_hash("admin123"),
-            "admin"
-        ))
-
-    cursor.execute("SELECT * FROM users WHERE email = ?", ("clerk@pharmacy.com",))
-    if not cursor.fetchone():
-        cursor.execute("""
-            INSERT INTO users (name, email, password_hash, role)
-            VALUES (?, ?, ?, ?)
-        """, (
-            "Clerk",
-            "clerk@pharmacy.com",
-            generate_password_hash("clerk123"),
-            "user"
-        ))
-
-    conn.commit()
-    conn.close()
-
-    # Load Excel data
-    load_all_data()
+    # Schema, default users and Excel data are set up offline
+    # (python manage.py setup); a worker only checks that the
+    # database is at the schema version this code expects
+    check_schema()
+
+    # Warm the typo-tolerant medicine index off the boot path; a search
+    # that arrives first builds it itself
+    threading.Thread(target=rebuild_medicine_index, daemon=True).start()
+
+    # Hand stock from lapsed reservations back in the background
+    app.extensions["hold_sweeper"] = HoldSweeper().start()
 
     # Register blueprints
     app.register_blueprint(inventory_bp, url_prefix="/inventory")
@@ -95,4 +69,8 @@ def create_app():
     def health():
         return {"status": "ok"}, 200
 
+    @app.route("/health/db", methods=["GET"])
+    def db_health():
+        return {"status": "ok", "pools": pool_stats()}, 200
+
     return app
\ No newline at end of file
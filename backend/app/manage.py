@@ -0,0 +1,161 @@
+# ==================================================
+# OFFLINE SETUP: MIGRATE / SEED / IMPORT
+# ==================================================
+# Run once per deploy or data refresh, before the workers start; app
+# workers only check the schema version (see create_app). Run from
+# backend/, where manage.py puts the repo root on sys.path like run.py:
+#
+#   python manage.py setup             migrate + seed + import
+#   python manage.py migrate           schema, indexes, FTS, version stamp,
+#                                      order events and rollups
+#   python manage.py seed              default admin / clerk users
+#   python manage.py import [--force]  Excel sheets, incremental
+#          [--products PATH] [--orders PATH] [--workers N]
+#                                      a sheet, a directory or a glob each,
+#                                      parsed by N processes
+#   python manage.py export-snapshot DIR / import-snapshot DIR
+#                                      columnar backup / restore
+#   python manage.py rebuild-rollups   order totals and revenue rollups,
+#                                      recomputed from the event log
+#   python manage.py refill-candidates [--output FILE]
+#                                      refill batch job: the
+#                                      refill_candidates table, or NDJSON
+
+import argparse
+import time
+
+from werkzeug.security import generate_password_hash
+
+from app.models.database import DB_PATH, get_db, init_db
+from app.services.order_event_service import backfill_order_events, rebuild_order_projections
+from app.services.refill_service import compute_refill_candidates, write_refill_candidates
+from app.utils.excel_loader import ORDERS_FILE, PRODUCTS_FILE, load_all_data
+from app.utils.pagination import ndjson_lines
+from app.utils.snapshot import export_snapshot, import_snapshot
+
+DEFAULT_USERS = (
+    ("Admin", "admin@pharmacy.com", "admin123", "admin"),
+    ("Clerk", "clerk@pharmacy.com", "clerk123", "user"),
+)
+
+
+def migrate():
+    """Schema first, then the event log and rollups of existing orders."""
+
+    init_db()
+
+    # A database from before the event log (or one whose rollups lag)
+    # must not pass check_schema() with empty projections
+    added = backfill_order_events()
+    if added:
+        print(f"Backfilled {added} order events.")
+
+
+def seed_users():
+    """Create the default users that do not exist yet; returns how many."""
+
+    conn = get_db()
+    cursor = conn.cursor()
+    created = 0
+
+    try:
+        for name, email, password, role in DEFAULT_USERS:
+            cursor.execute("SELECT 1 FROM users WHERE email = ?", (email,))
+            if cursor.fetchone():
+                continue
+
+            # Only hashed (deliberately slow) for users that are missing
+            cursor.execute("""
+                INSERT OR IGNORE INTO users (name, email, password_hash, role)
+                VALUES (?, ?, ?, ?)
+            """, (name, email, generate_password_hash(password), role))
+            created += cursor.rowcount
+
+        conn.commit()
+        return created
+    finally:
+        conn.close()
+
+
+def import_data(force=False, products=PRODUCTS_FILE, orders=ORDERS_FILE, workers=None):
+    load_all_data(force, products, orders, workers)
+
+
+def refill_candidates(output=None):
+    """Refill candidates for every customer in one pass; returns how many."""
+
+    candidates = compute_refill_candidates()
+
+    if output:
+        with open(output, "wb") as handle:
+            handle.writelines(ndjson_lines(candidates.items()))
+    else:
+        write_refill_candidates(candidates)
+
+    return len(candidates)
+
+
+def setup(force=False):
+    migrate()
+    seed_users()
+    import_data(force)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manage.py",
+                                     description=f"Set up the pharmacy database ({DB_PATH}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("migrate", help="Create or upgrade the schema and stamp its version.")
+    commands.add_parser("seed", help="Create the default users.")
+    for name, help_text in (("import", "Import the Excel sheets (incremental)."),
+                            ("setup", "migrate, seed and import.")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--force", action="store_true",
+                             help="Re-read the sheets even if their files are unchanged.")
+
+    command = commands.choices["import"]
+    command.add_argument("--products", default=PRODUCTS_FILE, metavar="PATH",
+                         help="Product sheet, directory of sheets or glob.")
+    command.add_argument("--orders", default=ORDERS_FILE, metavar="PATH",
+                         help="Order sheet, directory of sheets or glob.")
+    command.add_argument("--workers", type=int, metavar="N",
+                         help="Parser processes (default INGEST_WORKERS or the CPU count).")
+    for name, help_text in (("export-snapshot", "Write a columnar snapshot to a new directory."),
+                            ("import-snapshot", "Restore a snapshot into an empty database.")):
+        commands.add_parser(name, help=help_text).add_argument("path")
+    commands.add_parser("rebuild-rollups",
+                        help="Recompute order totals and revenue rollups from the event log.")
+    command = commands.add_parser("refill-candidates",
+                                  help="Compute refill candidates for every customer.")
+    command.add_argument("--output", metavar="FILE",
+                         help="Write NDJSON here instead of the refill_candidates table.")
+
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+
+    if args.command == "migrate":
+        migrate()
+    elif args.command == "seed":
+        print(f"{seed_users()} users created.")
+    elif args.command == "import":
+        import_data(args.force, args.products, args.orders, args.workers)
+    elif args.command == "export-snapshot":
+        for table, meta in export_snapshot(args.path)["tables"].items():
+            print(f"{table}: {meta['rows']} rows")
+    elif args.command == "import-snapshot":
+        for table, rows in import_snapshot(args.path).items():
+            print(f"{table}: {rows} rows")
+    elif args.command == "rebuild-rollups":
+        for table, rows in rebuild_order_projections().items():
+            print(f"{table}: {rows} rows")
+    elif args.command == "refill-candidates":
+        print(f"{refill_candidates(args.output)} refill candidates.")
+    else:
+        setup(args.force)
+
+    print(f"{args.command} done in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
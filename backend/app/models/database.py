@@ -1,6 +1,13 @@
+import os
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
+from app.utils.dates import normalize_purchase_date
+
 # -------------------------------------------------
 # PATH CONFIGURATION
 # -------------------------------------------------
@@ -9,17 +16,784 @@ BASE_DIR = Path(__file__).resolve().parents[2]
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
-DB_PATH = DATA_DIR / "pharmacy.db"
+DB_PATH = Path(os.getenv("PHARMACY_DB_PATH", DATA_DIR / "pharmacy.db"))
+
+
+# -------------------------------------------------
+# POOL CONFIGURATION
+# -------------------------------------------------
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+# Idle connections older than this are pinged before reuse
+HEALTH_CHECK_INTERVAL = 30.0
+
+
+def unicode_lower(text):
+    # SQLite's lower() and NOCASE only fold ASCII; this folds "Ä" too
+    return text.lower() if isinstance(text, str) else text
+
+# -------------------------------------------------
+# DURABILITY / PERFORMANCE PROFILES
+# -------------------------------------------------
+# journal_mode is persistent in the database file and is set by init_db();
+# every other pragma is per-connection and applied once when the pool
+# opens the connection, never per checkout.
+
+DB_PROFILES = {
+    # Every commit is fsynced before returning
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 10000,
+        "cache_size": -16000,
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+    },
+    # WAL + NORMAL: durable across app crashes, may lose the last
+    # commits on power loss. Default for gunicorn deployments.
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    # Bulk imports / benchmarks only
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "busy_timeout": 5000,
+        "cache_size": -256000,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+    },
+}
+
+DB_PROFILE = os.getenv("DB_PROFILE", "balanced")
+
+# Pragmas that cannot (or must not) be changed on a per-connection basis
+DATABASE_PRAGMAS = {"journal_mode"}
+
+
+def get_profile(name=None):
+    name = name or DB_PROFILE
+
+    if name not in DB_PROFILES:
+        raise ValueError(f"Unknown database profile: {name}")
+
+    return DB_PROFILES[name]
+
+
+def connection_pragmas(profile=None):
+    return {
+        key: value
+        for key, value in get_profile(profile).items()
+        if key not in DATABASE_PRAGMAS
+    }
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+# -------------------------------------------------
+# CONNECTION POOL
+# -------------------------------------------------
+
+class ConnectionPool:
+
+    def __init__(self, db_path, max_size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 pragmas=None, readonly=False):
+        self.db_path = str(db_path)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.readonly = readonly
+        self.pragmas = dict(connection_pragmas() if pragmas is None else pragmas)
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._size = 0
+
+        self._stats = {
+            "created": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "discarded": 0,
+            "timeouts": 0,
+        }
+
+    # -------------------------
+    # Connection lifecycle
+    # -------------------------
+    def _connect(self):
+        if self.readonly:
+            # mode=ro + query_only: readers can never take the write lock
+            uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+
+        conn.row_factory = sqlite3.Row
+        conn.create_function("unicode_lower", 1, unicode_lower, deterministic=True)
+
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+        if self.readonly:
+            conn.execute("PRAGMA query_only = 1")
+
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+        with self._lock:
+            self._size -= 1
+            self._stats["discarded"] += 1
+
+    def _is_healthy(self, conn, idle_since):
+        if time.monotonic() - idle_since < HEALTH_CHECK_INTERVAL:
+            return True
+
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _check_fork(self):
+        # Connections must never cross a fork (gunicorn preload)
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._idle = queue.LifoQueue()
+                self._size = 0
+                self._pid = os.getpid()
+
+    # -------------------------
+    # Checkout / release
+    # -------------------------
+    def acquire(self):
+        self._check_fork()
+        started = time.monotonic()
+        waited = False
+
+        while True:
+            try:
+                conn, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+
+            if conn is not None:
+                if self._is_healthy(conn, idle_since):
+                    break
+                self._discard(conn)
+                continue
+
+            with self._lock:
+                can_grow = self._size < self.max_size
+                if can_grow:
+                    self._size += 1
+
+            if can_grow:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                    raise
+
+                with self._lock:
+                    self._stats["created"] += 1
+                break
+
+            # Pool exhausted: wait for a release
+            waited = True
+            remaining = self.timeout - (time.monotonic() - started)
+
+            if remaining <= 0:
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                raise PoolTimeout(f"No database connection available after {self.timeout}s")
+
+            try:
+                conn, idle_since = self._idle.get(timeout=remaining)
+            except queue.Empty:
+                continue
+
+            if self._is_healthy(conn, idle_since):
+                break
+            self._discard(conn)
+
+        wait_ms = (time.monotonic() - started) * 1000
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_time_ms"] += wait_ms
+                self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+
+        return conn
+
+    def release(self, conn):
+        if self._pid != os.getpid():
+            return
+
+        try:
+            # Never hand out a connection with a half-finished transaction
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+
+        self._idle.put((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            raise
+        finally:
+            self.release(conn)
+
+    # -------------------------
+    # Maintenance / metrics
+    # -------------------------
+    def close_all(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            size = self._size
+
+        idle = self._idle.qsize()
+        checkouts = stats["checkouts"]
+
+        stats.update({
+            "readonly": self.readonly,
+            "size": size,
+            "max_size": self.max_size,
+            "idle": idle,
+            "in_use": size - idle,
+            "avg_wait_ms": round(stats["wait_time_ms"] / stats["waits"], 3) if stats["waits"] else 0.0,
+            "reuse_ratio": round(1 - stats["created"] / checkouts, 4) if checkouts else 0.0,
+        })
+        stats["wait_time_ms"] = round(stats["wait_time_ms"], 3)
+        stats["max_wait_ms"] = round(stats["max_wait_ms"], 3)
+
+        return stats
+
+
+class PooledConnection:
+    """sqlite3 connection checked out of the pool; close() hands it back."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(conn, name)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+    def __del__(self):
+        # Safety net for code paths that forget to close()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(readonly=False):
+    pool = _pools.get(readonly)
+
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(readonly)
+            if pool is None:
+                pool = ConnectionPool(DB_PATH, readonly=readonly)
+                _pools[readonly] = pool
+
+    return pool
+
+
+def configure_pool(db_path=None, profile=None, **kwargs):
+    global DB_PATH, DB_PROFILE, _fts_available
+
+    with _pool_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
+
+        if db_path is not None:
+            DB_PATH = Path(db_path)
+            _fts_available = None
+
+        if profile is not None:
+            get_profile(profile)
+            DB_PROFILE = profile
+
+        _pools[False] = ConnectionPool(DB_PATH, **kwargs)
+
+    return _pools[False]
+
+
+def pool_stats():
+    return {
+        "profile": DB_PROFILE,
+        "writer": get_pool().stats(),
+        "reader": get_pool(readonly=True).stats(),
+    }
 
 
 # -------------------------------------------------
 # DATABASE CONNECTION
 # -------------------------------------------------
+# Read-only connections are for GET paths: under WAL they read from a
+# snapshot and never queue behind create_order / cancel_order writes.
+
+def get_db(readonly=False):
+    pool = get_pool(readonly)
+    return PooledConnection(pool, pool.acquire())
 
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+
+@contextmanager
+def db_connection(readonly=False):
+    with get_pool(readonly).connection() as conn:
+        yield conn
+
+
+# -------------------------------------------------
+# MANAGED INDEXES
+# -------------------------------------------------
+# Every secondary index lives here. init_db() creates missing ones and
+# drops idx_* indexes that are no longer listed, so the schema never
+# drifts from this set. tests/test_query_plans.py checks that the hot
+# service queries actually use them.
+
+MANAGED_INDEXES = {
+    # get_customer_history and the last order date re-read after a
+    # reversal: equality on customer_id, ordered by date
+    "idx_orders_customer_date": """
+        CREATE INDEX IF NOT EXISTS idx_orders_customer_date
+        ON orders (customer_id, purchase_date, total_price)
+    """,
+    # Revenue time series: range seek on the timestamp, every figure
+    # read from the index
+    "idx_orders_ts": """
+        CREATE INDEX IF NOT EXISTS idx_orders_ts
+        ON orders (purchase_ts, total_price, quantity)
+    """,
+    # Same, filtered to one medicine
+    "idx_orders_product_ts": """
+        CREATE INDEX IF NOT EXISTS idx_orders_product_ts
+        ON orders (product_name COLLATE NOCASE, purchase_ts, total_price, quantity)
+    """,
+    # cancel_order stock restore by product name (exact, like the
+    # baseline)
+    "idx_medicines_name": """
+        CREATE INDEX IF NOT EXISTS idx_medicines_name
+        ON medicines (name)
+    """,
+    # get_medicine_by_name (LIKE) and the event backfill's
+    # case-insensitive name join
+    "idx_medicines_name_nocase": """
+        CREATE INDEX IF NOT EXISTS idx_medicines_name_nocase
+        ON medicines (name COLLATE NOCASE)
+    """,
+    # idempotency_service TTL sweep: range delete on age
+    "idx_idempotency_created": """
+        CREATE INDEX IF NOT EXISTS idx_idempotency_created
+        ON idempotency_keys (created_at)
+    """,
+    # reservation_service.expire_holds: only live holds are indexed, so
+    # the sweep never wades through confirmed/expired history
+    "idx_stock_holds_expiry": """
+        CREATE INDEX IF NOT EXISTS idx_stock_holds_expiry
+        ON stock_holds (expires_at) WHERE status = 'held'
+    """,
+    # order_event_service: the events of one order (cancel, status, backfill)
+    "idx_order_events_order": """
+        CREATE INDEX IF NOT EXISTS idx_order_events_order
+        ON order_events (order_id, event_type)
+    """,
+}
+
+
+def ensure_indexes(cursor):
+    cursor.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'index' AND name LIKE 'idx\\_%' ESCAPE '\\'
+    """)
+    existing = {row[0] for row in cursor.fetchall()}
+
+    for name in existing - MANAGED_INDEXES.keys():
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+    for ddl in MANAGED_INDEXES.values():
+        cursor.execute(ddl)
+
+
+@contextmanager
+def deferred_indexes(cursor, table):
+    """
+    Bulk load into an empty table: drop its idx_* indexes for the
+    inserts and build each once at the end (a sort instead of a b-tree
+    insert per row). Runs in the caller's transaction.
+    """
+
+    cursor.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = ? AND name LIKE 'idx\\_%' ESCAPE '\\'
+    """, (table,))
+
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+    try:
+        yield
+    finally:
+        ensure_indexes(cursor)
+
+
+# -------------------------------------------------
+# FULL-TEXT SEARCH (FTS5)
+# -------------------------------------------------
+# External-content index over medicines: the text lives only in the
+# medicines table, the triggers keep the index in sync. Stock updates
+# do not fire the update trigger (UPDATE OF name, description, pzn).
+
+FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS medicines_fts USING fts5(
+        name,
+        description,
+        pzn,
+        content = 'medicines',
+        content_rowid = 'id',
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3 4'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS medicines_fts_ai AFTER INSERT ON medicines BEGIN
+        INSERT INTO medicines_fts (rowid, name, description, pzn)
+        VALUES (new.id, new.name, new.description, new.pzn);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS medicines_fts_ad AFTER DELETE ON medicines BEGIN
+        INSERT INTO medicines_fts (medicines_fts, rowid, name, description, pzn)
+        VALUES ('delete', old.id, old.name, old.description, old.pzn);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS medicines_fts_au
+    AFTER UPDATE OF name, description, pzn ON medicines BEGIN
+        INSERT INTO medicines_fts (medicines_fts, rowid, name, description, pzn)
+        VALUES ('delete', old.id, old.name, old.description, old.pzn);
+        INSERT INTO medicines_fts (rowid, name, description, pzn)
+        VALUES (new.id, new.name, new.description, new.pzn);
+    END
+    """,
+]
+
+_fts_available = None
+
+
+def ensure_fts(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'medicines_fts'")
+    existed = cursor.fetchone() is not None
+
+    try:
+        for ddl in FTS_SCHEMA:
+            cursor.execute(ddl)
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: search falls back to LIKE
+        print("FTS5 not available. Medicine search will use LIKE.")
+        return False
+
+    if not existed:
+        # Index rows that were loaded before the triggers existed
+        cursor.execute("INSERT INTO medicines_fts (medicines_fts) VALUES ('rebuild')")
+
+    return True
+
+
+def has_fts():
+    global _fts_available
+
+    if _fts_available is None:
+        with db_connection(readonly=True) as conn:
+            row = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'medicines_fts'"
+            ).fetchone()
+        _fts_available = row is not None
+
+    return _fts_available
+
+
+# -------------------------------------------------
+# CATALOG VERSION
+# -------------------------------------------------
+# Single-row counter bumped by trigger for every medicines row that is
+# inserted, updated or deleted, whichever process or code path wrote it.
+# In-process caches compare it against the version they loaded.
+# names_version only moves when the set of (id, name) pairs does, so
+# the fuzzy index survives stock writes.
+
+CATALOG_VERSION_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS catalog_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL DEFAULT 0,
+        updated_at REAL NOT NULL,
+        names_version INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    INSERT OR IGNORE INTO catalog_state (id, version, updated_at)
+    VALUES (1, 0, (julianday('now') - 2440587.5) * 86400.0)
+    """,
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS catalog_version_{event.lower()}
+    AFTER {event} ON medicines BEGIN
+        UPDATE catalog_state
+        SET version = version + 1,
+            updated_at = (julianday('now') - 2440587.5) * 86400.0
+        WHERE id = 1;
+    END
+    """
+    for event in ("INSERT", "UPDATE", "DELETE")
+]
+
+CATALOG_NAMES_SCHEMA = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS catalog_names_{event.lower()}
+    AFTER {event} ON medicines BEGIN
+        UPDATE catalog_state SET names_version = names_version + 1 WHERE id = 1;
+    END
+    """
+    for event in ("INSERT", "DELETE")
+] + [
+    """
+    CREATE TRIGGER IF NOT EXISTS catalog_names_update
+    AFTER UPDATE OF name ON medicines
+    WHEN OLD.name IS NOT NEW.name
+    BEGIN
+        UPDATE catalog_state SET names_version = names_version + 1 WHERE id = 1;
+    END
+    """,
+]
+
+
+# Last line of defence behind the conditional decrements in order_service
+STOCK_GUARD_SCHEMA = """
+    CREATE TRIGGER IF NOT EXISTS medicines_stock_guard
+    BEFORE UPDATE OF stock ON medicines
+    WHEN NEW.stock < 0
+    BEGIN
+        SELECT RAISE(ABORT, 'stock cannot be negative');
+    END
+"""
+
+
+# -------------------------------------------------
+# ORDER EVENT LOG
+# -------------------------------------------------
+# order_events is append-only (enforced by trigger); seq is the rowid, so
+# "everything since N" is a primary-key range. quantity and amount are
+# signed: reversals (cancelled, refunded) carry the negated values, so
+# any aggregate is a plain SUM over the log. orders, the *_totals, the
+# revenue_* and demand rollups are projections kept current by
+# order_event_service in the writer's transaction.
+
+ORDER_EVENTS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS order_events (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_type TEXT NOT NULL CHECK (event_type IN ('created', 'cancelled', 'refunded')),
+        order_id INTEGER NOT NULL,
+        customer_id TEXT,
+        medicine_id INTEGER,
+        product_name TEXT,
+        quantity INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        purchase_date TEXT,
+        recorded_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS order_events_no_update
+    BEFORE UPDATE ON order_events BEGIN
+        SELECT RAISE(ABORT, 'order_events is append-only');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS order_events_no_delete
+    BEFORE DELETE ON order_events BEGIN
+        SELECT RAISE(ABORT, 'order_events is append-only');
+    END
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS customer_order_totals (
+        customer_id TEXT PRIMARY KEY,
+        order_count INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        revenue REAL NOT NULL,
+        last_seq INTEGER NOT NULL,
+        last_purchase_date TEXT
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS medicine_order_totals (
+        product_name TEXT PRIMARY KEY,
+        order_count INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        revenue REAL NOT NULL,
+        last_seq INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+] + [
+    f"""
+    CREATE TABLE IF NOT EXISTS revenue_{period} (
+        {key} TEXT PRIMARY KEY,
+        order_count INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        revenue REAL NOT NULL,
+        last_seq INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """
+    for period, key in (("daily", "day"), ("monthly", "month"))
+] + [
+    # Demand per medicine per purchase day (days since 1970-01-01, UTC);
+    # day leads the key so a forecast window is one range read
+    """
+    CREATE TABLE IF NOT EXISTS medicine_demand_daily (
+        day INTEGER NOT NULL,
+        medicine_id INTEGER NOT NULL,
+        order_count INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        revenue REAL NOT NULL,
+        last_seq INTEGER NOT NULL,
+        PRIMARY KEY (day, medicine_id)
+    ) WITHOUT ROWID
+    """,
+]
+
+
+# -------------------------------------------------
+# PURCHASE TIMESTAMPS
+# -------------------------------------------------
+# Fills purchase_ts for rows written before the column existed (or by a
+# loader that did not set it) and rewrites their purchase_date in the
+# canonical text form. Rows still NULL afterwards have no parseable
+# date; the NULL range of idx_orders_ts makes the check a seek.
+
+def normalize_purchase_dates(cursor):
+    cursor.execute("SELECT id, purchase_date FROM orders WHERE purchase_ts IS NULL")
+    updates = [
+        (text, ts, row[0])
+        for row in cursor.fetchall()
+        for text, ts in [normalize_purchase_date(row[1])]
+        if ts is not None
+    ]
+
+    cursor.executemany(
+        "UPDATE orders SET purchase_date = ?, purchase_ts = ? WHERE id = ?",
+        updates
+    )
+    return len(updates)
+
+
+def get_catalog_version(cursor):
+    cursor.execute("SELECT version, updated_at FROM catalog_state WHERE id = 1")
+    row = cursor.fetchone()
+    return (row[0], row[1]) if row else (0, 0.0)
+
+
+def get_catalog_state(cursor):
+    """(version, updated_at, names_version) in one primary-key read."""
+
+    cursor.execute("SELECT version, updated_at, names_version FROM catalog_state WHERE id = 1")
+    row = cursor.fetchone()
+    return (row[0], row[1], row[2]) if row else (0, 0.0, 0)
+
+
+# -------------------------------------------------
+# SCHEMA VERSION
+# -------------------------------------------------
+# init_db() stamps PRAGMA user_version (a field of the file header)
+# once every step below has run. Migrating is an offline step
+# (python manage.py migrate); app workers only compare the stamp
+# with SCHEMA_VERSION. Bump it with every change to init_db().
+
+SCHEMA_VERSION = 3
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def get_schema_version(cursor):
+    cursor.execute("PRAGMA user_version")
+    return cursor.fetchone()[0]
+
+
+def check_schema():
+    """The database's schema version; raises SchemaVersionError unless current."""
+
+    if not DB_PATH.exists():
+        raise SchemaVersionError(
+            f"No database at {DB_PATH}: run `python manage.py setup`"
+        )
+
+    with db_connection(readonly=True) as conn:
+        version = get_schema_version(conn.cursor())
+
+    if version != SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"Database schema is version {version}, this code expects {SCHEMA_VERSION}: "
+            "run `python manage.py migrate`"
+        )
+
+    return version
 
 
 # -------------------------------------------------
@@ -27,9 +801,14 @@ def get_db():
 # -------------------------------------------------
 
 def init_db():
+    global _fts_available
+
     conn = get_db()
     cursor = conn.cursor()
 
+    # Persistent in the file header; every later connection inherits it
+    cursor.execute(f"PRAGMA journal_mode = {get_profile()['journal_mode']}")
+
     # -------------------------------------------------
     # MEDICINES TABLE
     # -------------------------------------------------
@@ -105,6 +884,91 @@ def init_db():
     )
     """)
 
+    # -------------------------------------------------
+    # IDEMPOTENCY KEYS (ORDER RETRIES)
+    # -------------------------------------------------
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        scope TEXT NOT NULL,
+        key TEXT NOT NULL,
+        request_hash TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (scope, key)
+    ) WITHOUT ROWID
+    """)
+
+    # -------------------------------------------------
+    # STOCK HOLDS (RESERVATIONS)
+    # -------------------------------------------------
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS stock_holds (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id TEXT NOT NULL,
+        medicine_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        status TEXT NOT NULL DEFAULT 'held',
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        order_id INTEGER
+    )
+    """)
+
+    # -------------------------------------------------
+    # REFILL CANDIDATES (BATCH JOB OUTPUT)
+    # -------------------------------------------------
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS refill_candidates (
+        customer_id TEXT NOT NULL,
+        medicine TEXT NOT NULL,
+        last_purchase_ts INTEGER NOT NULL,
+        refill_days INTEGER NOT NULL,
+        due_ts INTEGER NOT NULL,
+        generated_at REAL NOT NULL,
+        PRIMARY KEY (customer_id, medicine)
+    ) WITHOUT ROWID
+    """)
+
+    # -------------------------------------------------
+    # IMPORT MANIFESTS (EXCEL RE-IMPORT)
+    # -------------------------------------------------
+    # One row per import run, and the key/content hash of every sheet
+    # row as of the last import, so a re-import only writes the delta
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS import_manifests (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source TEXT NOT NULL,
+        file_name TEXT NOT NULL,
+        file_size INTEGER NOT NULL,
+        file_mtime REAL NOT NULL,
+        file_hash TEXT NOT NULL,
+        status TEXT NOT NULL CHECK (status IN ('applied', 'unchanged')),
+        rows_read INTEGER NOT NULL,
+        inserted INTEGER NOT NULL,
+        updated INTEGER NOT NULL,
+        unchanged INTEGER NOT NULL,
+        missing INTEGER NOT NULL,
+        started_at REAL NOT NULL,
+        finished_at REAL NOT NULL
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS import_rows (
+        source TEXT NOT NULL,
+        row_key TEXT NOT NULL,
+        row_hash TEXT NOT NULL,
+        PRIMARY KEY (source, row_key)
+    ) WITHOUT ROWID
+    """)
+
+    # -------------------------------------------------
+    # ORDER EVENT LOG + PROJECTIONS
+    # -------------------------------------------------
+    for ddl in ORDER_EVENTS_SCHEMA:
+        cursor.execute(ddl)
+
     # -------------------------------------------------
     # SAFE MIGRATION CHECKS
     # -------------------------------------------------
@@ -132,5 +996,48 @@ def init_db():
     if "uploaded_at" not in prescription_columns:
         cursor.execute("ALTER TABLE prescriptions ADD COLUMN uploaded_at DATETIME")
 
+    # Ensure customer summary carries the last order date
+    cursor.execute("PRAGMA table_info(customer_order_totals)")
+    summary_columns = [col[1] for col in cursor.fetchall()]
+
+    if "last_purchase_date" not in summary_columns:
+        cursor.execute("ALTER TABLE customer_order_totals ADD COLUMN last_purchase_date TEXT")
+
+    # Ensure orders carry a normalized integer timestamp
+    cursor.execute("PRAGMA table_info(orders)")
+    order_columns = [col[1] for col in cursor.fetchall()]
+
+    if "purchase_ts" not in order_columns:
+        cursor.execute("ALTER TABLE orders ADD COLUMN purchase_ts INTEGER")
+
+    # -------------------------------------------------
+    # INDEXES
+    # -------------------------------------------------
+    ensure_indexes(cursor)
+
+    normalize_purchase_dates(cursor)
+
+    _fts_available = ensure_fts(cursor)
+
+    for ddl in CATALOG_VERSION_SCHEMA:
+        cursor.execute(ddl)
+
+    # Ensure the catalog state carries the name-only counter
+    cursor.execute("PRAGMA table_info(catalog_state)")
+    state_columns = [col[1] for col in cursor.fetchall()]
+
+    if "names_version" not in state_columns:
+        cursor.execute("ALTER TABLE catalog_state ADD COLUMN names_version INTEGER NOT NULL DEFAULT 0")
+
+    for ddl in CATALOG_NAMES_SCHEMA:
+        cursor.execute(ddl)
+
+    cursor.execute(STOCK_GUARD_SCHEMA)
+
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
     conn.commit()
+
+    # Refresh planner statistics for tables whose shape changed
+    cursor.execute("PRAGMA optimize")
     conn.close()
\ No newline at end of file
@@ -2,7 +2,7 @@ from app.models.database import get_db
 
 
 def get_medicine_by_name(name: str):
-    conn = get_db()
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
 
     cursor.execute("""
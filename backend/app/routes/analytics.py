@@ -1,8 +1,20 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from app.services.analytics_service import (
     get_user_metrics,
-    get_admin_revenue
+    get_user_metrics_batch,
+    get_admin_revenue,
+    get_revenue_timeseries,
+    get_revenue_by_period,
+    get_top_medicines,
+    get_customer_spend,
+    get_quantity_histogram,
+    get_analytics_summary
 )
+from app.services.forecast_service import get_reorder_suggestions
+from app.services.order_event_service import get_events_since
+from app.services.refill_service import compute_refill_candidates, get_customer_refills
+from app.utils.auth_utils import require_role
+from app.utils.pagination import ndjson_response
 
 analytics_bp = Blueprint("analytics", __name__)
 
@@ -14,8 +26,149 @@ def user_metrics_route(customer_id):
     return jsonify(response), status
 
 
+@analytics_bp.route("/user-metrics", methods=["POST"])
+def user_metrics_batch_route():
+
+    # {"customer_ids": ["PAT001", "PAT002", ...]} -> metrics keyed by id
+    data = request.get_json(silent=True)
+
+    if not data:
+        return jsonify({"status": "error", "message": "Request body required"}), 400
+
+    response, status = get_user_metrics_batch(data.get("customer_ids"))
+    return jsonify(response), status
+
+
 @analytics_bp.route("/admin/revenue", methods=["GET"])
 def admin_revenue_route():
 
-    response, status = get_admin_revenue()
-    return jsonify(response), status
\ No newline at end of file
+    # ?period=month (default) | day
+    response, status = get_admin_revenue(request.args.get("period", "month"))
+    return jsonify(response), status
+
+
+@analytics_bp.route("/admin/revenue/timeseries", methods=["GET"])
+@require_role("admin")
+def revenue_timeseries_route():
+
+    # ?bucket=hour|day|week|month&from=&to=&medicine_id=|medicine=
+    args = request.args
+    response, status = get_revenue_timeseries(
+        args.get("bucket", "day"),
+        args.get("from"),
+        args.get("to"),
+        args.get("medicine_id", type=int),
+        args.get("medicine")
+    )
+    return jsonify(response), status
+
+
+@analytics_bp.route("/admin/order-events", methods=["GET"])
+@require_role("admin")
+def order_events_route():
+
+    # ?since=<seq> -> events after seq, oldest first; resume from last_seq
+    response, status = get_events_since(
+        request.args.get("since", 0),
+        request.args.get("limit")
+    )
+    return jsonify(response), status
+
+
+@analytics_bp.route("/admin/reorder-suggestions", methods=["GET"])
+@require_role("admin")
+def reorder_suggestions_route():
+
+    # ?lead_time=&coverage_days=&service_level=&window=&limit=&all=true
+    args = request.args
+    response, status = get_reorder_suggestions(
+        args.get("lead_time"),
+        args.get("coverage_days"),
+        args.get("service_level"),
+        args.get("window"),
+        args.get("limit"),
+        args.get("all", "").lower() in ("1", "true", "yes")
+    )
+    return jsonify(response), status
+
+
+@analytics_bp.route("/admin/refill-candidates", methods=["GET"])
+@require_role("admin")
+def refill_candidates_route():
+
+    # Every due (customer, medicine) pair, one pass over orders, as NDJSON
+    try:
+        candidates = compute_refill_candidates()
+    except Exception:
+        return jsonify({
+            "status": "error",
+            "code": "internal_error",
+            "message": "Failed to compute refill candidates"
+        }), 500
+
+    return ndjson_response(candidates.items())
+
+
+@analytics_bp.route("/refill-candidates/<customer_id>", methods=["GET"])
+def customer_refills_route(customer_id):
+
+    # Output of the last `python manage.py refill-candidates` run
+    response, status = get_customer_refills(customer_id)
+    return jsonify(response), status
+
+
+# -------------------------------------------------
+# /admin/analytics/* (COLUMNAR ENGINE)
+# -------------------------------------------------
+# Common filters: ?start=YYYY-MM-DD&end=YYYY-MM-DD (inclusive)
+
+@analytics_bp.route("/admin/analytics/revenue", methods=["GET"])
+@require_role("admin")
+def analytics_revenue_route():
+
+    args = request.args
+    response, status = get_revenue_by_period(
+        args.get("period", "month"), args.get("start"), args.get("end")
+    )
+    return jsonify(response), status
+
+
+@analytics_bp.route("/admin/analytics/top-medicines", methods=["GET"])
+@require_role("admin")
+def analytics_top_medicines_route():
+
+    args = request.args
+    response, status = get_top_medicines(
+        args.get("limit"), args.get("by", "revenue"), args.get("start"), args.get("end")
+    )
+    return jsonify(response), status
+
+
+@analytics_bp.route("/admin/analytics/customers", methods=["GET"])
+@require_role("admin")
+def analytics_customers_route():
+
+    args = request.args
+    response, status = get_customer_spend(
+        args.get("limit"), args.get("by", "revenue"), args.get("start"), args.get("end")
+    )
+    return jsonify(response), status
+
+
+@analytics_bp.route("/admin/analytics/quantity-histogram", methods=["GET"])
+@require_role("admin")
+def analytics_quantity_histogram_route():
+
+    args = request.args
+    response, status = get_quantity_histogram(
+        args.get("max_quantity"), args.get("start"), args.get("end")
+    )
+    return jsonify(response), status
+
+
+@analytics_bp.route("/admin/analytics/summary", methods=["GET"])
+@require_role("admin")
+def analytics_summary_route():
+
+    response, status = get_analytics_summary()
+    return jsonify(response), status
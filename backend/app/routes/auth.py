@@ -24,7 +24,7 @@ def login():
     email = data["email"]
     password = data["password"]
 
-    conn = get_db()
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
 
     cursor.execute("""
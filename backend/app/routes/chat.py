@@ -25,7 +25,10 @@ def chat():
 
         # 🔥 CALL AGENT DIRECTLY
         print("📩 Incoming message:", message)
-        result = run_agent(message)
+        # A client resending the same message passes the same id, so the
+        # agent's order writes are not repeated
+        message_id = data.get("message_id") or request.headers.get("Idempotency-Key")
+        result = run_agent(message, message_id)
 
         # Return only clean message to UI
         return jsonify({
@@ -3,12 +3,22 @@ from app.services.inventory_service import (
     check_inventory,
     update_stock,
     get_all_medicines,
-    search_medicines
+    search_medicines,
+    stream_medicines,
+    stream_search_medicines,
+    fuzzy_search_medicines,
+    get_catalog_cache_stats
 )
+from app.services.catalog_cache import current_catalog_version
 from app.utils.auth_utils import require_role
+from app.utils.pagination import ndjson_response
+from app.utils.response_cache import ResponseCache, conditional_json
 
 inventory_bp = Blueprint("inventory", __name__)
 
+# Serialized GET bodies keyed by request, valid for one catalog version
+response_cache = ResponseCache()
+
 
 # -------------------------------------------------
 # GET ALL MEDICINES
@@ -16,8 +26,22 @@ inventory_bp = Blueprint("inventory", __name__)
 @inventory_bp.route("/medicines", methods=["GET"])
 def get_medicines_route():
     try:
-        response, status = get_all_medicines()
-        return jsonify(response), status
+        # ?limit=&cursor= -> keyset pages, ?format=ndjson -> streamed rows
+        limit = request.args.get("limit")
+        cursor = request.args.get("cursor")
+
+        if request.args.get("format") == "ndjson":
+            rows, status = stream_medicines(cursor, limit)
+            if status != 200:
+                return jsonify(rows), status
+            return ndjson_response(rows)
+
+        return conditional_json(
+            response_cache,
+            ("medicines", limit, cursor),
+            current_catalog_version,
+            lambda: get_all_medicines(limit, cursor)
+        )
     except Exception:
         return jsonify({
             "status": "error",
@@ -41,8 +65,23 @@ def search_route():
                 "message": "Search query required"
             }), 400
 
-        response, status = search_medicines(query)
-        return jsonify(response), status
+        # mode=fts -> ranked prefix search, mode=like (default) -> substring
+        mode = request.args.get("mode", "like")
+        limit = request.args.get("limit", type=int)
+        cursor = request.args.get("cursor")
+
+        if request.args.get("format") == "ndjson":
+            rows, status = stream_search_medicines(query, cursor, limit)
+            if status != 200:
+                return jsonify(rows), status
+            return ndjson_response(rows)
+
+        return conditional_json(
+            response_cache,
+            ("search", query, mode, limit, cursor),
+            current_catalog_version,
+            lambda: search_medicines(query, mode, limit, cursor)
+        )
 
     except Exception:
         return jsonify({
@@ -52,6 +91,36 @@ def search_route():
         }), 500
 
 
+# -------------------------------------------------
+# CATALOG CACHE METRICS
+# -------------------------------------------------
+@inventory_bp.route("/cache-stats", methods=["GET"])
+def cache_stats_route():
+    response, status = get_catalog_cache_stats()
+    response["data"]["responses"] = response_cache.stats()
+    return jsonify(response), status
+
+
+# -------------------------------------------------
+# FUZZY MEDICINE LOOKUP (TYPO TOLERANT)
+# -------------------------------------------------
+@inventory_bp.route("/fuzzy", methods=["GET"])
+def fuzzy_search_route():
+    try:
+        query = request.args.get("query")
+        limit = request.args.get("limit", type=int)
+
+        response, status = fuzzy_search_medicines(query, limit)
+        return jsonify(response), status
+
+    except Exception:
+        return jsonify({
+            "status": "error",
+            "code": "internal_error",
+            "message": "Fuzzy search endpoint failed"
+        }), 500
+
+
 # -------------------------------------------------
 # GET SINGLE MEDICINE INVENTORY
 # -------------------------------------------------
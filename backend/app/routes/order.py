@@ -1,10 +1,22 @@
 from flask import Blueprint, request, jsonify
 from app.services.order_service import (
     create_order,
+    create_cart_order,
     get_customer_history,
     cancel_order,
-    get_order_status
+    refund_order,
+    get_order_status,
+    get_monthly_quantity,
+    stream_customer_history
 )
+from app.services.reservation_service import (
+    reserve_stock,
+    confirm_reservation,
+    release_reservation,
+    get_reservation
+)
+from app.utils.pagination import ndjson_response
+from app.utils.auth_utils import require_role
 
 order_bp = Blueprint("order", __name__)
 
@@ -18,6 +30,17 @@ def create_order_route():
         return jsonify({"status": "error", "message": "Request body required"}), 400
 
     customer_id = data.get("customer_id")
+
+    # Cart: {"customer_id": ..., "items": [{"medicine_id": ..., "quantity": ...}]}
+    if "items" in data:
+        if not customer_id:
+            return jsonify({"status": "error", "message": "Missing fields"}), 400
+
+        response, status = create_cart_order(
+            customer_id, data["items"], request.headers.get("Idempotency-Key")
+        )
+        return jsonify(response), status
+
     medicine_id = data.get("medicine_id")
     quantity = data.get("quantity")
 
@@ -31,14 +54,34 @@ def create_order_route():
     except:
         return jsonify({"status": "error", "message": "Invalid quantity"}), 400
 
-    response, status = create_order(customer_id, medicine_id, quantity)
+    response, status = create_order(
+        customer_id, medicine_id, quantity, request.headers.get("Idempotency-Key")
+    )
     return jsonify(response), status
 
 
 @order_bp.route("/customer-history/<customer_id>", methods=["GET"])
 def customer_history_route(customer_id):
 
-    response, status = get_customer_history(customer_id)
+    # ?limit=&cursor= -> keyset pages, ?format=ndjson -> streamed rows
+    limit = request.args.get("limit")
+    cursor = request.args.get("cursor")
+
+    if request.args.get("format") == "ndjson":
+        rows, status = stream_customer_history(customer_id, cursor, limit)
+        if status != 200:
+            return jsonify(rows), status
+        return ndjson_response(rows)
+
+    response, status = get_customer_history(customer_id, limit, cursor)
+    return jsonify(response), status
+
+
+@order_bp.route("/monthly-quantity/<customer_id>", methods=["GET"])
+def monthly_quantity_route(customer_id):
+
+    # ?medicine=<name> -> units ordered this month (UTC)
+    response, status = get_monthly_quantity(customer_id, request.args.get("medicine"))
     return jsonify(response), status
 
 
@@ -50,7 +93,20 @@ def cancel_order_route():
     if not data or not data.get("order_id"):
         return jsonify({"status": "error", "message": "order_id required"}), 400
 
-    response, status = cancel_order(data["order_id"])
+    response, status = cancel_order(data["order_id"], request.headers.get("Idempotency-Key"))
+    return jsonify(response), status
+
+
+@order_bp.route("/refund-order", methods=["POST"])
+@require_role("admin")
+def refund_order_route():
+
+    data = request.get_json()
+
+    if not data or not data.get("order_id"):
+        return jsonify({"status": "error", "message": "order_id required"}), 400
+
+    response, status = refund_order(data["order_id"], request.headers.get("Idempotency-Key"))
     return jsonify(response), status
 
 
@@ -58,4 +114,57 @@ def cancel_order_route():
 def order_status_route(order_id):
 
     response, status = get_order_status(order_id)
-    return jsonify(response), status
\ No newline at end of file
+    return jsonify(response), status
+
+
+# -------------------------------------------------
+# RESERVATIONS (HOLD -> CONFIRM / RELEASE)
+# -------------------------------------------------
+
+@order_bp.route("/reserve-stock", methods=["POST"])
+def reserve_stock_route():
+
+    data = request.get_json()
+
+    if not data or not data.get("medicine_id"):
+        return jsonify({"status": "error", "message": "medicine_id required"}), 400
+
+    response, status = reserve_stock(
+        data.get("customer_id"),
+        data["medicine_id"],
+        data.get("quantity"),
+        data.get("ttl"),
+        request.headers.get("Idempotency-Key")
+    )
+    return jsonify(response), status
+
+
+@order_bp.route("/confirm-reservation", methods=["POST"])
+def confirm_reservation_route():
+
+    data = request.get_json()
+
+    if not data or not data.get("hold_id"):
+        return jsonify({"status": "error", "message": "hold_id required"}), 400
+
+    response, status = confirm_reservation(data["hold_id"], data.get("customer_id"))
+    return jsonify(response), status
+
+
+@order_bp.route("/release-reservation", methods=["POST"])
+def release_reservation_route():
+
+    data = request.get_json()
+
+    if not data or not data.get("hold_id"):
+        return jsonify({"status": "error", "message": "hold_id required"}), 400
+
+    response, status = release_reservation(data["hold_id"], data.get("customer_id"))
+    return jsonify(response), status
+
+
+@order_bp.route("/reservation/<int:hold_id>", methods=["GET"])
+def reservation_route(hold_id):
+
+    response, status = get_reservation(hold_id)
+    return jsonify(response), status
@@ -28,8 +28,12 @@ def vapi_webhook():
                 "response": "No transcript found."
             }), 400
 
+        # Redeliveries carry the same id (Idempotency-Key header or
+        # message_id field), so they do not order twice
+        message_id = request.headers.get("Idempotency-Key") or data.get("message_id")
+
         # Call your existing agent orchestrator
-        agent_response, status_code = process_chat_message(transcript)
+        agent_response, status_code = process_chat_message(transcript, message_id)
 
         # Extract reply safely
         reply_text = agent_response.get("data", {}).get("reply") \
@@ -7,7 +7,7 @@ from agents.core.agent_runner import run_agent
 # MAIN ORCHESTRATOR (OPENAI-DRIVEN)
 # -------------------------------------------
 
-def process_chat_message(message: str):
+def process_chat_message(message: str, message_id: str = None):
 
     # -------------------------
     # Validation
@@ -31,7 +31,7 @@ def process_chat_message(message: str):
     try:
 
         # 🔥 Call your real OpenAI agent
-        agent_result = run_agent(message)
+        agent_result = run_agent(message, message_id)
 
         # run_agent already returns:
         # {
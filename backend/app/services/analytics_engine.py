@@ -0,0 +1,330 @@
+import threading
+
+import numpy as np
+
+from app.models import database
+from app.models.database import db_connection
+
+# -------------------------------------------------
+# COLUMNAR ORDER ANALYTICS
+# -------------------------------------------------
+# The order event log, held as NumPy columns:
+#   customer  int32   index into engine.customers
+#   medicine  int32   index into engine.medicines (by product name)
+#   quantity  int32   signed, reversals are negative
+#   amount    float64 signed, reversals are negative
+#   sign      int8    +1 created, -1 cancelled/refunded
+#   day       int32   purchase day as days since 1970-01-01
+# Every aggregate is a weighted bincount over a group index, and a
+# reversal cancels its order without locating it. refresh() appends
+# only the events logged since the last seq, so the arrays stay in step
+# with the log at the cost of one primary-key range read.
+
+MISSING_DAY = np.iinfo(np.int32).min
+PERIODS = ("day", "week", "month")
+REFRESH_BATCH = 50000
+
+COLUMN_TYPES = {
+    "customer": np.int32,
+    "medicine": np.int32,
+    "quantity": np.int32,
+    "amount": np.float64,
+    "sign": np.int8,
+    "day": np.int32,
+}
+
+# SQLite parses the dates, so a malformed one becomes MISSING_DAY
+EVENT_QUERY = f"""
+    SELECT seq,
+           COALESCE(customer_id, ''),
+           COALESCE(product_name, ''),
+           quantity,
+           amount,
+           CASE event_type WHEN 'created' THEN 1 ELSE -1 END,
+           COALESCE(
+               CAST(julianday(substr(purchase_date, 1, 10)) - 2440587.5 AS INTEGER),
+               {MISSING_DAY}
+           )
+    FROM order_events
+    WHERE seq > ?
+    ORDER BY seq
+"""
+
+
+class OrderColumns:
+    """Growable column arrays; capacity doubles, so appends are amortised O(1)."""
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.capacity = capacity
+        self.arrays = {name: np.empty(capacity, dtype) for name, dtype in COLUMN_TYPES.items()}
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, name):
+        return self.arrays[name][:self.size]
+
+    def append(self, columns):
+        count = len(columns["day"])
+        needed = self.size + count
+
+        if needed > self.capacity:
+            self.capacity = max(needed, self.capacity * 2)
+            for name, array in self.arrays.items():
+                grown = np.empty(self.capacity, array.dtype)
+                grown[:self.size] = array[:self.size]
+                self.arrays[name] = grown
+
+        for name, values in columns.items():
+            self.arrays[name][self.size:needed] = values
+
+        self.size = needed
+
+
+class _Dictionary:
+    """String <-> dense int id; new strings get the next id."""
+
+    def __init__(self):
+        self.values = []
+        self.ids = {}
+
+    def encode(self, strings):
+        ids = self.ids
+
+        for value in set(strings).difference(ids):
+            ids[value] = len(self.values)
+            self.values.append(value)
+
+        return np.fromiter(map(ids.__getitem__, strings), np.int32, len(strings))
+
+
+def parse_day(value, name):
+    if value is None or value == "":
+        return None
+
+    try:
+        return int(np.datetime64(str(value)[:10], "D").astype(np.int64))
+    except ValueError:
+        raise ValueError(f"{name} must be a YYYY-MM-DD date")
+
+
+def day_label(day):
+    return str(np.datetime64(int(day), "D"))
+
+
+class OrderAnalyticsEngine:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset(None)
+
+    def _reset(self, path):
+        self.path = path
+        self.last_seq = 0
+        self.columns = OrderColumns()
+        self.customers = _Dictionary()
+        self.medicines = _Dictionary()
+
+    # -------------------------------------------------
+    # LOADING
+    # -------------------------------------------------
+
+    def refresh(self):
+        """Append events logged since the last refresh; returns how many."""
+
+        with self._lock:
+            if self.path != database.DB_PATH:
+                self._reset(database.DB_PATH)
+
+            appended = 0
+
+            with db_connection(readonly=True) as conn:
+                # Plain tuples: no sqlite3.Row per event
+                cursor = conn.cursor()
+                cursor.row_factory = None
+                cursor.execute(EVENT_QUERY, (self.last_seq,))
+
+                while True:
+                    rows = cursor.fetchmany(REFRESH_BATCH)
+                    if not rows:
+                        break
+                    self._append(rows)
+                    appended += len(rows)
+
+            return appended
+
+    def _append(self, rows):
+        seqs, customers, medicines, quantity, amount, sign, day = zip(*rows)
+
+        self.columns.append({
+            "customer": self.customers.encode(customers),
+            "medicine": self.medicines.encode(medicines),
+            "quantity": np.fromiter(quantity, np.int32, len(rows)),
+            "amount": np.fromiter(amount, np.float64, len(rows)),
+            "sign": np.fromiter(sign, np.int8, len(rows)),
+            "day": np.fromiter(day, np.int32, len(rows)),
+        })
+        self.last_seq = seqs[-1]
+
+    def invalidate(self):
+        with self._lock:
+            self._reset(None)
+
+    # -------------------------------------------------
+    # QUERIES
+    # -------------------------------------------------
+
+    def _selection(self, start=None, end=None):
+        """Column views restricted to [start, end] purchase days."""
+
+        self.refresh()
+
+        columns = {name: self.columns[name] for name in COLUMN_TYPES}
+        start_day = parse_day(start, "start")
+        end_day = parse_day(end, "end")
+
+        if start_day is None and end_day is None:
+            return columns
+
+        day = columns["day"]
+        mask = day != MISSING_DAY
+        if start_day is not None:
+            mask &= day >= start_day
+        if end_day is not None:
+            mask &= day <= end_day
+
+        return {name: values[mask] for name, values in columns.items()}
+
+    @staticmethod
+    def _group_totals(codes, columns, size):
+        return (
+            np.bincount(codes, weights=columns["sign"], minlength=size),
+            np.bincount(codes, weights=columns["quantity"], minlength=size),
+            np.bincount(codes, weights=columns["amount"], minlength=size),
+        )
+
+    def revenue_by_period(self, period="month", start=None, end=None):
+
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+
+        with self._lock:
+            columns = self._selection(start, end)
+
+        keep = columns["day"] != MISSING_DAY
+        day = columns["day"][keep].astype(np.int64)
+        columns = {name: values[keep] for name, values in columns.items()}
+
+        if period == "day":
+            keys = day
+        elif period == "week":
+            # Weeks start on Monday; day 0 (1970-01-01) was a Thursday
+            keys = (day + 3) // 7
+        elif len(day):
+            # Convert each distinct day once, then gather per row
+            first = day.min()
+            span = np.arange(first, day.max() + 1).astype("datetime64[D]")
+            keys = span.astype("datetime64[M]").astype(np.int64)[day - first]
+        else:
+            keys = day
+
+        if not len(keys):
+            return []
+
+        # Period keys are dense integers: offset them into bincount slots
+        # instead of sorting (np.unique) every row
+        base = keys.min()
+        codes = keys - base
+        groups = np.arange(codes.max() + 1) + base
+        orders, quantity, revenue = self._group_totals(codes, columns, len(groups))
+
+        result = []
+        for i in np.flatnonzero(orders > 0):
+            key = groups[i]
+            if period == "day":
+                label = day_label(key)
+            elif period == "week":
+                label = day_label(key * 7 - 3)
+            else:
+                label = str(np.datetime64(int(key), "M"))
+
+            result.append({
+                "period": label,
+                "orders": int(orders[i]),
+                "quantity": int(quantity[i]),
+                "revenue": round(float(revenue[i]), 2)
+            })
+
+        return result
+
+    def _top(self, dictionary, code_column, limit, by, start, end):
+
+        if by not in ("revenue", "quantity", "orders"):
+            raise ValueError("by must be one of revenue, quantity, orders")
+
+        with self._lock:
+            columns = self._selection(start, end)
+            labels = list(dictionary.values)
+
+        orders, quantity, revenue = self._group_totals(columns[code_column], columns, len(labels))
+        ranked = {"revenue": revenue, "quantity": quantity, "orders": orders}[by]
+
+        live = np.flatnonzero(orders > 0)
+        if len(live) > limit:
+            # Partial selection, then sort only the winners
+            live = live[np.argpartition(-ranked[live], limit - 1)[:limit]]
+        live = live[np.argsort(-ranked[live], kind="stable")]
+
+        return [
+            {
+                "name": labels[i],
+                "orders": int(orders[i]),
+                "quantity": int(quantity[i]),
+                "revenue": round(float(revenue[i]), 2)
+            }
+            for i in live
+        ]
+
+    def top_medicines(self, limit=10, by="revenue", start=None, end=None):
+        return self._top(self.medicines, "medicine", limit, by, start, end)
+
+    def customer_spend(self, limit=10, by="revenue", start=None, end=None):
+        return self._top(self.customers, "customer", limit, by, start, end)
+
+    def quantity_histogram(self, max_quantity=10, start=None, end=None):
+        """Live orders per ordered quantity; the last bucket is max_quantity+."""
+
+        with self._lock:
+            columns = self._selection(start, end)
+
+        buckets = np.minimum(np.abs(columns["quantity"]), max_quantity)
+        counts = np.bincount(buckets, weights=columns["sign"], minlength=max_quantity + 1)
+
+        return [
+            {
+                "quantity": f"{q}+" if q == max_quantity else str(q),
+                "orders": int(counts[q])
+            }
+            for q in range(1, max_quantity + 1)
+        ]
+
+    def summary(self):
+
+        with self._lock:
+            columns = self._selection()
+            size = len(self.columns)
+            last_seq = self.last_seq
+
+        return {
+            "orders": int(columns["sign"].sum(dtype=np.int64)),
+            "quantity": int(columns["quantity"].sum(dtype=np.int64)),
+            "revenue": round(float(columns["amount"].sum()), 2),
+            "customers": len(self.customers.values),
+            "medicines": len(self.medicines.values),
+            "events": size,
+            "last_seq": last_seq
+        }
+
+
+analytics_engine = OrderAnalyticsEngine()
@@ -1,4 +1,8 @@
+import time
+
 from app.models.database import get_db
+from app.services.analytics_engine import analytics_engine
+from app.utils.dates import parse_range_bound
 
 
 # -------------------------------------------------
@@ -13,45 +17,32 @@ def get_user_metrics(customer_id: str):
             "message": "Customer ID required"
         }, 400
 
-    conn = get_db()
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
 
     try:
-        # Total Orders
-        cursor.execute("""
-            SELECT COUNT(*) as total_orders
-            FROM orders
-            WHERE customer_id = ?
-        """, (customer_id,))
-        total_orders = cursor.fetchone()["total_orders"]
-
-        # Total Spent
+        # Order figures come from the per-customer summary maintained by
+        # order_event_service; prescriptions depend on "now", so they are
+        # counted live in the same round trip
         cursor.execute("""
-            SELECT COALESCE(SUM(total_price), 0) as total_spent
-            FROM orders
-            WHERE customer_id = ?
-        """, (customer_id,))
-        total_spent = cursor.fetchone()["total_spent"]
-
-        # Last Order Date
-        cursor.execute("""
-            SELECT purchase_date
-            FROM orders
-            WHERE customer_id = ?
-            ORDER BY purchase_date DESC
-            LIMIT 1
+            SELECT
+                COALESCE(t.order_count, 0) AS total_orders,
+                COALESCE(t.revenue, 0) AS total_spent,
+                t.last_purchase_date AS last_order_date,
+                (
+                    SELECT COUNT(*) FROM prescriptions
+                    WHERE customer_id = c.customer_id
+                      AND expires_at > datetime('now')
+                ) AS active_prescriptions
+            FROM (SELECT ? AS customer_id) c
+            LEFT JOIN customer_order_totals t ON t.customer_id = c.customer_id
         """, (customer_id,))
         row = cursor.fetchone()
-        last_order_date = row["purchase_date"] if row else None
 
-        # Active Prescriptions
-        cursor.execute("""
-            SELECT COUNT(*) as active_prescriptions
-            FROM prescriptions
-            WHERE customer_id = ?
-              AND expires_at > datetime('now')
-        """, (customer_id,))
-        active_prescriptions = cursor.fetchone()["active_prescriptions"]
+        total_orders = row["total_orders"]
+        total_spent = row["total_spent"]
+        last_order_date = row["last_order_date"]
+        active_prescriptions = row["active_prescriptions"]
 
         conn.close()
 
@@ -72,22 +63,122 @@ def get_user_metrics(customer_id: str):
             "code": "internal_error",
             "message": "Failed to calculate user metrics"
         }, 500
-        # -------------------------------------------------
+
+
+# -------------------------------------------------
+# BATCHED USER METRICS
+# -------------------------------------------------
+# Same four figures for many customers in two set-based queries: one
+# IN (...) lookup on the customer summary, one grouped prescription
+# count. Customers with no orders get zeros, like the single route.
+
+MAX_METRICS_BATCH = 500
+
+
+def get_user_metrics_batch(customer_ids):
+
+    if not isinstance(customer_ids, list) or not customer_ids:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "customer_ids must be a non-empty list"
+        }, 400
+
+    if len(customer_ids) > MAX_METRICS_BATCH:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": f"At most {MAX_METRICS_BATCH} customer_ids per request"
+        }, 400
+
+    ids = list(dict.fromkeys(str(customer_id) for customer_id in customer_ids if customer_id))
+    if not ids:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "customer_ids must be a non-empty list"
+        }, 400
+
+    placeholders = ", ".join("?" * len(ids))
+
+    conn = get_db(readonly=True)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(f"""
+            SELECT customer_id, order_count, revenue, last_purchase_date
+            FROM customer_order_totals
+            WHERE customer_id IN ({placeholders})
+        """, ids)
+        totals = {row["customer_id"]: row for row in cursor.fetchall()}
+
+        cursor.execute(f"""
+            SELECT customer_id, COUNT(*) AS active_prescriptions
+            FROM prescriptions
+            WHERE customer_id IN ({placeholders})
+              AND expires_at > datetime('now')
+            GROUP BY customer_id
+        """, ids)
+        prescriptions = {row["customer_id"]: row["active_prescriptions"] for row in cursor.fetchall()}
+
+        conn.close()
+
+        data = {}
+        for customer_id in ids:
+            row = totals.get(customer_id)
+            data[customer_id] = {
+                "total_orders": row["order_count"] if row else 0,
+                "total_spent": round(row["revenue"], 2) if row else 0,
+                "active_prescriptions": prescriptions.get(customer_id, 0),
+                "last_order_date": row["last_purchase_date"] if row else None
+            }
+
+        return {
+            "status": "success",
+            "count": len(data),
+            "data": data
+        }, 200
+
+    except Exception:
+        conn.close()
+        return {
+            "status": "error",
+            "code": "internal_error",
+            "message": "Failed to calculate user metrics"
+        }, 500
+
+
+# -------------------------------------------------
 # ADMIN REVENUE METRICS
 # -------------------------------------------------
-def get_admin_revenue():
+REVENUE_PERIODS = {
+    "month": ("revenue_monthly", "month"),
+    "day": ("revenue_daily", "day"),
+}
+
+
+def get_admin_revenue(period: str = "month"):
+
+    if period not in REVENUE_PERIODS:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": f"period must be one of {', '.join(REVENUE_PERIODS)}"
+        }, 400
 
-    conn = get_db()
+    table, key = REVENUE_PERIODS[period]
+
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            SELECT 
-                substr(purchase_date, 1, 7) as month,
-                SUM(total_price) as revenue
-            FROM orders
-            GROUP BY month
-            ORDER BY month ASC
+        # Rollup rows, one per period: O(periods), not O(orders).
+        # Periods whose orders were all reversed drop out.
+        cursor.execute(f"""
+            SELECT {key} AS period, revenue
+            FROM {table}
+            WHERE order_count > 0
+            ORDER BY {key} ASC
         """)
 
         rows = cursor.fetchall()
@@ -95,7 +186,7 @@ def get_admin_revenue():
 
         data = [
             {
-                "month": row["month"],
+                period: row["period"],
                 "revenue": round(row["revenue"], 2)
             }
             for row in rows
@@ -112,4 +203,194 @@ def get_admin_revenue():
             "status": "error",
             "code": "internal_error",
             "message": "Failed to calculate revenue"
-        }, 500
\ No newline at end of file
+        }, 500
+
+
+# -------------------------------------------------
+# REVENUE TIME SERIES
+# -------------------------------------------------
+# Buckets computed from the integer purchase_ts, so the range predicate
+# is a seek on idx_orders_ts (or idx_orders_product_ts with a medicine
+# filter) and every summed column comes from the index. Ranges are
+# half-open [from, to), in UTC.
+
+TIMESERIES_BUCKETS = {
+    "hour": ("purchase_ts / 3600 * 3600", "%Y-%m-%d %H:00"),
+    "day": ("purchase_ts / 86400 * 86400", "%Y-%m-%d"),
+    # Weeks start on Monday; day 0 (1970-01-01) was a Thursday
+    "week": ("((purchase_ts / 86400 + 3) / 7 * 7 - 3) * 86400", "%Y-%m-%d"),
+    "month": (
+        "CAST(strftime('%s', purchase_ts, 'unixepoch', 'start of month') AS INTEGER)",
+        "%Y-%m"
+    ),
+}
+
+
+def get_revenue_timeseries(bucket="day", start=None, end=None, medicine_id=None, medicine=None):
+
+    if bucket not in TIMESERIES_BUCKETS:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": f"bucket must be one of {', '.join(TIMESERIES_BUCKETS)}"
+        }, 400
+
+    try:
+        start_ts = parse_range_bound(start, "from")
+        end_ts = parse_range_bound(end, "to", end=True)
+    except ValueError as e:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": str(e)
+        }, 400
+
+    bucket_sql, label_format = TIMESERIES_BUCKETS[bucket]
+    conditions = ["purchase_ts IS NOT NULL"]
+    params = []
+
+    if start_ts is not None:
+        conditions.append("purchase_ts >= ?")
+        params.append(start_ts)
+    if end_ts is not None:
+        conditions.append("purchase_ts < ?")
+        params.append(end_ts)
+
+    conn = get_db(readonly=True)
+    cursor = conn.cursor()
+
+    try:
+        if medicine_id is not None:
+            cursor.execute("SELECT name FROM medicines WHERE id = ?", (medicine_id,))
+            row = cursor.fetchone()
+            if not row:
+                conn.close()
+                return {
+                    "status": "error",
+                    "code": "not_found",
+                    "message": "Medicine not found"
+                }, 404
+            medicine = row["name"]
+
+        if medicine:
+            conditions.append("product_name = ? COLLATE NOCASE")
+            params.append(medicine)
+
+        cursor.execute(f"""
+            SELECT
+                {bucket_sql} AS bucket_start,
+                COUNT(*) AS orders,
+                SUM(quantity) AS quantity,
+                SUM(total_price) AS revenue
+            FROM orders
+            WHERE {" AND ".join(conditions)}
+            GROUP BY bucket_start
+            ORDER BY bucket_start
+        """, params)
+
+        rows = cursor.fetchall()
+        conn.close()
+
+        data = [
+            {
+                "bucket": time.strftime(label_format, time.gmtime(row["bucket_start"])),
+                "start": row["bucket_start"],
+                "orders": row["orders"],
+                "quantity": row["quantity"],
+                "revenue": round(row["revenue"], 2)
+            }
+            for row in rows
+        ]
+
+        return {
+            "status": "success",
+            "bucket": bucket,
+            "from": start_ts,
+            "to": end_ts,
+            "medicine": medicine,
+            "data": data
+        }, 200
+
+    except Exception:
+        conn.close()
+        return {
+            "status": "error",
+            "code": "internal_error",
+            "message": "Failed to calculate revenue time series"
+        }, 500
+
+
+# -------------------------------------------------
+# COLUMNAR ANALYTICS (NUMPY ENGINE)
+# -------------------------------------------------
+# Served from analytics_engine's in-memory columns, which catch up with
+# the order event log on every call. Bad parameters surface from the
+# engine as ValueError.
+
+MAX_ANALYTICS_LIMIT = 500
+
+
+def _engine_call(compute, message):
+
+    try:
+        return {
+            "status": "success",
+            "data": compute()
+        }, 200
+
+    except ValueError as e:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": str(e)
+        }, 400
+
+    except Exception:
+        return {
+            "status": "error",
+            "code": "internal_error",
+            "message": message
+        }, 500
+
+
+def _limit(value, default=10):
+    try:
+        limit = default if value is None else int(value)
+    except (ValueError, TypeError):
+        raise ValueError("limit must be an integer")
+
+    if not 1 <= limit <= MAX_ANALYTICS_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_ANALYTICS_LIMIT}")
+    return limit
+
+
+def get_revenue_by_period(period="month", start=None, end=None):
+    return _engine_call(
+        lambda: analytics_engine.revenue_by_period(period, start, end),
+        "Failed to calculate revenue"
+    )
+
+
+def get_top_medicines(limit=None, by="revenue", start=None, end=None):
+    return _engine_call(
+        lambda: analytics_engine.top_medicines(_limit(limit), by, start, end),
+        "Failed to rank medicines"
+    )
+
+
+def get_customer_spend(limit=None, by="revenue", start=None, end=None):
+    return _engine_call(
+        lambda: analytics_engine.customer_spend(_limit(limit), by, start, end),
+        "Failed to rank customers"
+    )
+
+
+def get_quantity_histogram(max_quantity=None, start=None, end=None):
+    return _engine_call(
+        lambda: analytics_engine.quantity_histogram(_limit(max_quantity), start, end),
+        "Failed to build quantity histogram"
+    )
+
+
+def get_analytics_summary():
+    return _engine_call(analytics_engine.summary, "Failed to summarise orders")
@@ -0,0 +1,242 @@
+import re
+import string
+import threading
+from bisect import bisect_right
+from itertools import islice
+
+from app.models import database
+from app.models.database import db_connection, get_catalog_state, get_catalog_version
+
+# -------------------------------------------------
+# ROW LAYOUT
+# -------------------------------------------------
+# Rows are plain tuples (id, name, price, stock, prescription_required):
+# roughly a third of the memory of sqlite3.Row / dict per medicine.
+
+ID, NAME, PRICE, STOCK, PRESCRIPTION = range(5)
+
+CATALOG_COLUMNS = "id, name, price, stock, prescription_required"
+
+# SQLite's LOWER() and LIKE only fold ASCII letters
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def fold(text: str):
+    return text.translate(ASCII_LOWER)
+
+
+def like_matcher(text: str):
+    """Predicate on a folded name: LOWER(name) LIKE LOWER('%text%'), wildcards included."""
+
+    text = fold(text)
+    if "%" not in text and "_" not in text:
+        return lambda name: text in name
+
+    # % is any run of characters, _ exactly one
+    pattern = "".join(
+        ".*" if char == "%" else "." if char == "_" else re.escape(char)
+        for char in text
+    )
+    return re.compile(pattern, re.DOTALL).search
+
+
+class CatalogSnapshot:
+
+    __slots__ = ("path", "version", "updated_at", "names_version", "rows", "order", "positions",
+                 "names_lower")
+
+    def __init__(self, path, version, updated_at, names_version, rows):
+        self.path = path
+        self.version = version
+        self.updated_at = updated_at
+        self.names_version = names_version
+        self.rows = {row[ID]: row for row in rows}
+        self.order = [row[ID] for row in rows]
+        self.positions = {medicine_id: i for i, medicine_id in enumerate(self.order)}
+        self.names_lower = [fold(row[NAME]) for row in rows]
+
+    def patched(self, rows, version, updated_at):
+        """A new snapshot with `rows` replaced; this one is left untouched."""
+
+        snapshot = CatalogSnapshot.__new__(CatalogSnapshot)
+        snapshot.path = self.path
+        snapshot.version = version
+        snapshot.updated_at = updated_at
+        snapshot.names_version = self.names_version
+        # Same ids, so the ordering is shared rather than copied
+        snapshot.order = self.order
+        snapshot.positions = self.positions
+        snapshot.rows = dict(self.rows)
+        snapshot.names_lower = self.names_lower
+
+        for row in rows:
+            snapshot.rows[row[ID]] = row
+            position = self.positions[row[ID]]
+            name = fold(row[NAME])
+            if snapshot.names_lower[position] != name:
+                if snapshot.names_lower is self.names_lower:
+                    snapshot.names_lower = list(self.names_lower)
+                snapshot.names_lower[position] = name
+
+        return snapshot
+
+    def get(self, medicine_id):
+        return self.rows.get(medicine_id)
+
+    def all(self):
+        rows = self.rows
+        return [rows[medicine_id] for medicine_id in self.order]
+
+    def _start(self, after_id):
+        # order is sorted by id, so a keyset cursor is a binary search
+        return 0 if after_id is None else bisect_right(self.order, after_id)
+
+    def iter_rows(self, after_id=None):
+        rows, order = self.rows, self.order
+        for i in range(self._start(after_id), len(order)):
+            yield rows[order[i]]
+
+    def iter_substring(self, text: str, after_id=None):
+        # Same rows as WHERE LOWER(name) LIKE LOWER('%text%'), in id order
+        matches = like_matcher(text)
+        rows, order, names = self.rows, self.order, self.names_lower
+
+        for i in range(self._start(after_id), len(order)):
+            if matches(names[i]):
+                yield rows[order[i]]
+
+    def substring(self, text: str, limit: int = None):
+        return list(islice(self.iter_substring(text), limit))
+
+
+# -------------------------------------------------
+# READ-THROUGH CACHE
+# -------------------------------------------------
+# Every read checks catalog_state.version (one primary-key lookup) and
+# reloads the whole catalog only when another writer moved it. Writes in
+# this process swap in a patched copy after commit, so an order does not
+# cost a reload here, and readers still iterating the old snapshot never
+# see a half-applied patch.
+
+class CatalogCache:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "patches": 0,
+        }
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def snapshot(self, cursor):
+        version, updated_at, names_version = get_catalog_state(cursor)
+        snapshot = self._snapshot
+
+        if (snapshot is not None
+                and snapshot.path == database.DB_PATH
+                and snapshot.version == version):
+            self._count("hits")
+            return snapshot
+
+        self._count("misses")
+
+        cursor.execute(f"SELECT {CATALOG_COLUMNS} FROM medicines ORDER BY id")
+        rows = [tuple(row) for row in cursor.fetchall()]
+        fresh = CatalogSnapshot(database.DB_PATH, version, updated_at, names_version, rows)
+
+        with self._lock:
+            current = self._snapshot
+            if current is not None and current is not snapshot:
+                # Another thread already loaded; keep whichever is newer
+                if current.path == fresh.path and current.version >= fresh.version:
+                    return current
+            if current is not None:
+                self._stats["evictions"] += 1
+            self._snapshot = fresh
+
+        return fresh
+
+    # -------------------------
+    # Write path
+    # -------------------------
+    def capture_patch(self, cursor, medicine_ids, changed_rows):
+        # Call inside the write transaction, after the UPDATEs
+        ids = list(dict.fromkeys(medicine_ids))
+        version, updated_at, names_version = get_catalog_state(cursor)
+
+        rows = []
+        if ids:
+            cursor.execute(f"""
+                SELECT {CATALOG_COLUMNS}
+                FROM medicines
+                WHERE id IN ({", ".join("?" * len(ids))})
+            """, ids)
+            rows = [tuple(row) for row in cursor.fetchall()]
+
+        return {
+            "path": database.DB_PATH,
+            "version": version,
+            "updated_at": updated_at,
+            "names_version": names_version,
+            "changed_rows": changed_rows,
+            "ids": ids,
+            "rows": rows,
+        }
+
+    def apply_patch(self, patch):
+        # Call after commit. Patch only if nobody else wrote in between,
+        # i.e. our own row changes explain the whole version jump.
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.path != patch["path"]:
+                return
+
+            patchable = (
+                snapshot.version + patch["changed_rows"] == patch["version"]
+                and snapshot.names_version == patch["names_version"]
+                and len(patch["rows"]) == len(patch["ids"])
+                and all(row[ID] in snapshot.rows for row in patch["rows"])
+            )
+
+            if not patchable:
+                self._snapshot = None
+                self._stats["evictions"] += 1
+                return
+
+            self._snapshot = snapshot.patched(patch["rows"], patch["version"], patch["updated_at"])
+            self._stats["patches"] += 1
+
+    def invalidate(self):
+        with self._lock:
+            if self._snapshot is not None:
+                self._snapshot = None
+                self._stats["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            snapshot = self._snapshot
+
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "hit_ratio": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+            "version": snapshot.version if snapshot else None,
+            "size": len(snapshot.rows) if snapshot else 0,
+        })
+
+        return stats
+
+
+catalog_cache = CatalogCache()
+
+
+def current_catalog_version():
+    # (version, updated_at epoch seconds) without touching the snapshot
+    with db_connection(readonly=True) as conn:
+        return get_catalog_version(conn.cursor())
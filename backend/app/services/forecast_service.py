@@ -0,0 +1,214 @@
+import math
+import os
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+from app.models.database import get_db
+from app.services.catalog_cache import catalog_cache, NAME, STOCK
+
+# -------------------------------------------------
+# DEMAND FORECAST
+# -------------------------------------------------
+# Per-medicine daily demand over the last `window` days (today included,
+# UTC), read as one primary-key range of medicine_demand_daily (the
+# rollup kept by order_event_service, so cancelled and refunded orders
+# are already netted out). Every figure is a weighted bincount over the
+# catalog position, one pass over the (day, medicine) rows whatever
+# the catalog size:
+#   sma_7 / sma   mean units per day over the last 7 days / the window
+#   ewma          exponentially smoothed rate, recent days weigh most
+#   std           standard deviation of daily units over the window
+# Days without orders count as zero demand.
+
+FORECAST_WINDOW = int(os.getenv("FORECAST_WINDOW_DAYS", 90))
+LEAD_TIME_DAYS = float(os.getenv("REORDER_LEAD_TIME_DAYS", 7))
+COVERAGE_DAYS = float(os.getenv("REORDER_COVERAGE_DAYS", 14))
+SERVICE_LEVEL = 0.95
+SMOOTHING = 0.2
+SHORT_WINDOW = 7
+
+MAX_SUGGESTIONS = 1000
+
+
+def demand_forecast(window=FORECAST_WINDOW, alpha=SMOOTHING, now=None):
+
+    today = int(time.time() if now is None else now) // 86400
+    first_day = today - window + 1
+
+    conn = get_db(readonly=True)
+    try:
+        cursor = conn.cursor()
+        snapshot = catalog_cache.snapshot(cursor)
+
+        cursor.row_factory = None
+        cursor.execute("""
+            SELECT day, medicine_id, quantity
+            FROM medicine_demand_daily
+            WHERE day >= ? AND day <= ?
+        """, (first_day, today))
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    # snapshot.order is sorted by id: positions by binary search
+    ids = np.array(snapshot.order, dtype=np.int64)
+    size = len(ids)
+    stock = np.fromiter(
+        (snapshot.rows[medicine_id][STOCK] or 0 for medicine_id in snapshot.order),
+        np.float64, size
+    )
+
+    day, medicine_ids, units = np.array(rows, dtype=np.int64).reshape(-1, 3).T
+    codes = np.searchsorted(ids, medicine_ids)
+
+    # Medicines deleted since they were ordered are ignored
+    keep = codes < size
+    keep[keep] = ids[codes[keep]] == medicine_ids[keep]
+    codes, age, units = codes[keep], today - day[keep], units[keep].astype(np.float64)
+
+    total = np.bincount(codes, weights=units, minlength=size)
+    squares = np.bincount(codes, weights=units * units, minlength=size)
+    recent = age < SHORT_WINDOW
+    short = np.bincount(codes[recent], weights=units[recent], minlength=size)
+
+    sma = total / window
+    std = np.sqrt(np.maximum(squares / window - sma * sma, 0.0))
+
+    # s_t = a*x_t + (1-a)*s_{t-1}, unrolled: day d ago weighs a*(1-a)^d;
+    # the window mean seeds the recursion
+    decay = 1.0 - alpha
+    ewma = np.bincount(codes, weights=units * alpha * decay ** age, minlength=size)
+    ewma = ewma + decay ** window * sma
+
+    return {
+        "ids": ids,
+        "catalog": snapshot.rows,
+        "stock": stock,
+        "sma_7": short / min(SHORT_WINDOW, window),
+        "sma": sma,
+        "ewma": ewma,
+        "std": std,
+        "window": window,
+    }
+
+
+# -------------------------------------------------
+# REORDER POINTS
+# -------------------------------------------------
+# Classic continuous-review policy on the smoothed rate:
+#   safety stock   z * std * sqrt(lead time)
+#   reorder point  rate * lead time + safety stock
+#   order up to    rate * (lead time + coverage) + safety stock
+# A medicine is suggested once stock is at or below its reorder point.
+
+def reorder_points(forecast, lead_time=LEAD_TIME_DAYS, coverage=COVERAGE_DAYS,
+                   service_level=SERVICE_LEVEL):
+
+    z = NormalDist().inv_cdf(service_level)
+    rate = forecast["ewma"]
+
+    safety = z * forecast["std"] * math.sqrt(lead_time)
+    reorder_point = rate * lead_time + safety
+    order_up_to = rate * (lead_time + coverage) + safety
+
+    stock = forecast["stock"]
+    # Rounded first so float noise does not add a unit
+    quantity = np.ceil(np.round(np.maximum(order_up_to - stock, 0.0), 6))
+
+    days_of_cover = np.divide(stock, rate, out=np.full_like(rate, np.inf), where=rate > 0)
+
+    return {
+        "safety_stock": safety,
+        "reorder_point": reorder_point,
+        "order_quantity": quantity,
+        "days_of_cover": days_of_cover,
+        "needs_reorder": (rate > 0) & (stock <= reorder_point),
+    }
+
+
+def _number(value, name, low, high, cast=float):
+    try:
+        value = cast(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"{name} must be a number")
+
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return value
+
+
+def get_reorder_suggestions(lead_time=None, coverage=None, service_level=None,
+                            window=None, limit=None, include_all=False):
+
+    try:
+        lead_time = _number(LEAD_TIME_DAYS if lead_time is None else lead_time,
+                            "lead_time", 0, 365)
+        coverage = _number(COVERAGE_DAYS if coverage is None else coverage,
+                           "coverage_days", 0, 365)
+        service_level = _number(SERVICE_LEVEL if service_level is None else service_level,
+                                "service_level", 0.5, 0.999)
+        window = _number(FORECAST_WINDOW if window is None else window,
+                         "window", 1, 730, int)
+        limit = _number(100 if limit is None else limit, "limit", 1, MAX_SUGGESTIONS, int)
+    except ValueError as e:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": str(e)
+        }, 400
+
+    try:
+        forecast = demand_forecast(window)
+        policy = reorder_points(forecast, lead_time, coverage, service_level)
+
+        # Most urgent first: fewest days of stock left
+        cover = policy["days_of_cover"]
+        if include_all:
+            candidates = np.flatnonzero(forecast["ewma"] > 0)
+        else:
+            candidates = np.flatnonzero(policy["needs_reorder"])
+
+        total = len(candidates)
+        if total > limit:
+            candidates = candidates[np.argpartition(cover[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(cover[candidates], kind="stable")]
+
+        ids, catalog = forecast["ids"], forecast["catalog"]
+        data = [
+            {
+                "medicine_id": int(ids[i]),
+                "medicine": catalog[int(ids[i])][NAME],
+                "stock": int(forecast["stock"][i]),
+                "daily_demand": round(float(forecast["ewma"][i]), 3),
+                "avg_daily_demand_7d": round(float(forecast["sma_7"][i]), 3),
+                "avg_daily_demand": round(float(forecast["sma"][i]), 3),
+                "demand_std": round(float(forecast["std"][i]), 3),
+                "safety_stock": round(float(policy["safety_stock"][i]), 1),
+                "reorder_point": round(float(policy["reorder_point"][i]), 1),
+                "days_of_cover": round(float(cover[i]), 1),
+                "suggested_order_quantity": int(policy["order_quantity"][i]),
+                "needs_reorder": bool(policy["needs_reorder"][i])
+            }
+            for i in candidates
+        ]
+
+        return {
+            "status": "success",
+            "parameters": {
+                "lead_time": lead_time,
+                "coverage_days": coverage,
+                "service_level": service_level,
+                "window": window
+            },
+            "count": total,
+            "data": data
+        }, 200
+
+    except Exception:
+        return {
+            "status": "error",
+            "code": "internal_error",
+            "message": "Failed to calculate reorder suggestions"
+        }, 500
@@ -0,0 +1,235 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from app.models.database import db_connection
+from app.services.catalog_cache import ID, NAME, catalog_cache
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+
+MIN_SIMILARITY = 0.3      # word-level trigram Jaccard needed to count at all
+DEFAULT_LIMIT = 5
+ANCHOR_MIN_LENGTH = 4     # only drug-like words generate candidates
+
+
+def normalize(text: str):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.lower()
+
+
+def tokenize(text: str):
+    return re.findall(r"\w{2,}", normalize(text))
+
+
+def trigrams(word: str):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# -------------------------------------------------
+# TRIGRAM INDEX
+# -------------------------------------------------
+# Names are split into words; each distinct word is indexed once by its
+# trigrams. A query word is compared against the vocabulary through the
+# posting lists, so the cost depends on how many words share trigrams
+# with it, not on the catalog size.
+
+class TrigramIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+        self._words = []              # word id -> word
+        self._word_ids = {}           # word -> word id
+        self._word_sizes = []         # word id -> number of trigrams
+        self._word_medicines = []     # word id -> set of medicine ids
+        self._postings = {}           # trigram -> [word id]
+
+        self._names = {}              # medicine id -> name
+        self._medicine_words = {}     # medicine id -> tuple of word ids
+
+    def __len__(self):
+        return len(self._names)
+
+    # -------------------------
+    # Writes
+    # -------------------------
+    def _word_id(self, word):
+        word_id = self._word_ids.get(word)
+
+        if word_id is None:
+            word_id = len(self._words)
+            grams = trigrams(word)
+
+            self._words.append(word)
+            self._word_ids[word] = word_id
+            self._word_sizes.append(len(grams))
+            self._word_medicines.append(set())
+
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(word_id)
+
+        return word_id
+
+    def _remove(self, medicine_id):
+        for word_id in self._medicine_words.pop(medicine_id, ()):
+            self._word_medicines[word_id].discard(medicine_id)
+        self._names.pop(medicine_id, None)
+
+    def add(self, medicine_id, name):
+        with self._lock:
+            self._remove(medicine_id)
+
+            word_ids = tuple(dict.fromkeys(self._word_id(w) for w in tokenize(name)))
+            for word_id in word_ids:
+                self._word_medicines[word_id].add(medicine_id)
+
+            self._names[medicine_id] = name
+            self._medicine_words[medicine_id] = word_ids
+
+    def remove(self, medicine_id):
+        with self._lock:
+            self._remove(medicine_id)
+
+    # -------------------------
+    # Lookup
+    # -------------------------
+    def _similar_words(self, token):
+        grams = trigrams(token)
+        overlaps = Counter()
+
+        for gram in grams:
+            overlaps.update(self._postings.get(gram, ()))
+
+        # Jaccard >= t needs at least t * |grams| shared trigrams, which
+        # discards most posting hits before any division
+        size = len(grams)
+        min_shared = max(1, math.ceil(MIN_SIMILARITY * size))
+        word_sizes = self._word_sizes
+
+        similar = {}
+        for word_id, shared in overlaps.items():
+            if shared < min_shared:
+                continue
+
+            score = shared / (size + word_sizes[word_id] - shared)
+            if score >= MIN_SIMILARITY and self._word_medicines[word_id]:
+                similar[word_id] = score
+
+        return similar
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT):
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            token_matches = [self._similar_words(token) for token in tokens]
+
+            anchors = [
+                matches for token, matches in zip(tokens, token_matches)
+                if len(token) >= ANCHOR_MIN_LENGTH and not token.isdigit()
+            ] or token_matches
+
+            candidates = set()
+            for matches in anchors:
+                for word_id in matches:
+                    candidates.update(self._word_medicines[word_id])
+
+            scored = []
+            for medicine_id in candidates:
+                words = self._medicine_words[medicine_id]
+                total = 0.0
+
+                for matches in token_matches:
+                    total += max((matches.get(w, 0.0) for w in words), default=0.0)
+
+                # Shorter names win ties: "Ramipril 5 mg" over "Ramipril comp ..."
+                scored.append((total / len(tokens), -len(words), medicine_id))
+
+            best = heapq.nlargest(limit, scored)
+
+            return [
+                {
+                    "medicine_id": medicine_id,
+                    "name": self._names[medicine_id],
+                    "score": round(score, 3),
+                }
+                for score, _, medicine_id in best
+            ]
+
+
+# -------------------------------------------------
+# PROCESS-WIDE MEDICINE INDEX
+# -------------------------------------------------
+# Built from a catalog_cache snapshot, which the callers have already
+# version-checked, and keyed by (database path, names_version): stock
+# writes leave names_version alone, so they never cost a rebuild. When
+# the names did change, a new index is built outside the lock and
+# swapped in; searches still running on the old one are unaffected.
+
+_index = None                 # (key, TrigramIndex)
+_index_lock = threading.Lock()
+
+
+def _index_key(catalog):
+    return catalog.path, catalog.names_version
+
+
+def _load_catalog():
+    with db_connection(readonly=True) as conn:
+        return catalog_cache.snapshot(conn.cursor())
+
+
+def build_medicine_index(names):
+    index = TrigramIndex()
+    for medicine_id, name in names.items():
+        index.add(medicine_id, name)
+    return index
+
+
+def rebuild_medicine_index(catalog=None):
+    global _index
+
+    if catalog is None:
+        catalog = _load_catalog()
+    key = _index_key(catalog)
+    index = build_medicine_index({row[ID]: row[NAME] for row in catalog.iter_rows()})
+
+    with _index_lock:
+        current = _index
+        # A concurrent rebuild from newer names wins
+        if (current is not None and current[0][0] == key[0]
+                and current[0][1] > key[1]):
+            return current[1]
+        _index = (key, index)
+
+    return index
+
+
+def get_medicine_index(catalog=None):
+    if catalog is None:
+        catalog = _load_catalog()
+
+    current = _index
+    if current is not None and current[0] == _index_key(catalog):
+        return current[1]
+
+    return rebuild_medicine_index(catalog)
+
+
+def invalidate_medicine_index():
+    global _index
+
+    with _index_lock:
+        _index = None
+
+
+def fuzzy_match(query: str, limit: int = DEFAULT_LIMIT, catalog=None):
+    return get_medicine_index(catalog).search(query, limit)
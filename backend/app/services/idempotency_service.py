@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import time
+
+# -------------------------------------------------
+# IDEMPOTENCY KEYS
+# -------------------------------------------------
+# A client retrying a write sends the same Idempotency-Key header. The
+# first successful result is stored in the same transaction as the
+# write itself, so a duplicate is answered from idempotency_keys without
+# touching medicines or orders. Only committed results are stored:
+# rejected requests changed nothing and are simply evaluated again.
+
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", 24 * 3600))
+MAX_KEY_LENGTH = 255
+
+# Expired rows are swept at most this often per process
+SWEEP_INTERVAL = 60
+
+_last_sweep = 0.0
+
+
+def request_fingerprint(*parts):
+    payload = json.dumps(parts, separators=(",", ":"), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def check_key(key):
+
+    if key is None:
+        return None
+
+    if not key.strip() or len(key) > MAX_KEY_LENGTH:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"
+        }, 400
+
+    return None
+
+
+def lookup(cursor, scope, key, request_hash, now=None):
+    """Stored (response, status) for a live key, or None if unseen/expired."""
+
+    now = time.time() if now is None else now
+
+    cursor.execute("""
+        SELECT request_hash, status, response
+        FROM idempotency_keys
+        WHERE scope = ? AND key = ? AND created_at >= ?
+    """, (scope, key, now - IDEMPOTENCY_TTL))
+
+    row = cursor.fetchone()
+
+    if row is None:
+        return None
+
+    if row[0] != request_hash:
+        return {
+            "status": "error",
+            "code": "idempotency_conflict",
+            "message": "Idempotency-Key was already used with a different request"
+        }, 422
+
+    return json.loads(row[2]), row[1]
+
+
+def remember(cursor, scope, key, request_hash, response, status, now=None):
+    """
+    Store the result inside the caller's open transaction. Returns False
+    if a live entry already holds the key (a concurrent duplicate won),
+    in which case the caller rolls back and replays the stored result.
+    """
+
+    now = time.time() if now is None else now
+
+    _sweep(cursor, now)
+
+    # An expired entry for the same key is overwritten in place
+    cursor.execute("""
+        INSERT INTO idempotency_keys (scope, key, request_hash, status, response, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (scope, key) DO UPDATE SET
+            request_hash = excluded.request_hash,
+            status = excluded.status,
+            response = excluded.response,
+            created_at = excluded.created_at
+        WHERE idempotency_keys.created_at < ?
+    """, (
+        scope,
+        key,
+        request_hash,
+        status,
+        json.dumps(response, separators=(",", ":")),
+        now,
+        now - IDEMPOTENCY_TTL
+    ))
+
+    return cursor.rowcount == 1
+
+
+def replay_duplicate(conn, scope, key, request_hash):
+    """remember() lost: roll back the caller's write, close and return the stored result."""
+
+    # A concurrent request with the same key committed first
+    conn.rollback()
+    replay = lookup(conn.cursor(), scope, key, request_hash)
+    conn.close()
+    return replay
+
+
+def purge_expired(cursor, now=None):
+
+    now = time.time() if now is None else now
+
+    cursor.execute(
+        "DELETE FROM idempotency_keys WHERE created_at < ?",
+        (now - IDEMPOTENCY_TTL,)
+    )
+    return cursor.rowcount
+
+
+def _sweep(cursor, now):
+    global _last_sweep
+
+    if now - _last_sweep >= SWEEP_INTERVAL:
+        _last_sweep = now
+        purge_expired(cursor, now)
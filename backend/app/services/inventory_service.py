@@ -1,4 +1,70 @@
-from app.models.database import get_db
+import re
+from itertools import islice
+
+from app.models.database import get_db, has_fts
+from app.services.catalog_cache import ID, NAME, PRICE, STOCK, PRESCRIPTION, catalog_cache
+from app.services.fuzzy_match_service import DEFAULT_LIMIT as FUZZY_LIMIT, fuzzy_match
+from app.utils.pagination import InvalidPageRequest, page_params, take_page
+
+SEARCH_MODES = ("like", "fts")
+FTS_RESULT_LIMIT = 50
+
+
+# -------------------------------------------------
+# FULL-TEXT SEARCH HELPERS
+# -------------------------------------------------
+def build_fts_query(text: str):
+
+    # Every word must match as a prefix: "para 500" -> "para"* "500"*
+    terms = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def fts_search(cursor, catalog, text: str, limit: int = FTS_RESULT_LIMIT):
+
+    match = build_fts_query(text)
+
+    if not match:
+        return []
+
+    # bm25 weights: name, description, pzn. Only ids come from the
+    # index, the rows themselves from the catalog cache.
+    cursor.execute("""
+        SELECT rowid
+        FROM medicines_fts
+        WHERE medicines_fts MATCH ?
+        ORDER BY bm25(medicines_fts, 10.0, 1.0, 5.0)
+        LIMIT ?
+    """, (match, limit))
+
+    rows = (catalog.get(row[0]) for row in cursor.fetchall())
+    return [row for row in rows if row is not None]
+
+
+# -------------------------------------------------
+# FUZZY (TYPO-TOLERANT) SUGGESTIONS
+# -------------------------------------------------
+def fuzzy_suggestions(catalog, text: str, limit: int = FUZZY_LIMIT):
+
+    suggestions = []
+
+    # Scores come from the trigram index, stock from the version-checked catalog
+    for match in fuzzy_match(text, limit, catalog):
+        row = catalog.get(match["medicine_id"])
+        if row is None:
+            continue
+
+        suggestions.append({
+            "medicine_id": row[ID],
+            "name": row[NAME],
+            "price": row[PRICE],
+            "stock": row[STOCK],
+            "available": row[STOCK] > 0,
+            "prescription_required": row[PRESCRIPTION],
+            "score": match["score"]
+        })
+
+    return suggestions
 
 
 # -------------------------------------------------
@@ -25,37 +91,38 @@ def check_inventory(medicine: str):
             "message": "Medicine name cannot be empty"
         }, 400
 
-    conn = get_db()
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
 
     try:
-        # Case-insensitive partial search
-        cursor.execute("""
-            SELECT id, name, price, stock, prescription_required
-            FROM medicines
-            WHERE LOWER(name) LIKE LOWER(?)
-        """, (f"%{medicine}%",))
+        catalog = catalog_cache.snapshot(cursor)
 
-        rows = cursor.fetchall()
+        # Case-insensitive partial search on the name, as the agent expects:
+        # word-prefix FTS would miss "tabletten" in "Filmtabletten" and rank
+        # description / PZN hits first (see /inventory/search?mode=fts)
+        rows = catalog.substring(medicine)
 
         if not rows:
+            # Misspelled names ("paracetmol") get ranked candidates
+            suggestions = fuzzy_suggestions(catalog, medicine)
             conn.close()
             return {
                 "status": "error",
                 "code": "not_found",
-                "message": "Medicine not found"
+                "message": "Medicine not found",
+                "suggestions": suggestions
             }, 404
 
         results = []
 
         for row in rows:
             results.append({
-                "medicine_id": row["id"],
-                "name": row["name"],
-                "price": row["price"],
-                "stock": row["stock"],
-                "available": row["stock"] > 0,
-                "prescription_required": row["prescription_required"]
+                "medicine_id": row[ID],
+                "name": row[NAME],
+                "price": row[PRICE],
+                "stock": row[STOCK],
+                "available": row[STOCK] > 0,
+                "prescription_required": row[PRESCRIPTION]
             })
 
         conn.close()
@@ -121,9 +188,16 @@ def update_stock(medicine: str, delta: int):
                 "message": "Medicine not found"
             }, 404
 
-        new_stock = row["stock"] + delta
+        # Relative, guarded update: concurrent orders between the lookup
+        # and this statement are neither lost nor allowed to go negative
+        cursor.execute("""
+            UPDATE medicines
+            SET stock = stock + ?
+            WHERE id = ? AND stock + ? >= 0
+        """, (delta, row["id"], delta))
 
-        if new_stock < 0:
+        if cursor.rowcount == 0:
+            conn.rollback()
             conn.close()
             return {
                 "status": "error",
@@ -131,15 +205,14 @@ def update_stock(medicine: str, delta: int):
                 "message": "Stock cannot be negative"
             }, 400
 
-        cursor.execute("""
-            UPDATE medicines
-            SET stock = ?
-            WHERE id = ?
-        """, (new_stock, row["id"]))
+        patch = catalog_cache.capture_patch(cursor, [row["id"]], 1)
+        new_stock = patch["rows"][0][STOCK]
 
         conn.commit()
         conn.close()
 
+        catalog_cache.apply_patch(patch)
+
         return {
             "status": "success",
             "data": {
@@ -156,54 +229,97 @@ def update_stock(medicine: str, delta: int):
             "code": "internal_error",
             "message": "Stock update failed"
         }, 500
-    # -------------------------------------------
+
+
+# -------------------------------------------
 # GET ALL MEDICINES
 # -------------------------------------------
 
-from app.models.database import get_db
+def catalog_item(row):
 
-def get_all_medicines():
+    return {
+        "id": row[ID],
+        "name": row[NAME],
+        "price": row[PRICE],
+        "stock": row[STOCK],
+        "prescription_required": row[PRESCRIPTION]
+    }
 
-    conn = get_db()
-    cursor = conn.cursor()
 
-    try:
-        cursor.execute("""
-            SELECT id, name, price, stock, prescription_required
-            FROM medicines
-        """)
+def _load_catalog():
 
-        rows = cursor.fetchall()
+    conn = get_db(readonly=True)
+    try:
+        return catalog_cache.snapshot(conn.cursor())
+    finally:
         conn.close()
 
-        medicines = []
 
-        for row in rows:
-            medicines.append({
-                "id": row["id"],
-                "name": row["name"],
-                "price": row["price"],
-                "stock": row["stock"],
-                "prescription_required": row["prescription_required"]
-            })
+def get_all_medicines(limit: int = None, page_cursor: str = None):
+
+    paged = limit is not None or page_cursor is not None
+
+    try:
+        if paged:
+            limit, after = page_params(limit, page_cursor, 1)
+    except InvalidPageRequest as e:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": str(e)
+        }, 400
+
+    try:
+        catalog = _load_catalog()
+
+        if not paged:
+            return {
+                "status": "success",
+                "data": [catalog_item(row) for row in catalog.all()]
+            }, 200
+
+        # Keyset page on id: a binary search into the cached catalog
+        rows, next_cursor = take_page(
+            catalog.iter_rows(after[0] if after else None),
+            limit,
+            key=lambda row: (row[ID],)
+        )
 
         return {
             "status": "success",
-            "data": medicines
+            "data": [catalog_item(row) for row in rows],
+            "next_cursor": next_cursor
         }, 200
 
     except Exception:
-        conn.close()
         return {
             "status": "error",
             "code": "internal_error",
             "message": "Failed to fetch medicines"
         }, 500
-        # -------------------------------------------
+
+
+def stream_medicines(page_cursor: str = None, limit: int = None):
+
+    try:
+        limit, after = page_params(limit, page_cursor, 1, default=None)
+        catalog = _load_catalog()
+    except InvalidPageRequest as e:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": str(e)
+        }, 400
+
+    rows = catalog.iter_rows(after[0] if after else None)
+    return (catalog_item(row) for row in islice(rows, limit)), 200
+
+
+# -------------------------------------------
 # SEARCH MEDICINES
 # -------------------------------------------
 
-def search_medicines(query: str):
+def search_medicines(query: str, mode: str = "like", limit: int = None, page_cursor: str = None):
 
     if not query:
         return {
@@ -212,39 +328,130 @@ def search_medicines(query: str):
             "message": "Search query required"
         }, 400
 
-    conn = get_db()
+    if mode not in SEARCH_MODES:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": f"Search mode must be one of: {', '.join(SEARCH_MODES)}"
+        }, 400
+
+    if page_cursor is not None and mode != "like":
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "Cursor pagination is only supported for mode=like"
+        }, 400
+
+    paged = mode == "like" and (limit is not None or page_cursor is not None)
+
+    try:
+        if paged:
+            limit, after = page_params(limit, page_cursor, 1)
+    except InvalidPageRequest as e:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": str(e)
+        }, 400
+
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            SELECT id, name, price, stock, prescription_required
-            FROM medicines
-            WHERE LOWER(name) LIKE ?
-        """, (f"%{query.lower()}%",))
+        catalog = catalog_cache.snapshot(cursor)
+        next_cursor = None
+
+        if mode == "fts" and has_fts():
+            rows = fts_search(cursor, catalog, query, limit or FTS_RESULT_LIMIT)
+        elif paged:
+            rows, next_cursor = take_page(
+                catalog.iter_substring(query, after[0] if after else None),
+                limit,
+                key=lambda row: (row[ID],)
+            )
+        else:
+            rows = catalog.substring(query, limit)
+        conn.close()
+
+        payload = {
+            "status": "success",
+            "data": [catalog_item(row) for row in rows]
+        }
 
-        rows = cursor.fetchall()
+        if paged:
+            payload["next_cursor"] = next_cursor
+
+        return payload, 200
+
+    except Exception:
         conn.close()
+        return {
+            "status": "error",
+            "code": "internal_error",
+            "message": "Search failed"
+        }, 500
 
-        if not rows:
-            return {
-                "status": "success",
-                "data": []
-            }, 200
 
-        results = []
+def stream_search_medicines(query: str, page_cursor: str = None, limit: int = None):
+
+    if not query:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "Search query required"
+        }, 400
+
+    try:
+        limit, after = page_params(limit, page_cursor, 1, default=None)
+        catalog = _load_catalog()
+    except InvalidPageRequest as e:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": str(e)
+        }, 400
+
+    rows = catalog.iter_substring(query, after[0] if after else None)
+    return (catalog_item(row) for row in islice(rows, limit)), 200
+
+
+# -------------------------------------------
+# CATALOG CACHE STATS
+# -------------------------------------------
+
+def get_catalog_cache_stats():
+
+    return {
+        "status": "success",
+        "data": catalog_cache.stats()
+    }, 200
 
-        for row in rows:
-            results.append({
-                "id": row["id"],
-                "name": row["name"],
-                "price": row["price"],
-                "stock": row["stock"],
-                "prescription_required": row["prescription_required"]
-            })
+
+# -------------------------------------------
+# FUZZY MEDICINE LOOKUP
+# -------------------------------------------
+
+def fuzzy_search_medicines(query: str, limit: int = None):
+
+    if not query or not isinstance(query, str) or not query.strip():
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "Search query required"
+        }, 400
+
+    conn = get_db(readonly=True)
+    cursor = conn.cursor()
+
+    try:
+        catalog = catalog_cache.snapshot(cursor)
+        suggestions = fuzzy_suggestions(catalog, query.strip(), limit or FUZZY_LIMIT)
+        conn.close()
 
         return {
             "status": "success",
-            "data": results
+            "count": len(suggestions),
+            "data": suggestions
         }, 200
 
     except Exception:
@@ -252,5 +459,5 @@ def search_medicines(query: str):
         return {
             "status": "error",
             "code": "internal_error",
-            "message": "Search failed"
-        }, 500
\ No newline at end of file
+            "message": "Fuzzy search failed"
+        }, 500
@@ -0,0 +1,442 @@
+import time
+from datetime import date
+
+from app.models.database import get_db
+from app.utils.dates import format_timestamp
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+# -------------------------------------------------
+# ORDER EVENT LOG
+# -------------------------------------------------
+# Every order write appends to order_events and applies the same event
+# to the projections in the caller's transaction:
+#   orders                 live orders (created adds, a reversal removes)
+#   customer_order_totals  per customer count / quantity / revenue and
+#                          last order date
+#   medicine_order_totals  per product name, same figures
+#   revenue_daily/monthly  per purchase day / month, same figures
+#   medicine_demand_daily  per (purchase day, medicine id), same figures
+# Reversals are booked against the order's original purchase date.
+# Consumers that keep their own aggregates read events_since(seq)
+# instead of rescanning orders.
+
+REVERSAL_EVENTS = ("cancelled", "refunded")
+
+# table, key columns, SQL expressions deriving the key from an event row
+EPOCH_DAY_SQL = "CAST(julianday(substr(purchase_date, 1, 10)) - 2440587.5 AS INTEGER)"
+
+ROLLUPS = (
+    ("customer_order_totals", ("customer_id",), ("customer_id",)),
+    ("medicine_order_totals", ("product_name",), ("product_name",)),
+    ("revenue_daily", ("day",), ("substr(purchase_date, 1, 10)",)),
+    ("revenue_monthly", ("month",), ("substr(purchase_date, 1, 7)",)),
+    ("medicine_demand_daily", ("day", "medicine_id"), (EPOCH_DAY_SQL, "medicine_id")),
+)
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def epoch_day(day):
+    # Python twin of EPOCH_DAY_SQL: None where julianday() gives NULL
+    try:
+        return date.fromisoformat(day).toordinal() - EPOCH_ORDINAL
+    except (TypeError, ValueError):
+        return None
+
+
+def rollup_keys(customer_id, product_name, purchase_date, medicine_id=None):
+    day = str(purchase_date)[:10] if purchase_date else None
+    return (
+        (customer_id,),
+        (product_name,),
+        (day,),
+        (day[:7] if day else None,),
+        (epoch_day(day), medicine_id),
+    )
+
+
+class OrderAlreadyReversed(LookupError):
+    pass
+
+
+EVENT_COLUMNS = (
+    "seq, event_type, order_id, customer_id, medicine_id, product_name, "
+    "quantity, amount, purchase_date, recorded_at"
+)
+
+
+def event_item(row):
+    return {
+        "seq": row["seq"],
+        "event_type": row["event_type"],
+        "order_id": row["order_id"],
+        "customer_id": row["customer_id"],
+        "medicine_id": row["medicine_id"],
+        "medicine": row["product_name"],
+        "quantity": row["quantity"],
+        "amount": row["amount"],
+        "purchase_date": row["purchase_date"],
+        "recorded_at": row["recorded_at"]
+    }
+
+
+def _append(cursor, event_type, order_id, customer_id, medicine_id, product_name,
+            quantity, amount, purchase_date):
+
+    cursor.execute("""
+        INSERT INTO order_events (
+            event_type, order_id, customer_id, medicine_id, product_name,
+            quantity, amount, purchase_date, recorded_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        event_type, order_id, customer_id, medicine_id, product_name,
+        quantity, amount, purchase_date, time.time()
+    ))
+    seq = cursor.lastrowid
+
+    count = 1 if event_type == "created" else -1
+    _apply_rollups(cursor, rollup_keys(customer_id, product_name, purchase_date, medicine_id),
+                   count, quantity, amount, seq)
+
+    # Last order date: a new order can only move it forward; a reversal
+    # may remove the latest one, so re-read it (index seek on orders)
+    if event_type == "created":
+        cursor.execute("""
+            UPDATE customer_order_totals
+            SET last_purchase_date = MAX(COALESCE(last_purchase_date, ''), ?)
+            WHERE customer_id = ?
+        """, (purchase_date, customer_id))
+    else:
+        cursor.execute("""
+            UPDATE customer_order_totals
+            SET last_purchase_date = (
+                SELECT MAX(purchase_date) FROM orders WHERE customer_id = ?
+            )
+            WHERE customer_id = ?
+        """, (customer_id, customer_id))
+
+    return seq
+
+
+def _merge_clause(columns):
+    return f"""
+        ON CONFLICT ({columns}) DO UPDATE SET
+            order_count = order_count + excluded.order_count,
+            quantity = quantity + excluded.quantity,
+            revenue = revenue + excluded.revenue,
+            last_seq = excluded.last_seq
+    """
+
+
+def _apply_rollups(cursor, keys, count, quantity, amount, seq):
+
+    for (table, key_columns, _), key in zip(ROLLUPS, keys):
+        if None in key:
+            continue
+
+        columns = ", ".join(key_columns)
+        cursor.execute(f"""
+            INSERT INTO {table} ({columns}, order_count, quantity, revenue, last_seq)
+            VALUES ({", ".join("?" * len(key))}, ?, ?, ?, ?)
+            {_merge_clause(columns)}
+        """, (*key, count, quantity, amount, seq))
+
+
+# -------------------------------------------------
+# WRITERS (CALLER OWNS THE TRANSACTION)
+# -------------------------------------------------
+
+def record_order_created(cursor, customer_id, medicine_id, product_name, quantity,
+                         total_price, prescription_required, dosage_frequency="N/A"):
+    """Insert the order row and its created event; returns the order id."""
+
+    purchase_ts = int(time.time())
+    purchase_date = format_timestamp(purchase_ts)
+
+    cursor.execute("""
+        INSERT INTO orders (
+            customer_id,
+            product_name,
+            quantity,
+            purchase_date,
+            purchase_ts,
+            total_price,
+            dosage_frequency,
+            prescription_required
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        customer_id,
+        product_name,
+        quantity,
+        purchase_date,
+        purchase_ts,
+        total_price,
+        dosage_frequency,
+        prescription_required
+    ))
+    order_id = cursor.lastrowid
+
+    _append(cursor, "created", order_id, customer_id, medicine_id, product_name,
+            quantity, total_price, purchase_date)
+
+    return order_id
+
+
+def record_order_reversal(cursor, order, event_type):
+    """
+    Drop an orders row from the live projection and append its
+    cancelled/refunded event. Returns the medicine id from the created
+    event, or None for orders that predate the log (imported). Raises
+    OrderAlreadyReversed if a concurrent writer removed the row first.
+    """
+
+    if event_type not in REVERSAL_EVENTS:
+        raise ValueError(f"Unknown reversal event: {event_type}")
+
+    cursor.execute("DELETE FROM orders WHERE id = ?", (order["id"],))
+    if cursor.rowcount == 0:
+        raise OrderAlreadyReversed(order["id"])
+
+    cursor.execute("""
+        SELECT medicine_id FROM order_events
+        WHERE order_id = ? AND event_type = 'created'
+    """, (order["id"],))
+    created = cursor.fetchone()
+    medicine_id = created["medicine_id"] if created else None
+
+    _append(cursor, event_type, order["id"], order["customer_id"], medicine_id,
+            order["product_name"], -order["quantity"], -order["total_price"],
+            order["purchase_date"])
+
+    return medicine_id
+
+
+def created_for(cursor, order_id):
+    """The created event of an order, whether or not it was reversed since."""
+
+    cursor.execute(f"""
+        SELECT {EVENT_COLUMNS} FROM order_events
+        WHERE order_id = ? AND event_type = 'created'
+    """, (order_id,))
+    return cursor.fetchone()
+
+
+def reversal_for(cursor, order_id):
+    """The cancelled/refunded event of an order no longer in orders, if any."""
+
+    cursor.execute(f"""
+        SELECT {EVENT_COLUMNS} FROM order_events
+        WHERE order_id = ? AND event_type IN ('cancelled', 'refunded')
+    """, (order_id,))
+    return cursor.fetchone()
+
+
+# -------------------------------------------------
+# BACKFILL / REBUILD
+# -------------------------------------------------
+# Orders imported from Excel are inserted in bulk without events. The
+# backfill gives each of them a created event (set-based, skipping
+# orders that already have one) so the log covers every live order.
+# after_order_id limits it to orders inserted since (the importer knows
+# the id it started from); the new events are then folded into the
+# rollups, or everything is rebuilt if the rollups were already behind.
+
+def backfill_created_events(cursor, after_order_id=0):
+
+    cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM order_events")
+    last_seq = cursor.fetchone()[0]
+
+    cursor.execute("""
+        INSERT INTO order_events (
+            event_type, order_id, customer_id, medicine_id, product_name,
+            quantity, amount, purchase_date, recorded_at
+        )
+        SELECT 'created', o.id, o.customer_id,
+               (SELECT m.id FROM medicines m
+                WHERE m.name = o.product_name COLLATE NOCASE LIMIT 1),
+               o.product_name, o.quantity, o.total_price, o.purchase_date,
+               (julianday('now') - 2440587.5) * 86400.0
+        FROM orders o
+        WHERE o.id > ? AND NOT EXISTS (
+            SELECT 1 FROM order_events e
+            WHERE e.order_id = o.id AND e.event_type = 'created'
+        )
+        ORDER BY o.id
+    """, (after_order_id,))
+    added = cursor.rowcount
+
+    if added:
+        if projections_stale(cursor, last_seq):
+            rebuild_order_totals(cursor)
+        else:
+            apply_events_since(cursor, last_seq)
+
+    return added
+
+
+def _fold_events(cursor, table, key_columns, key_sql, after_seq=0, merge=False):
+    aliases = [f"key_{i}" for i in range(len(key_columns))]
+    columns = ", ".join(key_columns)
+
+    cursor.execute(f"""
+        INSERT INTO {table} ({columns}, order_count, quantity, revenue, last_seq)
+        SELECT {", ".join(f"{sql} AS {alias}" for sql, alias in zip(key_sql, aliases))},
+               SUM(CASE event_type WHEN 'created' THEN 1 ELSE -1 END),
+               SUM(quantity),
+               SUM(amount),
+               MAX(seq)
+        FROM order_events
+        WHERE seq > ? AND {" AND ".join(f"{alias} IS NOT NULL" for alias in aliases)}
+        GROUP BY {", ".join(aliases)}
+        {_merge_clause(columns) if merge else ""}
+    """, (after_seq,))
+
+
+def rebuild_order_totals(cursor):
+    """Recompute every totals/rollup projection from the full log."""
+
+    for table, key_columns, key_sql in ROLLUPS:
+        cursor.execute(f"DELETE FROM {table}")
+        _fold_events(cursor, table, key_columns, key_sql)
+
+    cursor.execute("""
+        UPDATE customer_order_totals
+        SET last_purchase_date = (
+            SELECT MAX(o.purchase_date) FROM orders o
+            WHERE o.customer_id = customer_order_totals.customer_id
+        )
+    """)
+
+
+def apply_events_since(cursor, after_seq):
+    """Fold the events after after_seq into up-to-date rollups, set-based."""
+
+    for table, key_columns, key_sql in ROLLUPS:
+        _fold_events(cursor, table, key_columns, key_sql, after_seq, merge=True)
+
+    cursor.execute("""
+        UPDATE customer_order_totals
+        SET last_purchase_date = (
+            SELECT MAX(o.purchase_date) FROM orders o
+            WHERE o.customer_id = customer_order_totals.customer_id
+        )
+        WHERE customer_id IN (SELECT customer_id FROM order_events WHERE seq > ?)
+    """, (after_seq,))
+
+
+def projections_stale(cursor, last_seq=None):
+    # A rollup stamps the seq of every event it folds in, but events with
+    # a NULL key there skip it (no medicine id: a product name not in the
+    # catalogue; no parseable purchase date). So each table's
+    # MAX(last_seq) must equal the newest event up to last_seq whose key
+    # it takes, found walking the log back from last_seq.
+    if last_seq is None:
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM order_events")
+        last_seq = cursor.fetchone()[0]
+
+    for table, _, key_sql in ROLLUPS:
+        cursor.execute(f"""
+            SELECT seq FROM order_events
+            WHERE seq <= ? AND {" AND ".join(f"{sql} IS NOT NULL" for sql in key_sql)}
+            ORDER BY seq DESC
+            LIMIT 1
+        """, (last_seq,))
+        newest = cursor.fetchone()
+
+        cursor.execute(f"SELECT COALESCE(MAX(last_seq), 0) FROM {table}")
+        if cursor.fetchone()[0] != (newest[0] if newest else 0):
+            return True
+
+    return False
+
+
+def backfill_order_events():
+    """Migration / import sync: log unlogged orders, rebuild rollups if they lag."""
+
+    conn = get_db()
+    try:
+        cursor = conn.cursor()
+        added = backfill_created_events(cursor)
+
+        if not added and projections_stale(cursor):
+            rebuild_order_totals(cursor)
+
+        conn.commit()
+        return added
+    finally:
+        conn.close()
+
+
+def rebuild_order_projections():
+    """Backfill + full rollup rebuild; returns row counts per table."""
+
+    conn = get_db()
+    try:
+        cursor = conn.cursor()
+        backfill_created_events(cursor)
+        rebuild_order_totals(cursor)
+        conn.commit()
+
+        counts = {}
+        for table, _, _ in ROLLUPS:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cursor.fetchone()[0]
+        return counts
+    finally:
+        conn.close()
+
+
+# -------------------------------------------------
+# DELTAS
+# -------------------------------------------------
+
+def get_events_since(after_seq=0, limit=None):
+
+    try:
+        after_seq = int(after_seq or 0)
+        limit = DEFAULT_PAGE_SIZE if limit is None else int(limit)
+    except (ValueError, TypeError):
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "since and limit must be integers"
+        }, 400
+
+    if after_seq < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": f"since must be >= 0 and limit between 1 and {MAX_PAGE_SIZE}"
+        }, 400
+
+    conn = get_db(readonly=True)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(f"""
+            SELECT {EVENT_COLUMNS} FROM order_events
+            WHERE seq > ?
+            ORDER BY seq
+            LIMIT ?
+        """, (after_seq, limit + 1))
+        rows = cursor.fetchall()
+        conn.close()
+
+        events = [event_item(row) for row in rows[:limit]]
+
+        return {
+            "status": "success",
+            "data": {
+                "events": events,
+                "last_seq": events[-1]["seq"] if events else after_seq,
+                "has_more": len(rows) > limit
+            }
+        }, 200
+
+    except Exception:
+        conn.close()
+        return {
+            "status": "error",
+            "code": "internal_error",
+            "message": "Failed to fetch order events"
+        }, 500
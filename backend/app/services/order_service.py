@@ -1,11 +1,58 @@
+import time
 from app.models.database import get_db
-from app.services.prescription_service import is_verified
+from collections import Counter
+
+from app.services.prescription_service import is_verified, verified_medicine_ids
+from app.services.catalog_cache import catalog_cache
+from app.services import idempotency_service as idempotency
+from app.services.order_event_service import (
+    record_order_created,
+    record_order_reversal,
+    reversal_for,
+    OrderAlreadyReversed
+)
+from app.utils.pagination import (
+    STREAM_BATCH_SIZE,
+    InvalidPageRequest,
+    page_params,
+    take_page
+)
+from app.utils.dates import format_timestamp, month_bounds
+
+
+# -------------------------------------------------
+# CONDITIONAL STOCK DECREMENT
+# -------------------------------------------------
+# Check and decrement in one statement: SQLite runs it under the write
+# lock, so no other writer can slip in between. Returns False (and the
+# caller rolls back) if any line found less stock than it needs.
+
+def decrement_stock(cursor, lines):
+
+    cursor.executemany("""
+        UPDATE medicines
+        SET stock = stock - ?
+        WHERE id = ? AND stock >= ?
+    """, [(quantity, medicine_id, quantity) for medicine_id, quantity in lines])
+
+    return cursor.rowcount == len(lines)
+
+
+def current_stock(cursor, medicine_ids):
+
+    cursor.execute(f"""
+        SELECT id, stock FROM medicines
+        WHERE id IN ({", ".join("?" * len(medicine_ids))})
+    """, list(medicine_ids))
+
+    return {row["id"]: row["stock"] for row in cursor.fetchall()}
 
 
 # -------------------------------------------------
 # CREATE ORDER (ID-BASED ENTERPRISE VERSION)
 # -------------------------------------------------
-def create_order(customer_id: str = None, medicine_id: str = None, quantity: int = None):
+def create_order(customer_id: str = None, medicine_id: str = None, quantity: int = None,
+                 idempotency_key: str = None):
 
     # -------------------------------------------------
     # SAFE DEFAULTS
@@ -40,10 +87,22 @@ def create_order(customer_id: str = None, medicine_id: str = None, quantity: int
             "message": "Medicine ID is required"
         }, 400
 
+    invalid_key = idempotency.check_key(idempotency_key)
+    if invalid_key:
+        return invalid_key
+
+    request_hash = idempotency.request_fingerprint(customer_id, str(medicine_id), quantity)
+
     conn = get_db()
     cursor = conn.cursor()
 
     try:
+        if idempotency_key:
+            replay = idempotency.lookup(cursor, "create-order", idempotency_key, request_hash)
+            if replay:
+                conn.close()
+                return replay
+
         # -------------------------------------------------
         # Fetch medicine BY ID
         # -------------------------------------------------
@@ -68,7 +127,7 @@ def create_order(customer_id: str = None, medicine_id: str = None, quantity: int
         # Prescription Enforcement
         # -------------------------------------------------
         if medicine_row["prescription_required"] == "Yes":
-            if not is_verified(customer_id, medicine_id):
+            if not is_verified(customer_id, medicine_id, conn):
                 conn.close()
                 return {
                     "status": "error",
@@ -93,45 +152,259 @@ def create_order(customer_id: str = None, medicine_id: str = None, quantity: int
         # -------------------------------------------------
         # Atomic Transaction
         # -------------------------------------------------
-        cursor.execute("""
-            UPDATE medicines
-            SET stock = stock - ?
-            WHERE id = ?
-        """, (quantity, medicine_id))
+        # The stock read above is only a fast pre-check. The decrement
+        # itself is conditional, so two workers racing for the last
+        # units cannot both succeed: the loser updates zero rows.
+        if not decrement_stock(cursor, [(medicine_row["id"], quantity)]):
+            conn.rollback()
+            available = current_stock(cursor, [medicine_row["id"]])
+            conn.close()
+            return {
+                "status": "error",
+                "code": "insufficient_stock",
+                "message": "Insufficient stock available.",
+                "available_stock": available.get(medicine_row["id"], 0)
+            }, 400
 
-        cursor.execute("""
-            INSERT INTO orders (
-                customer_id,
-                product_name,
-                quantity,
-                purchase_date,
-                total_price,
-                dosage_frequency,
-                prescription_required
-            ) VALUES (?, ?, ?, datetime('now'), ?, ?, ?)
-        """, (
+        order_id = record_order_created(
+            cursor,
             customer_id,
+            medicine_row["id"],
             medicine_row["name"],
             quantity,
             total_price,
-            "N/A",
             medicine_row["prescription_required"]
-        ))
+        )
+
+        result = {
+            "status": "success",
+            "data": {
+                "order_id": order_id,
+                "medicine": medicine_row["name"],
+                "quantity": quantity,
+                "total_price": total_price
+            }
+        }
+
+        if idempotency_key and not idempotency.remember(
+                cursor, "create-order", idempotency_key, request_hash, result, 201):
+            return idempotency.replay_duplicate(conn, "create-order", idempotency_key, request_hash)
 
-        order_id = cursor.lastrowid
+        patch = catalog_cache.capture_patch(cursor, [medicine_row["id"]], 1)
 
         conn.commit()
         conn.close()
 
+        catalog_cache.apply_patch(patch)
+
+        return result, 201
+
+    except Exception:
+        conn.rollback()
+        conn.close()
         return {
+            "status": "error",
+            "code": "internal_error",
+            "message": "Transaction failed"
+        }, 500
+
+
+# -------------------------------------------------
+# CART ORDER (MULTI-LINE, ONE TRANSACTION)
+# -------------------------------------------------
+# All lines are validated with two set-based reads (medicines and
+# prescriptions) and written in a single transaction. The cart is
+# all-or-nothing: any rejected line rejects the whole cart and the
+# per-line results say why.
+
+MAX_CART_LINES = 100
+
+
+def _parse_cart_lines(items):
+
+    lines = []
+
+    for index, item in enumerate(items):
+        line = {"line": index}
+
+        try:
+            line["medicine_id"] = int(item.get("medicine_id"))
+            line["quantity"] = int(item.get("quantity", 1))
+        except (AttributeError, ValueError, TypeError):
+            line.update(status="error", code="validation_error",
+                        message="medicine_id and quantity must be integers")
+            lines.append(line)
+            continue
+
+        if line["quantity"] <= 0:
+            line.update(status="error", code="validation_error",
+                        message="Quantity must be positive")
+
+        lines.append(line)
+
+    return lines
+
+
+def create_cart_order(customer_id: str = None, items=None, idempotency_key: str = None):
+
+    if not customer_id:
+        customer_id = "PAT999"  # Demo fallback user
+
+    if not isinstance(items, list) or not items:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "items must be a non-empty list"
+        }, 400
+
+    if len(items) > MAX_CART_LINES:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": f"A cart can hold at most {MAX_CART_LINES} lines"
+        }, 400
+
+    invalid_key = idempotency.check_key(idempotency_key)
+    if invalid_key:
+        return invalid_key
+
+    lines = _parse_cart_lines(items)
+    valid = [line for line in lines if "status" not in line]
+
+    requested = Counter()
+    for line in valid:
+        requested[line["medicine_id"]] += line["quantity"]
+
+    request_hash = idempotency.request_fingerprint(
+        customer_id, [(line["medicine_id"], line["quantity"]) for line in valid]
+    )
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    try:
+        if idempotency_key:
+            replay = idempotency.lookup(cursor, "create-order", idempotency_key, request_hash)
+            if replay:
+                conn.close()
+                return replay
+
+        medicines = {}
+
+        if requested:
+            cursor.execute(f"""
+                SELECT id, name, price, stock, prescription_required
+                FROM medicines
+                WHERE id IN ({", ".join("?" * len(requested))})
+            """, list(requested))
+            medicines = {row["id"]: row for row in cursor.fetchall()}
+
+        verified = verified_medicine_ids(
+            customer_id,
+            [mid for mid, row in medicines.items() if row["prescription_required"] == "Yes"],
+            conn
+        )
+
+        # -------------------------------------------------
+        # Per-line validation
+        # -------------------------------------------------
+        for line in valid:
+            row = medicines.get(line["medicine_id"])
+
+            if row is None:
+                line.update(status="error", code="not_found", message="Medicine not found")
+            elif row["prescription_required"] == "Yes" and row["id"] not in verified:
+                line.update(status="error", code="prescription_required",
+                            message="A valid prescription is required for this medicine.")
+            elif row["stock"] < requested[row["id"]]:
+                # Duplicate lines for one medicine share its stock
+                line.update(status="error", code="insufficient_stock",
+                            message="Insufficient stock available.",
+                            available_stock=row["stock"])
+
+        if any("status" in line for line in lines):
+            conn.close()
+
+            for line in lines:
+                line.setdefault("status", "ok")
+
+            return {
+                "status": "error",
+                "code": "cart_rejected",
+                "message": "One or more cart lines cannot be fulfilled",
+                "lines": lines
+            }, 400
+
+        # -------------------------------------------------
+        # Atomic Transaction
+        # -------------------------------------------------
+        if not decrement_stock(cursor, list(requested.items())):
+            # Another order took the stock between validation and write
+            conn.rollback()
+            available = current_stock(cursor, list(requested))
+            conn.close()
+
+            for line in lines:
+                medicine_id = line["medicine_id"]
+                if available.get(medicine_id, 0) < requested[medicine_id]:
+                    line.update(status="error", code="insufficient_stock",
+                                message="Insufficient stock available.",
+                                available_stock=available.get(medicine_id, 0))
+                else:
+                    line["status"] = "ok"
+
+            return {
+                "status": "error",
+                "code": "cart_rejected",
+                "message": "One or more cart lines cannot be fulfilled",
+                "lines": lines
+            }, 400
+
+        grand_total = 0.0
+
+        for line in lines:
+            row = medicines[line["medicine_id"]]
+            total_price = row["price"] * line["quantity"]
+
+            order_id = record_order_created(
+                cursor,
+                customer_id,
+                row["id"],
+                row["name"],
+                line["quantity"],
+                total_price,
+                row["prescription_required"]
+            )
+
+            line.update(
+                status="created",
+                order_id=order_id,
+                medicine=row["name"],
+                total_price=total_price
+            )
+            grand_total += total_price
+
+        result = {
             "status": "success",
             "data": {
-                "order_id": order_id,
-                "medicine": medicine_row["name"],
-                "quantity": quantity,
-                "total_price": total_price
+                "order_ids": [line["order_id"] for line in lines],
+                "total_price": round(grand_total, 2),
+                "lines": lines
             }
-        }, 201
+        }
+
+        if idempotency_key and not idempotency.remember(
+                cursor, "create-order", idempotency_key, request_hash, result, 201):
+            return idempotency.replay_duplicate(conn, "create-order", idempotency_key, request_hash)
+
+        patch = catalog_cache.capture_patch(cursor, list(requested), len(requested))
+
+        conn.commit()
+        conn.close()
+
+        catalog_cache.apply_patch(patch)
+
+        return result, 201
 
     except Exception:
         conn.rollback()
@@ -146,7 +419,46 @@ def create_order(customer_id: str = None, medicine_id: str = None, quantity: int
 # -------------------------------------------------
 # CUSTOMER ORDER HISTORY
 # -------------------------------------------------
-def get_customer_history(customer_id: str):
+# Keyset order is (purchase_date DESC, id DESC); the cursor carries the
+# last row's pair so the next page is an index range seek.
+
+HISTORY_COLUMNS = "id, product_name, quantity, purchase_date, total_price"
+
+
+def history_item(row):
+
+    return {
+        "order_id": row["id"],
+        "medicine": row["product_name"],
+        "quantity": row["quantity"],
+        "date": row["purchase_date"],
+        "total_price": row["total_price"]
+    }
+
+
+def _history_query(customer_id, after, limit):
+
+    sql = f"""
+        SELECT {HISTORY_COLUMNS}
+        FROM orders
+        WHERE customer_id = ?
+    """
+    params = [customer_id]
+
+    if after:
+        sql += " AND (purchase_date, id) < (?, ?)"
+        params.extend(after)
+
+    sql += " ORDER BY purchase_date DESC, id DESC"
+
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    return sql, params
+
+
+def get_customer_history(customer_id: str, limit: int = None, page_cursor: str = None):
 
     if not customer_id:
         return {
@@ -155,40 +467,49 @@ def get_customer_history(customer_id: str):
             "message": "Customer ID is required"
         }, 400
 
-    conn = get_db()
+    paged = limit is not None or page_cursor is not None
+
+    try:
+        if paged:
+            limit, after = page_params(limit, page_cursor, 2)
+    except InvalidPageRequest as e:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": str(e)
+        }, 400
+
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            SELECT id, product_name, quantity, purchase_date, total_price
-            FROM orders
-            WHERE customer_id = ?
-            ORDER BY purchase_date DESC
-        """, (customer_id,))
+        if paged:
+            cursor.execute(*_history_query(customer_id, after, limit + 1))
+        else:
+            cursor.execute(f"""
+                SELECT {HISTORY_COLUMNS}
+                FROM orders
+                WHERE customer_id = ?
+                ORDER BY purchase_date DESC
+            """, (customer_id,))
 
         rows = cursor.fetchall()
         conn.close()
 
-        if not rows:
+        if not paged:
             return {
                 "status": "success",
-                "data": []
+                "data": [history_item(row) for row in rows]
             }, 200
 
-        history = []
-
-        for row in rows:
-            history.append({
-                "order_id": row["id"],  # <-- IMPORTANT ADD
-                "medicine": row["product_name"],
-                "quantity": row["quantity"],
-                "date": row["purchase_date"],
-                "total_price": row["total_price"]
-            })
+        rows, next_cursor = take_page(
+            rows, limit, key=lambda row: (row["purchase_date"], row["id"])
+        )
 
         return {
             "status": "success",
-            "data": history
+            "data": [history_item(row) for row in rows],
+            "next_cursor": next_cursor
         }, 200
 
     except Exception:
@@ -198,6 +519,112 @@ def get_customer_history(customer_id: str):
             "code": "internal_error",
             "message": "Failed to fetch order history"
         }, 500
+
+
+def _iter_history(customer_id, after, limit):
+
+    # Holds one read-only pooled connection until the stream is exhausted
+    # or the client goes away (generator close runs the finally)
+    conn = get_db(readonly=True)
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute(*_history_query(customer_id, after, limit))
+
+        while True:
+            rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+            if not rows:
+                break
+
+            for row in rows:
+                yield history_item(row)
+    finally:
+        conn.close()
+
+
+def stream_customer_history(customer_id: str, page_cursor: str = None, limit: int = None):
+
+    if not customer_id:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "Customer ID is required"
+        }, 400
+
+    try:
+        limit, after = page_params(limit, page_cursor, 2, default=None)
+    except InvalidPageRequest as e:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": str(e)
+        }, 400
+
+    return _iter_history(customer_id, after, limit), 200
+
+
+# -------------------------------------------------
+# MONTH-TO-DATE QUANTITY (MONTHLY LIMITS)
+# -------------------------------------------------
+# Units of one medicine a customer ordered in the current UTC month.
+# purchase_date is canonical "YYYY-MM-DD HH:MM:SS" text, so the month is
+# a range seek on idx_orders_customer_date: only this month's orders
+# are read, however long the history. The medicine matches the way the
+# agent's limit check always has: case-insensitive substring of the
+# product name.
+
+def get_monthly_quantity(customer_id: str, medicine: str, now: float = None):
+
+    if not customer_id or not medicine or not medicine.strip():
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "Customer ID and medicine are required"
+        }, 400
+
+    month_start, month_end = month_bounds(time.time() if now is None else now)
+    medicine_key = medicine.strip().lower()
+
+    conn = get_db(readonly=True)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            SELECT COALESCE(SUM(quantity), 0) AS quantity, COUNT(*) AS orders
+            FROM orders
+            WHERE customer_id = ?
+              AND purchase_date >= ? AND purchase_date < ?
+              AND instr(unicode_lower(product_name), ?) > 0
+        """, (
+            customer_id,
+            format_timestamp(month_start),
+            format_timestamp(month_end),
+            medicine_key
+        ))
+
+        row = cursor.fetchone()
+        conn.close()
+
+        return {
+            "status": "success",
+            "data": {
+                "customer_id": customer_id,
+                "medicine": medicine_key,
+                "month": format_timestamp(month_start)[:7],
+                "quantity": row["quantity"],
+                "orders": row["orders"]
+            }
+        }, 200
+
+    except Exception:
+        conn.close()
+        return {
+            "status": "error",
+            "code": "internal_error",
+            "message": "Failed to calculate monthly quantity"
+        }, 500
+
+
     # -------------------------------------------------
 # GET ORDER STATUS
 # -------------------------------------------------
@@ -211,7 +638,7 @@ def get_order_status(order_id: int):
             "message": "Order ID required"
         }, 400
 
-    conn = get_db()
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
 
     try:
@@ -223,15 +650,34 @@ def get_order_status(order_id: int):
         """, (order_id,))
 
         order = cursor.fetchone()
-        conn.close()
 
         if not order:
+            # Cancelled and refunded orders live on in the event log
+            reversal = reversal_for(cursor, order_id)
+            conn.close()
+
+            if reversal:
+                return {
+                    "status": "success",
+                    "data": {
+                        "order_id": reversal["order_id"],
+                        "customer_id": reversal["customer_id"],
+                        "medicine": reversal["product_name"],
+                        "quantity": -reversal["quantity"],
+                        "purchase_date": reversal["purchase_date"],
+                        "total_price": -reversal["amount"],
+                        "status": reversal["event_type"].capitalize()
+                    }
+                }, 200
+
             return {
                 "status": "error",
                 "code": "not_found",
                 "message": "Order not found"
             }, 404
 
+        conn.close()
+
         return {
             "status": "success",
             "data": {
@@ -252,10 +698,27 @@ def get_order_status(order_id: int):
             "code": "internal_error",
             "message": "Failed to fetch order status"
         }, 500
-    # -------------------------------------------------
+# -------------------------------------------------
 # CANCEL ORDER
 # -------------------------------------------------
-def cancel_order(order_id: int):
+def _fetch_order(cursor, order_id):
+    cursor.execute("""
+        SELECT id, customer_id, product_name, quantity, purchase_date, total_price
+        FROM orders
+        WHERE id = ?
+    """, (order_id,))
+    return cursor.fetchone()
+
+
+def _order_not_found():
+    return {
+        "status": "error",
+        "code": "not_found",
+        "message": "Order not found"
+    }, 404
+
+
+def cancel_order(order_id: int, idempotency_key: str = None):
 
     if not order_id:
         return {
@@ -264,47 +727,146 @@ def cancel_order(order_id: int):
             "message": "Order ID is required"
         }, 400
 
+    invalid_key = idempotency.check_key(idempotency_key)
+    if invalid_key:
+        return invalid_key
+
+    request_hash = idempotency.request_fingerprint(str(order_id))
+
     conn = get_db()
     cursor = conn.cursor()
 
     try:
-        # Check if order exists
-        cursor.execute("""
-            SELECT id, product_name, quantity
-            FROM orders
-            WHERE id = ?
-        """, (order_id,))
+        # A retried cancel would otherwise hit "Order not found"
+        if idempotency_key:
+            replay = idempotency.lookup(cursor, "cancel-order", idempotency_key, request_hash)
+            if replay:
+                conn.close()
+                return replay
 
-        order = cursor.fetchone()
+        order = _fetch_order(cursor, order_id)
 
         if not order:
             conn.close()
-            return {
-                "status": "error",
-                "code": "not_found",
-                "message": "Order not found"
-            }, 404
+            return _order_not_found()
+
+        medicine_id = record_order_reversal(cursor, order, "cancelled")
+
+        # Restore stock: by id from the created event, by name for
+        # imported orders that predate the event log
+        if medicine_id is not None:
+            medicine_ids = [medicine_id]
+            cursor.execute("""
+                UPDATE medicines
+                SET stock = stock + ?
+                WHERE id = ?
+            """, (order["quantity"], medicine_id))
+        else:
+            cursor.execute("""
+                SELECT id FROM medicines
+                WHERE name = ?
+            """, (order["product_name"],))
+            medicine_ids = [row["id"] for row in cursor.fetchall()]
+
+            cursor.execute("""
+                UPDATE medicines
+                SET stock = stock + ?
+                WHERE name = ?
+            """, (order["quantity"], order["product_name"]))
+
+        restored = cursor.rowcount
+
+        result = {
+            "status": "success",
+            "message": "Order cancelled successfully"
+        }
 
-        # Restore stock
-        cursor.execute("""
-            UPDATE medicines
-            SET stock = stock + ?
-            WHERE name = ?
-        """, (order["quantity"], order["product_name"]))
+        if idempotency_key and not idempotency.remember(
+                cursor, "cancel-order", idempotency_key, request_hash, result, 200):
+            return idempotency.replay_duplicate(conn, "cancel-order", idempotency_key, request_hash)
 
-        # Delete order
-        cursor.execute("""
-            DELETE FROM orders
-            WHERE id = ?
-        """, (order_id,))
+        patch = catalog_cache.capture_patch(cursor, medicine_ids, restored)
 
         conn.commit()
         conn.close()
 
+        catalog_cache.apply_patch(patch)
+
+        return result, 200
+
+    except OrderAlreadyReversed:
+        conn.rollback()
+        conn.close()
+        return _order_not_found()
+
+    except Exception:
+        conn.rollback()
+        conn.close()
         return {
+            "status": "error",
+            "code": "internal_error",
+            "message": "Failed to cancel order"
+        }, 500
+
+
+# -------------------------------------------------
+# REFUND ORDER
+# -------------------------------------------------
+# The money goes back but the goods do not: the order leaves the live
+# projection and the totals, stock stays as it is.
+
+def refund_order(order_id: int, idempotency_key: str = None):
+
+    if not order_id:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "Order ID is required"
+        }, 400
+
+    invalid_key = idempotency.check_key(idempotency_key)
+    if invalid_key:
+        return invalid_key
+
+    request_hash = idempotency.request_fingerprint(str(order_id))
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    try:
+        if idempotency_key:
+            replay = idempotency.lookup(cursor, "refund-order", idempotency_key, request_hash)
+            if replay:
+                conn.close()
+                return replay
+
+        order = _fetch_order(cursor, order_id)
+
+        if not order:
+            conn.close()
+            return _order_not_found()
+
+        record_order_reversal(cursor, order, "refunded")
+
+        result = {
             "status": "success",
-            "message": "Order cancelled successfully"
-        }, 200
+            "message": "Order refunded successfully",
+            "refunded_amount": order["total_price"]
+        }
+
+        if idempotency_key and not idempotency.remember(
+                cursor, "refund-order", idempotency_key, request_hash, result, 200):
+            return idempotency.replay_duplicate(conn, "refund-order", idempotency_key, request_hash)
+
+        conn.commit()
+        conn.close()
+
+        return result, 200
+
+    except OrderAlreadyReversed:
+        conn.rollback()
+        conn.close()
+        return _order_not_found()
 
     except Exception:
         conn.rollback()
@@ -312,5 +874,5 @@ def cancel_order(order_id: int):
         return {
             "status": "error",
             "code": "internal_error",
-            "message": "Failed to cancel order"
+            "message": "Failed to refund order"
         }, 500
\ No newline at end of file
@@ -153,9 +153,13 @@ def approve_prescription(customer_id: str, medicine_id: int, approve: bool = Tru
 # CHECK IF VERIFIED (Used By Order Service)
 # -------------------------------------------------
 
-def is_verified(customer_id: str, medicine_id: int):
+def is_verified(customer_id: str, medicine_id: int, conn=None):
+
+    # Reuse the caller's connection so an order never holds two pool slots
+    owns_conn = conn is None
+    if owns_conn:
+        conn = get_db(readonly=True)
 
-    conn = get_db()
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -165,7 +169,14 @@ def is_verified(customer_id: str, medicine_id: int):
     """, (customer_id, medicine_id))
 
     row = cursor.fetchone()
-    conn.close()
+
+    if owns_conn:
+        conn.close()
+
+    return _is_valid(row)
+
+
+def _is_valid(row):
 
     if not row:
         return False
@@ -181,6 +192,39 @@ def is_verified(customer_id: str, medicine_id: int):
     return datetime.utcnow() <= expires_at
 
 
+# -------------------------------------------------
+# BATCH VERIFICATION (Used By Cart Orders)
+# -------------------------------------------------
+
+def verified_medicine_ids(customer_id: str, medicine_ids, conn=None):
+
+    # One query for every prescription-only line of a cart
+    medicine_ids = list(medicine_ids)
+
+    if not medicine_ids:
+        return set()
+
+    owns_conn = conn is None
+    if owns_conn:
+        conn = get_db(readonly=True)
+
+    cursor = conn.cursor()
+
+    cursor.execute(f"""
+        SELECT medicine_id, status, expires_at
+        FROM prescriptions
+        WHERE customer_id = ?
+          AND medicine_id IN ({", ".join("?" * len(medicine_ids))})
+    """, (customer_id, *medicine_ids))
+
+    rows = cursor.fetchall()
+
+    if owns_conn:
+        conn.close()
+
+    return {row["medicine_id"] for row in rows if _is_valid(row)}
+
+
 # -------------------------------------------------
 # GET PRESCRIPTION STATUS
 # -------------------------------------------------
@@ -194,7 +238,7 @@ def get_prescription_status(customer_id: str, medicine_id: int):
             "message": "Missing required fields"
         }, 400
 
-    conn = get_db()
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
 
     try:
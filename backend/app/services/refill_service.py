@@ -0,0 +1,269 @@
+import csv
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.models.database import BASE_DIR, db_connection, get_db
+from app.utils.dates import format_timestamp
+
+# -------------------------------------------------
+# REFILL RULES
+# -------------------------------------------------
+# The same medicine_rules.csv the agent's predictor reads (medicine,
+# refill_days, max_monthly_quantity), keyed by lower-cased name. Cached
+# per file and reloaded when its mtime changes.
+
+RULES_PATH = Path(os.getenv(
+    "MEDICINE_RULES_PATH",
+    BASE_DIR.parent / "agents" / "data" / "medicine_rules.csv"
+))
+
+_rules_lock = threading.Lock()
+_rules_cache = {}
+
+
+def load_refill_rules(path=None):
+    """{medicine_lower: (medicine, refill_days)} for rules with refill_days > 0."""
+
+    path = Path(path or RULES_PATH)
+
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return {}
+
+    with _rules_lock:
+        cached = _rules_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    rules = {}
+    with open(path, newline="", encoding="utf-8") as csvfile:
+        for row in csv.DictReader(csvfile):
+            medicine = (row.get("medicine") or "").strip()
+            try:
+                refill_days = int(row.get("refill_days") or 0)
+            except ValueError:
+                continue
+            if medicine and refill_days > 0:
+                rules[medicine.lower()] = (medicine, refill_days)
+
+    with _rules_lock:
+        _rules_cache[path] = (mtime, rules)
+
+    return rules
+
+
+# -------------------------------------------------
+# BATCH REFILL ENGINE
+# -------------------------------------------------
+# One read of the orders for medicines that have a rule: the rule names
+# go in as an IN list, so SQLite seeks idx_orders_product_ts instead of
+# handing every order to Python. Product names are resolved against the
+# rules once per distinct name, customers are dictionary-encoded, and
+# the last purchase per (customer, medicine) is a sort + reduceat over
+# int arrays. A pair is due once refill_days have passed since that
+# purchase, the predictor's rule applied to every medicine a customer
+# buys rather than only their latest order.
+
+SCAN_BATCH = 100000
+
+# Names per IN list; stays far below SQLite's host parameter limit
+RULE_BATCH = 500
+
+SCAN_QUERY = """
+    SELECT customer_id, product_name, purchase_ts
+    FROM orders
+    WHERE product_name COLLATE NOCASE IN ({names})
+      AND purchase_ts IS NOT NULL AND customer_id IS NOT NULL
+"""
+
+
+def _scan(cursor, names):
+    for i in range(0, len(names), RULE_BATCH):
+        batch = names[i:i + RULE_BATCH]
+        cursor.execute(SCAN_QUERY.format(names=", ".join("?" * len(batch))), batch)
+
+        while True:
+            rows = cursor.fetchmany(SCAN_BATCH)
+            if not rows:
+                break
+            yield rows
+
+
+def _ranks(values):
+    rank = np.empty(len(values), np.int64)
+    rank[np.argsort(np.array(values, dtype=object), kind="stable")] = np.arange(len(values))
+    return rank
+
+
+class RefillCandidates:
+    """Due (customer, medicine) pairs as parallel arrays, customer order."""
+
+    def __init__(self, customers, medicines, refill_days, last_ts, now):
+        self.customers = customers
+        self.medicines = medicines
+        self.refill_days = refill_days
+        self.last_ts = last_ts
+        self.due_ts = last_ts + refill_days.astype(np.int64) * 86400
+        self.now = now
+
+    def __len__(self):
+        return len(self.customers)
+
+    def rows(self):
+        # (customer_id, medicine, last_purchase_ts, refill_days, due_ts)
+        return zip(
+            self.customers,
+            self.medicines,
+            self.last_ts.tolist(),
+            self.refill_days.tolist(),
+            self.due_ts.tolist()
+        )
+
+    def items(self):
+        for customer_id, medicine, last_ts, refill_days, due_ts in self.rows():
+            yield {
+                "customer_id": customer_id,
+                "medicine": medicine,
+                "last_purchase_date": format_timestamp(last_ts),
+                "refill_days": refill_days,
+                "due_date": format_timestamp(due_ts),
+                "days_overdue": (self.now - due_ts) // 86400
+            }
+
+
+def compute_refill_candidates(now=None, rules=None):
+
+    now = int(time.time() if now is None else now)
+    rules = load_refill_rules() if rules is None else rules
+
+    rule_names = [name for name, _ in rules.values()]
+    rule_days = np.array([days for _, days in rules.values()], dtype=np.int32)
+    rule_index = {key: i for i, key in enumerate(rules)}
+
+    product_codes = {}  # product_name as stored -> rule index
+    customer_ids = {}
+    customer_values = []
+    chunks = []
+
+    if rules:
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+
+            for rows in _scan(cursor, rule_names):
+                customers, products, purchase_ts = zip(*rows)
+
+                for name in set(products).difference(product_codes):
+                    product_codes[name] = rule_index[name.strip().lower()]
+
+                for customer_id in set(customers).difference(customer_ids):
+                    customer_ids[customer_id] = len(customer_values)
+                    customer_values.append(customer_id)
+
+                chunks.append((
+                    np.fromiter(map(customer_ids.__getitem__, customers), np.int64, len(rows)),
+                    np.fromiter(map(product_codes.__getitem__, products), np.int64, len(rows)),
+                    np.fromiter(purchase_ts, np.int64, len(rows)),
+                ))
+
+    if not chunks:
+        empty = np.empty(0, np.int64)
+        return RefillCandidates([], [], empty.astype(np.int32), empty, now)
+
+    customer, medicine, purchase_ts = (np.concatenate(column) for column in zip(*chunks))
+
+    # Last purchase per pair: group by key, max timestamp per group
+    key = customer * len(rules) + medicine
+    order = np.argsort(key, kind="stable")
+    key = key[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    last_ts = np.maximum.reduceat(purchase_ts[order], starts)
+
+    pair_customer = key[starts] // len(rules)
+    pair_medicine = key[starts] % len(rules)
+    refill_days = rule_days[pair_medicine]
+
+    due = np.flatnonzero(last_ts + refill_days.astype(np.int64) * 86400 <= now)
+
+    # Customer, then medicine name order (codes are first-seen / rule order)
+    customer_rank = _ranks(customer_values)
+    medicine_rank = _ranks(rule_names)
+    due = due[np.lexsort((medicine_rank[pair_medicine[due]], customer_rank[pair_customer[due]]))]
+
+    return RefillCandidates(
+        [customer_values[i] for i in pair_customer[due].tolist()],
+        [rule_names[i] for i in pair_medicine[due].tolist()],
+        refill_days[due],
+        last_ts[due],
+        now
+    )
+
+
+# -------------------------------------------------
+# SINKS
+# -------------------------------------------------
+
+def write_refill_candidates(candidates):
+    """Replace refill_candidates with this run's output in one transaction."""
+
+    conn = get_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM refill_candidates")
+        generated_at = time.time()
+        cursor.executemany("""
+            INSERT INTO refill_candidates (
+                customer_id, medicine, last_purchase_ts, refill_days, due_ts, generated_at
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        """, (row + (generated_at,) for row in candidates.rows()))
+        conn.commit()
+        return len(candidates)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def get_customer_refills(customer_id: str):
+    """Last batch run's candidates for one customer."""
+
+    conn = get_db(readonly=True)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            SELECT medicine, last_purchase_ts, refill_days, due_ts, generated_at
+            FROM refill_candidates
+            WHERE customer_id = ?
+            ORDER BY due_ts
+        """, (customer_id,))
+        rows = cursor.fetchall()
+        conn.close()
+
+        return {
+            "status": "success",
+            "data": [
+                {
+                    "medicine": row["medicine"],
+                    "last_purchase_date": format_timestamp(row["last_purchase_ts"]),
+                    "refill_days": row["refill_days"],
+                    "due_date": format_timestamp(row["due_ts"]),
+                    "generated_at": row["generated_at"]
+                }
+                for row in rows
+            ]
+        }, 200
+
+    except Exception:
+        conn.close()
+        return {
+            "status": "error",
+            "code": "internal_error",
+            "message": "Failed to fetch refill candidates"
+        }, 500
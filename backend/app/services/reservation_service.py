@@ -0,0 +1,478 @@
+import os
+import threading
+import time
+from collections import Counter
+
+from app.models.database import get_db
+from app.services.prescription_service import is_verified
+from app.services.catalog_cache import catalog_cache
+from app.services import idempotency_service as idempotency
+from app.services.order_service import decrement_stock, current_stock
+from app.services.order_event_service import created_for, record_order_created
+
+# -------------------------------------------------
+# STOCK RESERVATIONS
+# -------------------------------------------------
+# A hold takes the units out of medicines.stock up front (same
+# conditional decrement as create_order), so every other reader already
+# sees them as gone. Confirming turns the hold into an order without
+# touching stock again; releasing or expiring puts the units back.
+#
+# Hold states: held -> confirmed | released | expired
+
+DEFAULT_HOLD_TTL = int(os.getenv("HOLD_TTL", 600))
+MAX_HOLD_TTL = 3600
+SWEEP_INTERVAL = int(os.getenv("HOLD_SWEEP_INTERVAL", 30))
+
+HOLD_COLUMNS = "id, customer_id, medicine_id, quantity, status, created_at, expires_at, order_id"
+
+
+def hold_item(row):
+    return {
+        "hold_id": row["id"],
+        "customer_id": row["customer_id"],
+        "medicine_id": row["medicine_id"],
+        "quantity": row["quantity"],
+        "status": row["status"],
+        "expires_at": row["expires_at"],
+        "order_id": row["order_id"]
+    }
+
+
+def confirmed_item(hold_id, order_id, medicine, quantity, total_price):
+    return {
+        "hold_id": hold_id,
+        "order_id": order_id,
+        "medicine": medicine,
+        "quantity": quantity,
+        "total_price": total_price
+    }
+
+
+def _fetch_hold(cursor, hold_id):
+    cursor.execute(f"SELECT {HOLD_COLUMNS} FROM stock_holds WHERE id = ?", (hold_id,))
+    return cursor.fetchone()
+
+
+def _hold_not_found():
+    return {
+        "status": "error",
+        "code": "not_found",
+        "message": "Reservation not found"
+    }, 404
+
+
+# -------------------------------------------------
+# RESERVE
+# -------------------------------------------------
+def reserve_stock(customer_id: str = None, medicine_id: int = None, quantity: int = None,
+                  ttl: int = None, idempotency_key: str = None):
+
+    if not customer_id:
+        customer_id = "PAT999"  # Demo fallback user
+
+    try:
+        quantity = int(1 if quantity is None else quantity)
+        ttl = int(DEFAULT_HOLD_TTL if ttl is None else ttl)
+    except (ValueError, TypeError):
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "Quantity and ttl must be integers"
+        }, 400
+
+    if quantity <= 0:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "Quantity must be positive"
+        }, 400
+
+    if not 0 < ttl <= MAX_HOLD_TTL:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": f"ttl must be between 1 and {MAX_HOLD_TTL} seconds"
+        }, 400
+
+    if not medicine_id:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "Medicine ID is required"
+        }, 400
+
+    invalid_key = idempotency.check_key(idempotency_key)
+    if invalid_key:
+        return invalid_key
+
+    request_hash = idempotency.request_fingerprint(customer_id, str(medicine_id), quantity, ttl)
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    try:
+        # A redelivered agent message gets its first hold back, not a second one
+        if idempotency_key:
+            replay = idempotency.lookup(cursor, "reserve-stock", idempotency_key, request_hash)
+            if replay:
+                conn.close()
+                return replay
+
+        cursor.execute("""
+            SELECT id, name, price, stock, prescription_required
+            FROM medicines
+            WHERE id = ?
+        """, (medicine_id,))
+
+        medicine_row = cursor.fetchone()
+
+        if not medicine_row:
+            conn.close()
+            return {
+                "status": "error",
+                "code": "not_found",
+                "message": "Medicine not found"
+            }, 404
+
+        # Checked once here, so confirm needs no second round trip
+        if medicine_row["prescription_required"] == "Yes":
+            if not is_verified(customer_id, medicine_row["id"], conn):
+                conn.close()
+                return {
+                    "status": "error",
+                    "code": "prescription_required",
+                    "message": "A valid prescription is required for this medicine."
+                }, 403
+
+        if not decrement_stock(cursor, [(medicine_row["id"], quantity)]):
+            conn.rollback()
+            available = current_stock(cursor, [medicine_row["id"]])
+            conn.close()
+            return {
+                "status": "error",
+                "code": "insufficient_stock",
+                "message": "Insufficient stock available.",
+                "available_stock": available.get(medicine_row["id"], 0)
+            }, 400
+
+        now = time.time()
+
+        cursor.execute("""
+            INSERT INTO stock_holds (customer_id, medicine_id, quantity, status, created_at, expires_at)
+            VALUES (?, ?, ?, 'held', ?, ?)
+        """, (customer_id, medicine_row["id"], quantity, now, now + ttl))
+
+        hold_id = cursor.lastrowid
+
+        result = {
+            "status": "success",
+            "data": {
+                "hold_id": hold_id,
+                "medicine_id": medicine_row["id"],
+                "medicine": medicine_row["name"],
+                "quantity": quantity,
+                "total_price": medicine_row["price"] * quantity,
+                "expires_at": now + ttl
+            }
+        }
+
+        if idempotency_key and not idempotency.remember(
+                cursor, "reserve-stock", idempotency_key, request_hash, result, 201):
+            return idempotency.replay_duplicate(conn, "reserve-stock", idempotency_key, request_hash)
+
+        patch = catalog_cache.capture_patch(cursor, [medicine_row["id"]], 1)
+
+        conn.commit()
+        conn.close()
+
+        catalog_cache.apply_patch(patch)
+
+        return result, 201
+
+    except Exception:
+        conn.rollback()
+        conn.close()
+        return {
+            "status": "error",
+            "code": "internal_error",
+            "message": "Reservation failed"
+        }, 500
+
+
+# -------------------------------------------------
+# CONFIRM (HOLD -> ORDER)
+# -------------------------------------------------
+# Stock was already taken at reserve time: confirming is one guarded
+# status flip plus the order insert. Confirming twice returns the same
+# order (the 201 body rebuilt from its created event), so the agent can
+# retry it blindly.
+
+def confirm_reservation(hold_id: int, customer_id: str = None):
+
+    if not hold_id:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "hold_id is required"
+        }, 400
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    try:
+        hold = _fetch_hold(cursor, hold_id)
+
+        if not hold or (customer_id and hold["customer_id"] != customer_id):
+            conn.close()
+            return _hold_not_found()
+
+        if hold["status"] == "confirmed":
+            created = created_for(cursor, hold["order_id"])
+            conn.close()
+            return {
+                "status": "success",
+                "data": confirmed_item(hold_id, hold["order_id"], created["product_name"],
+                                       created["quantity"], created["amount"])
+            }, 201
+
+        cursor.execute("""
+            SELECT name, price, prescription_required
+            FROM medicines
+            WHERE id = ?
+        """, (hold["medicine_id"],))
+        medicine_row = cursor.fetchone()
+
+        now = time.time()
+
+        # Loses cleanly against release or the sweeper
+        cursor.execute("""
+            UPDATE stock_holds
+            SET status = 'confirmed'
+            WHERE id = ? AND status = 'held' AND expires_at >= ?
+        """, (hold_id, now))
+
+        if cursor.rowcount == 0 or medicine_row is None:
+            conn.rollback()
+            conn.close()
+            return {
+                "status": "error",
+                "code": "hold_expired",
+                "message": "Reservation is no longer active"
+            }, 410
+
+        total_price = medicine_row["price"] * hold["quantity"]
+
+        order_id = record_order_created(
+            cursor,
+            hold["customer_id"],
+            hold["medicine_id"],
+            medicine_row["name"],
+            hold["quantity"],
+            total_price,
+            medicine_row["prescription_required"]
+        )
+
+        cursor.execute(
+            "UPDATE stock_holds SET order_id = ? WHERE id = ?",
+            (order_id, hold_id)
+        )
+
+        conn.commit()
+        conn.close()
+
+        return {
+            "status": "success",
+            "data": confirmed_item(hold_id, order_id, medicine_row["name"],
+                                   hold["quantity"], total_price)
+        }, 201
+
+    except Exception:
+        conn.rollback()
+        conn.close()
+        return {
+            "status": "error",
+            "code": "internal_error",
+            "message": "Failed to confirm reservation"
+        }, 500
+
+
+# -------------------------------------------------
+# RELEASE
+# -------------------------------------------------
+def release_reservation(hold_id: int, customer_id: str = None):
+
+    if not hold_id:
+        return {
+            "status": "error",
+            "code": "validation_error",
+            "message": "hold_id is required"
+        }, 400
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    try:
+        hold = _fetch_hold(cursor, hold_id)
+
+        if not hold or (customer_id and hold["customer_id"] != customer_id):
+            conn.close()
+            return _hold_not_found()
+
+        cursor.execute("""
+            UPDATE stock_holds
+            SET status = 'released'
+            WHERE id = ? AND status = 'held'
+        """, (hold_id,))
+
+        if cursor.rowcount == 0:
+            conn.rollback()
+            conn.close()
+
+            # Releasing twice is harmless; releasing a confirmed hold is not allowed
+            if hold["status"] in ("released", "expired"):
+                return {
+                    "status": "success",
+                    "message": "Reservation already released"
+                }, 200
+
+            return {
+                "status": "error",
+                "code": "invalid_operation",
+                "message": f"Reservation is {hold['status']}"
+            }, 409
+
+        cursor.execute("""
+            UPDATE medicines
+            SET stock = stock + ?
+            WHERE id = ?
+        """, (hold["quantity"], hold["medicine_id"]))
+
+        patch = catalog_cache.capture_patch(cursor, [hold["medicine_id"]], cursor.rowcount)
+
+        conn.commit()
+        conn.close()
+
+        catalog_cache.apply_patch(patch)
+
+        return {
+            "status": "success",
+            "message": "Reservation released"
+        }, 200
+
+    except Exception:
+        conn.rollback()
+        conn.close()
+        return {
+            "status": "error",
+            "code": "internal_error",
+            "message": "Failed to release reservation"
+        }, 500
+
+
+def get_reservation(hold_id: int):
+
+    conn = get_db(readonly=True)
+
+    try:
+        hold = _fetch_hold(conn.cursor(), hold_id)
+        conn.close()
+
+        if not hold:
+            return _hold_not_found()
+
+        return {
+            "status": "success",
+            "data": hold_item(hold)
+        }, 200
+
+    except Exception:
+        conn.close()
+        return {
+            "status": "error",
+            "code": "internal_error",
+            "message": "Failed to fetch reservation"
+        }, 500
+
+
+# -------------------------------------------------
+# EXPIRY SWEEP
+# -------------------------------------------------
+# One transaction per sweep however many holds lapsed. The holds are
+# claimed first (RETURNING what was flipped, so a concurrent confirm or
+# release cannot be counted twice), then stock is restored with one
+# UPDATE per medicine. The claim range-scans the partial index on held
+# expiry times.
+
+def expire_holds(now=None):
+
+    now = time.time() if now is None else now
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            UPDATE stock_holds
+            SET status = 'expired'
+            WHERE status = 'held' AND expires_at < ?
+            RETURNING medicine_id, quantity
+        """, (now,))
+        claimed = cursor.fetchall()
+
+        if not claimed:
+            conn.rollback()
+            conn.close()
+            return 0
+
+        restore = Counter()
+        for row in claimed:
+            restore[row["medicine_id"]] += row["quantity"]
+
+        cursor.executemany(
+            "UPDATE medicines SET stock = stock + ? WHERE id = ?",
+            [(quantity, medicine_id) for medicine_id, quantity in restore.items()]
+        )
+
+        patch = catalog_cache.capture_patch(cursor, list(restore), cursor.rowcount)
+
+        conn.commit()
+        conn.close()
+
+        catalog_cache.apply_patch(patch)
+        return len(claimed)
+
+    except Exception:
+        conn.rollback()
+        conn.close()
+        raise
+
+
+class HoldSweeper:
+    """Daemon thread that calls expire_holds every interval seconds."""
+
+    def __init__(self, interval=SWEEP_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="hold-sweeper", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                expire_holds()
+            except Exception as e:
+                print("Hold sweep failed:", str(e))
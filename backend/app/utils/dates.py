@@ -0,0 +1,118 @@
+import re
+from datetime import date, datetime, time, timedelta, timezone
+
+# -------------------------------------------------
+# PURCHASE DATE NORMALIZATION
+# -------------------------------------------------
+# Orders carry purchase_ts (UTC epoch seconds) next to the display text.
+# Dates arrive as datetime objects from openpyxl, ISO text from our own
+# writes, German/European day-first text or Excel serial numbers from
+# hand-edited sheets. Naive values are taken as UTC, the same as
+# SQLite's datetime('now').
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Excel serial day 0 (with the 1900 leap-year bug folded in)
+EXCEL_EPOCH = datetime(1899, 12, 30, tzinfo=timezone.utc)
+MAX_EXCEL_SERIAL = 2958465  # 9999-12-31
+
+DAY_FIRST = re.compile(
+    r"^(\d{1,2})[./](\d{1,2})[./](\d{4})(?:[ T](\d{1,2}):(\d{2})(?::(\d{2}))?)?$"
+)
+
+SERIAL = re.compile(r"^\d{1,7}(?:\.\d+)?$")
+
+
+def _utc(value):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def to_timestamp(value):
+    """Epoch seconds for a purchase date in any supported shape, else None."""
+
+    if value is None or isinstance(value, bool):
+        return None
+
+    if isinstance(value, datetime):
+        return int(_utc(value).timestamp())
+
+    if isinstance(value, date):
+        return int(datetime.combine(value, time(), timezone.utc).timestamp())
+
+    if isinstance(value, (int, float)):
+        if 0 < value <= MAX_EXCEL_SERIAL:
+            return int((EXCEL_EPOCH + timedelta(days=value)).timestamp())
+        return None
+
+    text = str(value).strip()
+    if not text or text.lower() in ("none", "nan", "nat"):
+        return None
+
+    # Serials that went through a TEXT column
+    if SERIAL.match(text):
+        return to_timestamp(float(text))
+
+    match = DAY_FIRST.match(text)
+    if match:
+        day, month, year, hour, minute, second = match.groups()
+        try:
+            parsed = datetime(int(year), int(month), int(day),
+                              int(hour or 0), int(minute or 0), int(second or 0))
+        except ValueError:
+            return None
+        return int(_utc(parsed).timestamp())
+
+    try:
+        parsed = datetime.fromisoformat(text.replace("/", "-").replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+    return int(_utc(parsed).timestamp())
+
+
+def format_timestamp(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(DATE_FORMAT)
+
+
+def normalize_purchase_date(value):
+    """(purchase_date text, purchase_ts) ready for the orders table."""
+
+    ts = to_timestamp(value)
+    if ts is None:
+        return (None if value is None else str(value)), None
+    return format_timestamp(ts), ts
+
+
+def parse_range_bound(value, name, end=False):
+    """
+    ?from= / ?to= for half-open [from, to) ranges. A bare date used as
+    the upper bound covers that whole day.
+    """
+
+    if value is None or value == "":
+        return None
+
+    ts = to_timestamp(value)
+    if ts is None:
+        raise ValueError(f"{name} must be a date or datetime")
+
+    if end and len(str(value).strip()) == 10:
+        ts += 86400
+
+    return ts
+
+
+def month_bounds(ts):
+    """[start, end) epoch seconds of the UTC calendar month containing ts."""
+
+    moment = datetime.fromtimestamp(ts, timezone.utc)
+    start = moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+
+    return int(start.timestamp()), int(end.timestamp())
@@ -1,7 +1,18 @@
+import glob
+import hashlib
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
 from pathlib import Path
+from queue import Empty
 from openpyxl import load_workbook
-from app.models.database import get_db
+from app.models.database import get_db, deferred_indexes
+from app.services.fuzzy_match_service import invalidate_medicine_index
+from app.services.order_event_service import backfill_created_events, backfill_order_events
+from app.utils.dates import normalize_purchase_date
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 RAW_DATA_DIR = BASE_DIR / "data" / "raw"
@@ -9,154 +20,761 @@ RAW_DATA_DIR = BASE_DIR / "data" / "raw"
 PRODUCTS_FILE = RAW_DATA_DIR / "products.xlsx"
 ORDERS_FILE = RAW_DATA_DIR / "orders.xlsx"
 
+# -------------------------------------------------
+# STREAMING INGESTION
+# -------------------------------------------------
+# Workbooks are opened read-only, so openpyxl streams the sheet XML
+# instead of building every cell in memory. Parsed rows go to a TEMP
+# staging table in executemany chunks (only the temp database is
+# written, so app writers are not blocked); the rows that differ from
+# the last import then reach the real tables in one transaction. A
+# first import into an empty table builds its indexes once at the end
+# (init_db rebuilds them if an import dies half way).
 
-def load_products():
-    if not PRODUCTS_FILE.exists():
-        print("Products file not found.")
-        return
+CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", 5000))
+COMMIT_ROWS = int(os.getenv("INGEST_COMMIT_ROWS", 100000))
+PROGRESS_EVERY = 100000
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", os.cpu_count() or 1))
 
-    conn = get_db()
-    cursor = conn.cursor()
+PRESCRIPTION_KEYWORDS = ("Ramipril", "Minoxidil", "femiLoges")
 
-    # Skip if already loaded
-    cursor.execute("SELECT COUNT(*) as count FROM medicines")
-    if cursor.fetchone()["count"] > 0:
-        conn.close()
-        print("Medicines already loaded. Skipping.")
-        return
 
-    wb = load_workbook(PRODUCTS_FILE)
-    sheet = wb.active
+def read_rows(path):
+    """Data rows of the first sheet, streamed; the workbook closes when done."""
 
-    for row in sheet.iter_rows(min_row=2, values_only=True):
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from wb.active.iter_rows(min_row=2, values_only=True)
+    finally:
+        wb.close()
 
-        if not row or all(cell is None for cell in row):
-            continue
 
-        try:
-            product_id, name, pzn, price, package_size, description = row
-        except ValueError:
-            continue
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
-        if not product_id or not name:
-            continue
 
-        try:
-            price = float(price) if price is not None else 0.0
-        except (ValueError, TypeError):
-            price = 0.0
-
-        # -------------------------
-        # Prescription Logic (Demo Rule-Based)
-        # -------------------------
-        prescription_required = "No"
-
-        if any(keyword in name for keyword in [
-            "Ramipril",
-            "Minoxidil",
-            "femiLoges"
-        ]):
-            prescription_required = "Yes"
+class IngestProgress:
+    """Counts rows as they stream and prints throughput every `every` rows."""
 
-        cursor.execute("""
-            INSERT OR IGNORE INTO medicines 
-            (product_id, name, pzn, price, package_size, description, stock, prescription_required)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            product_id,
-            name,
-            str(pzn) if pzn else None,
-            price,
-            package_size,
-            description,
-            100,  # default demo stock
+    def __init__(self, label, every=PROGRESS_EVERY, quiet=False):
+        self.label = label
+        self.every = every
+        self.quiet = quiet
+        self.read = 0
+        self.staged = 0
+        self.started = time.perf_counter()
+        self._next_report = every
+
+    def advance(self, read, staged):
+        self.read += read
+        self.staged += staged
+
+        if self.read >= self._next_report:
+            self._next_report += self.every
+            if not self.quiet:
+                print(f"{self.label}: {self.read:,} rows read, {self.staged:,} staged "
+                      f"({self.rate():,.0f} rows/s)")
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.read / elapsed if elapsed else 0.0
+
+    def finish(self, status, **counts):
+        seconds = time.perf_counter() - self.started
+        report = {
+            "table": self.label,
+            "status": status,
+            "read": self.read,
+            "skipped": self.read - self.staged,
+            **counts,
+            "seconds": round(seconds, 2),
+            "rows_per_second": round(self.rate())
+        }
+
+        if self.quiet:
+            return report
+
+        if status == "unchanged":
+            print(f"{self.label}: file unchanged since the last import, skipped")
+        else:
+            print(f"{self.label}: {status}, {report.get('inserted', 0):,} inserted, "
+                  f"{report.get('updated', 0):,} updated, {report.get('unchanged', 0):,} unchanged "
+                  f"of {self.read:,} rows in {seconds:.1f}s")
+        return report
+
+
+# -------------------------------------------------
+# ROW PARSERS (None = skip the row)
+# -------------------------------------------------
+
+def parse_product(row):
+
+    if not row or all(cell is None for cell in row):
+        return None
+
+    try:
+        product_id, name, pzn, price, package_size, description = row
+    except ValueError:
+        return None
+
+    if not product_id or not name:
+        return None
+
+    try:
+        price = float(price) if price is not None else 0.0
+    except (ValueError, TypeError):
+        price = 0.0
+
+    # Prescription Logic (Demo Rule-Based)
+    prescription_required = "No"
+    if any(keyword in name for keyword in PRESCRIPTION_KEYWORDS):
+        prescription_required = "Yes"
+
+    return (
+        product_id,
+        name,
+        str(pzn) if pzn else None,
+        price,
+        package_size,
+        description,
+        prescription_required
+    )
+
+
+def parse_order(row):
+    """Customer and order columns of one sheet row, in staging order."""
+
+    if not row or all(cell is None for cell in row):
+        return None
+
+    try:
+        (
+            patient_id,
+            age,
+            gender,
+            purchase_date,
+            product_name,
+            quantity,
+            total_price,
+            dosage_frequency,
             prescription_required
-        ))
+        ) = row
+    except ValueError:
+        return None
 
-    conn.commit()
-    conn.close()
-    print("Products imported successfully.")
+    if not patient_id or not product_name or quantity is None or total_price is None:
+        return None
 
+    try:
+        quantity = int(quantity)
+        total_price = float(total_price)
+    except (ValueError, TypeError):
+        return None
 
-def load_orders():
-    if not ORDERS_FILE.exists():
-        print("Orders file not found.")
-        return
+    # Dates normalized: cells may be datetimes, text or serials
+    purchase_text, purchase_ts = normalize_purchase_date(purchase_date)
 
-    conn = get_db()
-    cursor = conn.cursor()
+    return (
+        patient_id,
+        age,
+        gender,
+        product_name,
+        quantity,
+        purchase_text,
+        purchase_ts,
+        total_price,
+        dosage_frequency,
+        prescription_required
+    )
 
-    # Skip if already loaded
-    cursor.execute("SELECT COUNT(*) as count FROM orders")
-    if cursor.fetchone()["count"] > 0:
-        conn.close()
-        print("Orders already loaded. Skipping.")
-        return
 
-    wb = load_workbook(ORDERS_FILE)
-    sheet = wb.active
+# -------------------------------------------------
+# INCREMENTAL RE-IMPORT
+# -------------------------------------------------
+# Each run fingerprints its files (size, mtime, SHA-256) and records an
+# import_manifests row per file; a run whose files are identical to the
+# last applied run's is not parsed at all. Otherwise every staged row
+# gets a key and a content hash, and import_rows keeps the pairs of the
+# last import:
+#   medicines  key product_id, hash of the catalogue columns (stock is
+#              live data and never overwritten)
+#   orders     key content hash + occurrence number (the sheet has no
+#              order id and repeated rows are real orders), so order
+#              rows are only ever added
+# The diff is one join of the staged keys against import_rows; only
+# new and changed rows are written, as set-based statements. Rows that
+# left the sheets are counted as missing and kept. A database loaded
+# before manifests existed adopts its current rows as the baseline.
 
-    for row in sheet.iter_rows(min_row=2, values_only=True):
+MEDICINE_HASH = "row_hash(name, pzn, price, package_size, description, prescription_required)"
+ORDER_HASH = (
+    "row_hash(customer_id, product_name, quantity, purchase_date, total_price, "
+    "dosage_frequency, prescription_required)"
+)
 
-        if not row or all(cell is None for cell in row):
-            continue
+STAGING_SCHEMA = {
+    # Same column affinities as the target tables, so a staged row and
+    # the stored row hash the same
+    "medicines": """
+        CREATE TEMP TABLE import_staged (
+            product_id INTEGER,
+            name TEXT,
+            pzn TEXT,
+            price REAL,
+            package_size TEXT,
+            description TEXT,
+            prescription_required TEXT
+        )
+    """,
+    "orders": """
+        CREATE TEMP TABLE import_staged (
+            customer_id TEXT,
+            age INTEGER,
+            gender TEXT,
+            product_name TEXT,
+            quantity INTEGER,
+            purchase_date TEXT,
+            purchase_ts INTEGER,
+            total_price REAL,
+            dosage_frequency TEXT,
+            prescription_required TEXT
+        )
+    """,
+}
+
+STAGE_SQL = {
+    "medicines": """
+        INSERT INTO temp.import_staged (
+            rowid, product_id, name, pzn, price, package_size, description, prescription_required
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    "orders": """
+        INSERT INTO temp.import_staged (
+            rowid, customer_id, age, gender, product_name, quantity, purchase_date,
+            purchase_ts, total_price, dosage_frequency, prescription_required
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+}
 
+# (row_key, row_hash) per row of a table; {row} is its rowid column.
+# A product listed twice keeps its first row (SQLite takes the bare
+# columns of a MIN() aggregate from the row that holds the minimum).
+KEY_SQL = {
+    "medicines": f"""
+        SELECT MIN({{row}}) AS row, CAST(product_id AS TEXT) AS row_key, {MEDICINE_HASH} AS row_hash
+        FROM {{table}}
+        WHERE product_id IS NOT NULL
+        GROUP BY product_id
+    """,
+    "orders": f"""
+        SELECT row, hash || ':' || ROW_NUMBER() OVER (PARTITION BY hash ORDER BY row) AS row_key,
+               hash AS row_hash
+        FROM (SELECT {{row}} AS row, {ORDER_HASH} AS hash FROM {{table}})
+    """,
+}
+
+PARSERS = {"medicines": parse_product, "orders": parse_order}
+
+
+def row_hash(*values):
+    return hashlib.blake2b(repr(values).encode(), digest_size=12).hexdigest()
+
+
+def file_fingerprint(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+
+    stat = path.stat()
+    return {
+        "file_name": path.name,
+        "file_size": stat.st_size,
+        "file_mtime": stat.st_mtime,
+        "file_hash": digest.hexdigest()
+    }
+
+
+def last_import(cursor, source):
+    """Manifests of the last applied run of `source` (one per file)."""
+
+    # The files of one run share its started_at
+    cursor.execute("""
+        SELECT * FROM import_manifests
+        WHERE source = ? AND status = 'applied' AND started_at = (
+            SELECT started_at FROM import_manifests
+            WHERE source = ? AND status = 'applied'
+            ORDER BY id DESC LIMIT 1
+        )
+        ORDER BY id
+    """, (source, source))
+    return cursor.fetchall()
+
+
+def _table_empty(cursor, table):
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+    return not cursor.fetchone()[0]
+
+
+# -------------------------------------------------
+# MULTI-FILE INGESTION
+# -------------------------------------------------
+# A run reads every sheet named by a file, a directory or a glob. Files
+# are parsed in a process pool (openpyxl's XML parsing is the bottleneck
+# and holds the GIL); workers stream parsed batches through a bounded
+# queue to this process, the single writer of the staging table. Each
+# staged row's rowid is (file index << FILE_SHIFT) + sheet line, so the
+# keys, the diff and the insert order are the same whatever order the
+# batches arrive in and however many workers ran. A file that cannot be
+# read is reported as failed, its rows are dropped and the other files
+# are still imported; it gets no manifest, so the next run retries it.
+
+FILE_SHIFT = 32
+
+
+def resolve_inputs(paths):
+    """Sheets named by a file, a directory (its *.xlsx) or a glob, or a list of those."""
+
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+
+    files = set()
+    for pattern in paths:
+        path = Path(pattern)
+        if path.is_dir():
+            files.update(path.glob("*.xlsx"))
+        elif any(char in str(pattern) for char in "*?["):
+            files.update(map(Path, glob.glob(str(pattern))))
+        elif path.exists():
+            files.add(path)
+
+    # Excel's lock files (~$name.xlsx) are not sheets
+    return sorted(path for path in files if path.is_file() and not path.name.startswith("~$"))
+
+
+def _parse_file(source, index, path):
+    """(rows read, parsed rows) batches of one sheet; parsed rows lead with their staging rowid."""
+
+    parse = PARSERS[source]
+    line = index << FILE_SHIFT
+
+    for chunk in chunked(read_rows(path), CHUNK_ROWS):
+        rows = []
+        for row in chunk:
+            parsed = parse(row)
+            if parsed:
+                rows.append((line, *parsed))
+            line += 1
+        yield len(chunk), rows
+
+
+def _describe(exc):
+    return f"{type(exc).__name__}: {exc}"
+
+
+def _parse_serial(source, files):
+    for index, path in enumerate(files):
         try:
-            (
-                patient_id,
-                age,
-                gender,
-                purchase_date,
-                product_name,
-                quantity,
-                total_price,
-                dosage_frequency,
-                prescription_required
-            ) = row
-        except ValueError:
-            continue
+            for read, rows in _parse_file(source, index, path):
+                yield "rows", index, read, rows
+        except Exception as exc:
+            yield "failed", index, _describe(exc)
+        else:
+            yield "done", index
 
-        if not patient_id or not product_name or quantity is None or total_price is None:
-            continue
+
+# Worker side of the pool: the queue to the writer and the cancel flag
+_batches = None
+_cancelled = None
+
+
+def _init_worker(batches, cancelled):
+    global _batches, _cancelled
+    _batches, _cancelled = batches, cancelled
+
+
+def _parse_task(source, index, path):
+    try:
+        for read, rows in _parse_file(source, index, path):
+            if _cancelled.is_set():
+                return
+            _batches.put(("rows", index, read, rows))
+    except Exception as exc:
+        _batches.put(("failed", index, _describe(exc)))
+    else:
+        _batches.put(("done", index))
+
+
+def _parse_pooled(source, files, workers):
+    # fork where available: workers skip re-importing the app
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(method)
+    batches = context.Queue(maxsize=workers * 4)
+    cancelled = context.Event()
+
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                             initargs=(batches, cancelled)) as pool:
+        futures = [pool.submit(_parse_task, source, index, path) for index, path in enumerate(files)]
+        pending = len(files)
 
         try:
-            quantity = int(quantity)
-            total_price = float(total_price)
-        except (ValueError, TypeError):
+            while pending:
+                try:
+                    message = batches.get(timeout=1)
+                except Empty:
+                    # A worker that died (not a parse error) breaks the pool
+                    for future in futures:
+                        if future.done() and future.exception():
+                            raise future.exception()
+                    continue
+
+                if message[0] != "rows":
+                    pending -= 1
+                yield message
+        finally:
+            if pending:
+                # The writer stopped early: stop the parsers and drain the
+                # queue so none stays blocked on a full one
+                cancelled.set()
+                pool.shutdown(wait=False, cancel_futures=True)
+                while not all(future.done() for future in futures):
+                    try:
+                        batches.get(timeout=0.1)
+                    except Empty:
+                        pass
+
+
+def _stage(conn, cursor, source, files, progress, workers):
+    """Stage the rows of every file; returns one report per file."""
+
+    cursor.execute(STAGING_SCHEMA[source])
+    reports = [
+        {"file": path.name, "status": "staged", "read": 0, "staged": 0,
+         "inserted": 0, "updated": 0, "unchanged": 0}
+        for path in files
+    ]
+    pending = 0
+
+    if workers > 1:
+        messages = _parse_pooled(source, files, workers)
+    else:
+        messages = _parse_serial(source, files)
+
+    for kind, index, *payload in messages:
+        report = reports[index]
+
+        if kind == "rows":
+            read, rows = payload
+            cursor.executemany(STAGE_SQL[source], rows)
+            report["read"] += read
+            report["staged"] += len(rows)
+            progress.advance(read, len(rows))
+
+            pending += len(rows)
+            if pending >= COMMIT_ROWS:
+                conn.commit()
+                pending = 0
+            continue
+
+        if kind == "done" and report["read"] and not report["staged"]:
+            payload = [f"no row of {report['read']:,} matches the {source} sheet layout"]
+        elif kind == "done":
             continue
 
-        # Insert customer
+        report.update(status="failed", error=payload[0])
+        cursor.execute(
+            "DELETE FROM temp.import_staged WHERE rowid >= ? AND rowid < ?",
+            (index << FILE_SHIFT, (index + 1) << FILE_SHIFT)
+        )
+        progress.advance(0, -report["staged"])
+        report["staged"] = 0
+
+    conn.commit()
+
+    cursor.execute("""
+        CREATE TEMP TABLE import_keys (
+            staged_row INTEGER PRIMARY KEY,
+            row_key TEXT NOT NULL UNIQUE,
+            row_hash TEXT NOT NULL
+        )
+    """)
+    cursor.execute(
+        "INSERT INTO temp.import_keys (staged_row, row_key, row_hash) "
+        + KEY_SQL[source].format(row="rowid", table="temp.import_staged")
+    )
+
+    return reports
+
+
+def _drop_staging(cursor):
+    for table in ("import_staged", "import_keys", "import_delta"):
+        cursor.execute(f"DROP TABLE IF EXISTS temp.{table}")
+
+
+def _per_file(cursor, sql):
+    """{file index: count} of a query grouped by staged_row >> FILE_SHIFT."""
+
+    cursor.execute(sql)
+    return dict(cursor.fetchall())
+
+
+def _diff(cursor, source):
+    """
+    Fill temp.import_delta with new/changed rows. Returns the changed and
+    keyed row counts per file index, and the rows missing from the run.
+    """
+
+    # No baseline yet: the rows already in the table count as imported
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM import_rows WHERE source = ?)", (source,))
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"""
+            INSERT INTO import_rows (source, row_key, row_hash)
+            SELECT ?, row_key, row_hash FROM (
+                {KEY_SQL[source].format(row="id", table=source)}
+            )
+            WHERE row_key IN (SELECT row_key FROM temp.import_keys)
+        """, (source,))
+
+    cursor.execute("""
+        CREATE TEMP TABLE import_delta AS
+        SELECT k.staged_row, k.row_key, k.row_hash
+        FROM temp.import_keys k
+        LEFT JOIN import_rows r ON r.source = ? AND r.row_key = k.row_key
+        WHERE r.row_hash IS NOT k.row_hash
+        ORDER BY k.staged_row
+    """, (source,))
+
+    changed = _per_file(cursor, f"""
+        SELECT staged_row >> {FILE_SHIFT}, COUNT(*) FROM temp.import_delta GROUP BY 1
+    """)
+    keyed = _per_file(cursor, f"""
+        SELECT staged_row >> {FILE_SHIFT}, COUNT(*) FROM temp.import_keys GROUP BY 1
+    """)
+
+    cursor.execute("""
+        SELECT COUNT(*) FROM import_rows r
+        WHERE r.source = ? AND NOT EXISTS (
+            SELECT 1 FROM temp.import_keys k WHERE k.row_key = r.row_key
+        )
+    """, (source,))
+    missing = cursor.fetchone()[0]
+
+    return changed, keyed, missing
+
+
+def _record_rows(cursor, source):
+    cursor.execute("""
+        INSERT INTO import_rows (source, row_key, row_hash)
+        SELECT ?, row_key, row_hash FROM temp.import_delta WHERE true
+        ON CONFLICT (source, row_key) DO UPDATE SET row_hash = excluded.row_hash
+    """, (source,))
+
+
+# Writers: the delta into the real table; new rows per file index
+
+def _apply_medicines(cursor):
+
+    inserted = _per_file(cursor, f"""
+        SELECT d.staged_row >> {FILE_SHIFT}, COUNT(*) FROM temp.import_delta d
+        JOIN temp.import_staged s ON s.rowid = d.staged_row
+        WHERE NOT EXISTS (SELECT 1 FROM medicines m WHERE m.product_id = s.product_id)
+        GROUP BY 1
+    """)
+
+    bulk = _table_empty(cursor, "medicines")
+    with deferred_indexes(cursor, "medicines") if bulk else nullcontext():
+        cursor.execute("""
+            INSERT INTO medicines
+            (product_id, name, pzn, price, package_size, description, prescription_required)
+            SELECT s.product_id, s.name, s.pzn, s.price, s.package_size, s.description,
+                   s.prescription_required
+            FROM temp.import_delta d
+            JOIN temp.import_staged s ON s.rowid = d.staged_row
+            WHERE true
+            ORDER BY d.staged_row
+            ON CONFLICT (product_id) DO UPDATE SET
+                name = excluded.name,
+                pzn = excluded.pzn,
+                price = excluded.price,
+                package_size = excluded.package_size,
+                description = excluded.description,
+                prescription_required = excluded.prescription_required
+        """)
+
+    return inserted
+
+
+def _apply_orders(cursor):
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM orders")
+    last_order_id = cursor.fetchone()[0]
+
+    bulk = _table_empty(cursor, "orders")
+    with deferred_indexes(cursor, "orders") if bulk else nullcontext():
+        # Patients repeat across orders: the first row of each one wins
         cursor.execute("""
             INSERT OR IGNORE INTO customers (id, age, gender)
-            VALUES (?, ?, ?)
-        """, (patient_id, age, gender))
+            SELECT s.customer_id, s.age, s.gender
+            FROM temp.import_delta d
+            JOIN temp.import_staged s ON s.rowid = d.staged_row
+            ORDER BY d.staged_row
+        """)
 
-        # Insert order
         cursor.execute("""
             INSERT INTO orders (
                 customer_id,
                 product_name,
                 quantity,
                 purchase_date,
+                purchase_ts,
                 total_price,
                 dosage_frequency,
                 prescription_required
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            patient_id,
-            product_name,
-            quantity,
-            str(purchase_date),
-            total_price,
-            dosage_frequency,
-            prescription_required
-        ))
+            )
+            SELECT s.customer_id, s.product_name, s.quantity, s.purchase_date,
+                   s.purchase_ts, s.total_price, s.dosage_frequency, s.prescription_required
+            FROM temp.import_delta d
+            JOIN temp.import_staged s ON s.rowid = d.staged_row
+            ORDER BY d.staged_row
+        """)
+
+    # The new orders' created events, folded into the rollups
+    backfill_created_events(cursor, last_order_id)
+
+    # Order rows are only ever added
+    return _per_file(cursor, f"""
+        SELECT staged_row >> {FILE_SHIFT}, COUNT(*) FROM temp.import_delta GROUP BY 1
+    """)
+
+
+APPLY = {"medicines": _apply_medicines, "orders": _apply_orders}
+
+
+def _record_manifest(cursor, source, fingerprint, status, counts, started_at):
+    cursor.execute("""
+        INSERT INTO import_manifests (
+            source, file_name, file_size, file_mtime, file_hash, status,
+            rows_read, inserted, updated, unchanged, missing, started_at, finished_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        source,
+        fingerprint["file_name"],
+        fingerprint["file_size"],
+        fingerprint["file_mtime"],
+        fingerprint["file_hash"],
+        status,
+        counts["read"],
+        counts["inserted"],
+        counts["updated"],
+        counts["unchanged"],
+        counts["missing"],
+        started_at,
+        time.time()
+    ))
+    return cursor.lastrowid
+
+
+def import_files(source, paths, quiet=False, force=False, workers=None):
+    """
+    Import sheets into `source` (medicines / orders) as one run. `paths`
+    is a file, a directory, a glob or a list of those; up to `workers`
+    processes parse them. Only rows that are new or changed since the
+    last run are written. Returns the run report with one entry per file
+    under "files", or None if no file matched.
+    """
+
+    files = resolve_inputs(paths)
+    if not files:
+        print(f"No {source} sheet found at {paths}.")
+        return None
+
+    workers = max(1, min(workers or INGEST_WORKERS, len(files)))
+    started_at = time.time()
+    fingerprints = [file_fingerprint(path) for path in files]
+    progress = IngestProgress(source, quiet=quiet)
+
+    conn = get_db()
+    conn.create_function("row_hash", -1, row_hash, deterministic=True)
+    cursor = conn.cursor()
+
+    try:
+        previous = sorted(row["file_hash"] for row in last_import(cursor, source))
+        missing = 0
+
+        if not force and previous == sorted(f["file_hash"] for f in fingerprints):
+            status = "unchanged"
+            reports = [
+                {"file": path.name, "status": status, "read": 0, "staged": 0,
+                 "inserted": 0, "updated": 0, "unchanged": 0}
+                for path in files
+            ]
+        else:
+            reports = _stage(conn, cursor, source, files, progress, workers)
+            status = "failed"
+
+            if any(report["status"] == "staged" for report in reports):
+                changed, keyed, missing = _diff(cursor, source)
+                inserted = APPLY[source](cursor) if changed else {}
+                _record_rows(cursor, source)
+                status = "applied"
+
+                for index, report in enumerate(reports):
+                    if report["status"] == "staged":
+                        report.update(
+                            status=status,
+                            inserted=inserted.get(index, 0),
+                            updated=changed.get(index, 0) - inserted.get(index, 0),
+                            unchanged=keyed.get(index, 0) - changed.get(index, 0)
+                        )
+
+        for report, fingerprint in zip(reports, fingerprints):
+            report["file_hash"] = fingerprint["file_hash"]
+            if report["status"] != "failed":
+                report["manifest_id"] = _record_manifest(
+                    cursor, source, fingerprint, report["status"],
+                    {**report, "missing": missing}, started_at
+                )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        _drop_staging(cursor)
+        conn.close()
+
+    counts = {
+        key: sum(report[key] for report in reports)
+        for key in ("inserted", "updated", "unchanged")
+    }
+    if source == "medicines" and counts["inserted"] + counts["updated"]:
+        invalidate_medicine_index()
+
+    if not quiet:
+        for report in reports:
+            if report["status"] == "failed":
+                print(f"{source}: {report['file']} failed: {report['error']}")
+
+    return progress.finish(status, missing=missing, workers=workers, files=reports, **counts)
+
+
+def load_products(path=PRODUCTS_FILE, quiet=False, force=False, workers=None):
+    return import_files("medicines", path, quiet, force, workers)
+
+
+def load_orders(path=ORDERS_FILE, quiet=False, force=False, workers=None):
+    return import_files("orders", path, quiet, force, workers)
 
-    conn.commit()
-    conn.close()
-    print("Orders imported successfully.")
 
+def load_all_data(force=False, products=PRODUCTS_FILE, orders=ORDERS_FILE, workers=None):
+    load_products(products, force=force, workers=workers)
+    load_orders(orders, force=force, workers=workers)
 
-def load_all_data():
-    load_products()
-    load_orders()
\ No newline at end of file
+    # Orders that predate the event log get their created events
+    added = backfill_order_events()
+    if added:
+        print(f"Backfilled {added} order events.")
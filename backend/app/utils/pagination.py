@@ -0,0 +1,76 @@
+import base64
+import json
+
+from flask import Response
+
+# -------------------------------------------------
+# KEYSET PAGINATION
+# -------------------------------------------------
+# Cursors are opaque to clients: the sort key of the last row served,
+# JSON-encoded and base64url'd. The next page starts strictly after it,
+# so deep pages cost the same as the first one (no OFFSET).
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+
+class InvalidPageRequest(ValueError):
+    pass
+
+
+def encode_cursor(*values):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise InvalidPageRequest("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidPageRequest("Invalid cursor")
+
+    return tuple(values)
+
+
+def page_params(limit, cursor, key_size, default=DEFAULT_PAGE_SIZE):
+    """Validate ?limit=&cursor= and return (limit, after_key or None)."""
+    if limit is None:
+        limit = default
+    else:
+        try:
+            limit = int(limit)
+        except (ValueError, TypeError):
+            raise InvalidPageRequest("Limit must be an integer")
+
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        raise InvalidPageRequest(f"Limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    after = decode_cursor(cursor, key_size) if cursor else None
+    return limit, after
+
+
+def take_page(rows, limit, key):
+    """Read limit + 1 items from an iterator; return (page, next_cursor)."""
+    page = []
+
+    for row in rows:
+        if len(page) == limit:
+            return page, encode_cursor(*key(page[-1]))
+        page.append(row)
+
+    return page, None
+
+
+def ndjson_lines(items):
+    for item in items:
+        yield json.dumps(item, separators=(",", ":"), default=str).encode() + b"\n"
+
+
+def ndjson_response(items):
+    # One JSON object per line, written as rows are produced
+    return Response(ndjson_lines(items), mimetype="application/x-ndjson")
@@ -0,0 +1,121 @@
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from flask import Response, current_app, jsonify, request
+
+# -------------------------------------------------
+# PRE-SERIALIZED RESPONSE CACHE
+# -------------------------------------------------
+# Holds the exact JSON bytes of a GET response for one catalog version.
+# A version bump makes every entry stale; stale entries are rebuilt on
+# the next request and old ones fall off the LRU end.
+
+MAX_ENTRIES = 256
+
+
+class ResponseCache:
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "not_modified": 0,
+            "evictions": 0,
+        }
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] != version:
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key, version, body):
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def count_not_modified(self):
+        with self._lock:
+            self._stats["not_modified"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = sum(len(body) for _, body in self._entries.values())
+        return stats
+
+
+def make_etag(key, version):
+    # Same version + same request key -> same bytes
+    return f"catalog-{version}-{zlib.crc32(repr(key).encode()):08x}"
+
+
+def conditional_json(cache, key, current_version, build):
+    """Serve build()'s JSON for this catalog version with ETag/Last-Modified.
+
+    current_version() returns (version, updated_at). build() is only
+    called on a cache miss and must return the usual (payload, status)
+    tuple; non-200 results are returned uncached.
+    """
+    version, updated_at = current_version()
+    etag = make_etag(key, version)
+    last_modified = datetime.fromtimestamp(int(updated_at), timezone.utc)
+
+    if etag in request.if_none_match:
+        cache.count_not_modified()
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        return response
+
+    body = cache.get(key, version)
+
+    if body is None:
+        payload, status = build()
+
+        if status != 200:
+            return jsonify(payload), status
+
+        body = current_app.json.dumps(payload).encode()
+
+        # A write that landed before build() read the catalog would put
+        # a newer body under the old version; only cache (and tag) it if
+        # the version is still the one we started from
+        if current_version()[0] != version:
+            response = Response(body, mimetype="application/json")
+            response.cache_control.no_cache = True
+            return response
+
+        cache.put(key, version, body)
+
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+
+    # Handles If-Modified-Since when the client sent no ETag
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        cache.count_not_modified()
+
+    return response
@@ -0,0 +1,401 @@
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.models.database import SCHEMA_VERSION, db_connection, deferred_indexes, get_db
+from app.services.fuzzy_match_service import invalidate_medicine_index
+from app.services.order_event_service import backfill_created_events
+
+# -------------------------------------------------
+# COLUMNAR SNAPSHOTS
+# -------------------------------------------------
+# A snapshot is a directory: manifest.json plus one raw little-endian
+# file per column buffer, laid out like Arrow so each one can be
+# np.memmap'ed as is:
+#   int64 / float64   <column>.values
+#   utf8              <column>.offsets (int64, rows + 1) + <column>.data
+#   dictionary        <column>.codes (int32, -1 = NULL) + the distinct
+#                     strings as <column>.dict.offsets / .dict.data
+#   any kind          <column>.valid (uint8) if the column has NULLs
+# Columns are typed from their declared type and fall back to utf8 when
+# a stored value does not fit (SQLite does not enforce types); strings
+# analytics group by are dictionary-encoded. Export streams each table
+# in batches inside one read transaction, so the tables agree with each
+# other, into a temp directory renamed into place once complete.
+
+SNAPSHOT_FORMAT = "pharmacy-columnar"
+SNAPSHOT_VERSION = 1
+BATCH_ROWS = 50000
+
+SNAPSHOT_TABLES = ("medicines", "customers", "orders", "prescriptions")
+
+DICTIONARY_COLUMNS = {
+    "medicines": {"prescription_required"},
+    "customers": {"gender"},
+    "orders": {"customer_id", "product_name", "dosage_frequency", "prescription_required"},
+    "prescriptions": {"customer_id", "status"},
+}
+
+DTYPES = {"int64": "<i8", "float64": "<f8"}
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _column_kinds(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    columns = [(row[1], (row[2] or "").upper()) for row in cursor.fetchall()]
+
+    # Declared affinity, as SQLite derives it
+    declared = {}
+    for name, type_name in columns:
+        if "INT" in type_name:
+            declared[name] = ("int64", "'integer', 'null'")
+        elif any(token in type_name for token in ("REAL", "FLOA", "DOUB")):
+            declared[name] = ("float64", "'real', 'integer', 'null'")
+
+    # One scan counts the values that do not fit each numeric column
+    misfits = {}
+    if declared:
+        cursor.execute("SELECT " + ", ".join(
+            f"SUM(typeof({name}) NOT IN ({allowed}))" for name, (_, allowed) in declared.items()
+        ) + f" FROM {table}")
+        misfits = dict(zip(declared, cursor.fetchone()))
+
+    kinds = {}
+    for name, _ in columns:
+        if name in DICTIONARY_COLUMNS.get(table, ()):
+            kinds[name] = "dictionary"
+        elif name in declared and not misfits[name]:
+            kinds[name] = declared[name][0]
+        else:
+            kinds[name] = "utf8"
+
+    return kinds
+
+
+def _utf8(values, start):
+    """(end offsets, data bytes) of strings; NULLs are empty strings."""
+
+    encoded = [b"" if value is None else str(value).encode() for value in values]
+    ends = start + np.cumsum(np.fromiter(map(len, encoded), np.int64, len(encoded)))
+    return ends.astype(DTYPES["int64"]), b"".join(encoded)
+
+
+# -------------------------------------------------
+# STREAMING WRITER
+# -------------------------------------------------
+
+class _ColumnWriter:
+
+    PARTS = {
+        "int64": ("values",),
+        "float64": ("values",),
+        "utf8": ("offsets", "data"),
+        "dictionary": ("codes",),
+    }
+
+    def __init__(self, directory, name, kind):
+        self.directory = directory
+        self.name = name
+        self.kind = kind
+        self.nulls = 0
+        self.offset = 0
+        self.lookup = {None: -1}  # stored value -> dictionary code
+        self.strings = []
+        self.files = {
+            part: open(directory / f"{name}.{part}", "wb")
+            for part in self.PARTS[kind] + ("valid",)
+        }
+
+        if kind == "utf8":
+            np.zeros(1, DTYPES["int64"]).tofile(self.files["offsets"])
+
+    def write(self, values):
+        size = len(values)
+        nulls = values.count(None)
+        self.nulls += nulls
+
+        if nulls:
+            valid = np.fromiter((value is not None for value in values), np.uint8, size)
+        else:
+            valid = np.ones(size, np.uint8)
+        valid.tofile(self.files["valid"])
+
+        if self.kind in DTYPES:
+            if nulls:
+                values = [0 if value is None else value for value in values]
+            np.array(values, DTYPES[self.kind]).tofile(self.files["values"])
+
+        elif self.kind == "utf8":
+            ends, data = _utf8(values, self.offset)
+            ends.tofile(self.files["offsets"])
+            self.files["data"].write(data)
+            if size:
+                self.offset = int(ends[-1])
+
+        else:
+            lookup = self.lookup
+            for value in set(values).difference(lookup):
+                lookup[value] = len(self.strings)
+                self.strings.append(str(value))
+
+            np.fromiter(map(lookup.__getitem__, values), "<i4", size).tofile(self.files["codes"])
+
+    def close(self):
+        for handle in self.files.values():
+            handle.close()
+
+        if not self.nulls:
+            (self.directory / f"{self.name}.valid").unlink()
+
+        meta = {"kind": self.kind, "nulls": self.nulls}
+
+        if self.kind == "dictionary":
+            ends, data = _utf8(self.strings, 0)
+            np.concatenate([np.zeros(1, DTYPES["int64"]), ends]).tofile(
+                self.directory / f"{self.name}.dict.offsets"
+            )
+            (self.directory / f"{self.name}.dict.data").write_bytes(data)
+            meta["dictionary_size"] = len(self.strings)
+
+        return meta
+
+
+def _export_table(cursor, table, directory):
+    directory.mkdir()
+    kinds = _column_kinds(cursor, table)
+    writers = [_ColumnWriter(directory, name, kind) for name, kind in kinds.items()]
+    rows = 0
+
+    try:
+        cursor.execute(f"SELECT {', '.join(kinds)} FROM {table} ORDER BY rowid")
+
+        while True:
+            batch = cursor.fetchmany(BATCH_ROWS)
+            if not batch:
+                break
+
+            for writer, values in zip(writers, zip(*batch)):
+                writer.write(values)
+            rows += len(batch)
+    finally:
+        columns = {writer.name: writer.close() for writer in writers}
+
+    return {"rows": rows, "columns": columns}
+
+
+def export_snapshot(path):
+    """Write a snapshot of SNAPSHOT_TABLES to the new directory `path`; returns its manifest."""
+
+    path = Path(path)
+    if path.exists():
+        raise SnapshotError(f"{path} already exists")
+
+    staging = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    started = time.perf_counter()
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "schema_version": SCHEMA_VERSION,
+        "created_at": time.time(),
+        "tables": {}
+    }
+
+    try:
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+
+            # One read transaction: every table from the same commit
+            cursor.execute("BEGIN")
+            try:
+                for table in SNAPSHOT_TABLES:
+                    manifest["tables"][table] = _export_table(cursor, table, staging / table)
+            finally:
+                conn.rollback()
+
+        manifest["seconds"] = round(time.perf_counter() - started, 2)
+        (staging / "manifest.json").write_text(json.dumps(manifest, indent=2))
+        staging.rename(path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    return manifest
+
+
+# -------------------------------------------------
+# MEMORY-MAPPED READER
+# -------------------------------------------------
+
+class SnapshotTable:
+    """Columns of one table; arrays are read-only memory maps of the files."""
+
+    def __init__(self, directory, meta):
+        self.directory = directory
+        self.rows = meta["rows"]
+        self.columns = meta["columns"]
+        self._dictionaries = {}
+
+    def __len__(self):
+        return self.rows
+
+    def _map(self, name, dtype, length):
+        if length == 0:
+            return np.empty(0, dtype)
+        return np.memmap(self.directory / name, dtype=dtype, mode="r", shape=(length,))
+
+    def _meta(self, column):
+        try:
+            return self.columns[column]
+        except KeyError:
+            raise SnapshotError(f"No column {column}")
+
+    def array(self, column):
+        """Values of a numeric column (0 where NULL), codes of a dictionary column."""
+
+        kind = self._meta(column)["kind"]
+        if kind in DTYPES:
+            return self._map(f"{column}.values", DTYPES[kind], self.rows)
+        if kind == "dictionary":
+            return self._map(f"{column}.codes", "<i4", self.rows)
+        raise SnapshotError(f"{column} is a utf8 column")
+
+    def valid(self, column):
+        """Mask of non-NULL rows, None if the column has no NULLs."""
+
+        if not self._meta(column)["nulls"]:
+            return None
+        return self._map(f"{column}.valid", np.bool_, self.rows)
+
+    def dictionary(self, column):
+        meta = self._meta(column)
+        if meta["kind"] != "dictionary":
+            raise SnapshotError(f"{column} is not dictionary-encoded")
+
+        if column not in self._dictionaries:
+            size = meta["dictionary_size"]
+            offsets = self._map(f"{column}.dict.offsets", DTYPES["int64"], size + 1).tolist()
+            data = (self.directory / f"{column}.dict.data").read_bytes()
+            self._dictionaries[column] = [data[a:b].decode() for a, b in zip(offsets, offsets[1:])]
+
+        return self._dictionaries[column]
+
+    def to_pylist(self, column, start=0, stop=None):
+        """Python values of rows [start, stop), None for NULLs."""
+
+        stop = self.rows if stop is None else min(stop, self.rows)
+        kind = self._meta(column)["kind"]
+
+        if kind in DTYPES:
+            values = self.array(column)[start:stop].tolist()
+        elif kind == "dictionary":
+            strings = self.dictionary(column)
+            values = [strings[code] if code >= 0 else None
+                      for code in self.array(column)[start:stop].tolist()]
+        else:
+            offsets = self._map(f"{column}.offsets", DTYPES["int64"], self.rows + 1)[start:stop + 1]
+            offsets = offsets.tolist()
+            if not offsets:
+                return []
+            data = self._map(f"{column}.data", np.uint8, offsets[-1])[offsets[0]:offsets[-1]].tobytes()
+            base = offsets[0]
+            values = [data[a - base:b - base].decode() for a, b in zip(offsets, offsets[1:])]
+
+        valid = self.valid(column)
+        if valid is not None:
+            values = [value if ok else None for value, ok in zip(values, valid[start:stop].tolist())]
+
+        return values
+
+
+class Snapshot:
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+        try:
+            self.manifest = json.loads((self.path / "manifest.json").read_text())
+        except (OSError, ValueError):
+            raise SnapshotError(f"{self.path} is not a snapshot")
+
+        if (self.manifest.get("format"), self.manifest.get("version")) != (SNAPSHOT_FORMAT, SNAPSHOT_VERSION):
+            raise SnapshotError(f"{self.path} has an unsupported snapshot format")
+
+        self.tables = self.manifest["tables"]
+
+    def table(self, name):
+        if name not in self.tables:
+            raise SnapshotError(f"No table {name} in snapshot")
+        return SnapshotTable(self.path / name, self.tables[name])
+
+
+def open_snapshot(path):
+    return Snapshot(path)
+
+
+# -------------------------------------------------
+# RESTORE
+# -------------------------------------------------
+# Into a database whose snapshot tables are empty (a fresh node, or
+# restoring a backup after `manage.py migrate`): ids are kept, columns
+# the current schema does not have are skipped, indexes are built once
+# at the end and the orders get their created events and rollups, all
+# in one transaction.
+
+def import_snapshot(path):
+    """Load a snapshot into empty tables; returns rows imported per table."""
+
+    snapshot = open_snapshot(path)
+    if snapshot.manifest["schema_version"] > SCHEMA_VERSION:
+        raise SnapshotError("Snapshot is from a newer schema: migrate this database first")
+
+    conn = get_db()
+    cursor = conn.cursor()
+    counts = {}
+
+    try:
+        for table in SNAPSHOT_TABLES:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+            if cursor.fetchone()[0]:
+                raise SnapshotError(f"{table} is not empty: restore into a fresh database")
+
+        for table in SNAPSHOT_TABLES:
+            if table not in snapshot.tables:
+                continue
+
+            source = snapshot.table(table)
+            cursor.execute(f"PRAGMA table_info({table})")
+            existing = {row[1] for row in cursor.fetchall()}
+            columns = [column for column in source.columns if column in existing]
+
+            with deferred_indexes(cursor, table):
+                for start in range(0, len(source), BATCH_ROWS):
+                    stop = start + BATCH_ROWS
+                    cursor.executemany(
+                        f"INSERT INTO {table} ({', '.join(columns)}) "
+                        f"VALUES ({', '.join('?' * len(columns))})",
+                        zip(*(source.to_pylist(column, start, stop) for column in columns))
+                    )
+
+            counts[table] = len(source)
+
+        backfill_created_events(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    invalidate_medicine_index()
+    return counts
@@ -0,0 +1,57 @@
+# ============================================================
+# CART ORDER BENCHMARK: ONE CART vs N SINGLE ORDERS
+# ============================================================
+# cd backend && python -m benchmarks.bench_cart_orders [lines_per_cart]
+
+import sys
+import time
+
+from flask import Flask
+
+from benchmarks.common import insert_medicines, print_section, temp_database
+from app.routes.order import order_bp
+
+CARTS = 300
+
+
+def run(lines_per_cart=5):
+    db = temp_database(profile="balanced")
+
+    with db.db_connection() as conn:
+        insert_medicines(conn, 1000)
+        conn.execute("UPDATE medicines SET stock = 1000000, prescription_required = 'No'")
+        conn.commit()
+
+    app = Flask(__name__)
+    app.register_blueprint(order_bp)
+    client = app.test_client()
+
+    def items(cart):
+        return [
+            {"medicine_id": 1 + (cart * lines_per_cart + i) % 1000, "quantity": 1}
+            for i in range(lines_per_cart)
+        ]
+
+    print_section(f"{CARTS} CARTS x {lines_per_cart} LINES")
+
+    started = time.perf_counter()
+    for cart in range(CARTS):
+        for item in items(cart):
+            response = client.post("/create-order", json={"customer_id": "PAT001", **item})
+            assert response.status_code == 201, response.json
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for cart in range(CARTS):
+        response = client.post("/create-order", json={"customer_id": "PAT001", "items": items(cart)})
+        assert response.status_code == 201, response.json
+    batched = time.perf_counter() - started
+
+    lines = CARTS * lines_per_cart
+    print(f"single orders: {lines / single:8.0f} lines/s  ({single * 1000 / CARTS:.2f} ms per cart)")
+    print(f"cart orders:   {lines / batched:8.0f} lines/s  ({batched * 1000 / CARTS:.2f} ms per cart)")
+    print(f"speedup:       {single / batched:8.1f}x")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
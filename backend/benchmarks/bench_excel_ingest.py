@@ -0,0 +1,151 @@
+# ============================================================
+# EXCEL INGESTION BENCHMARK: STREAMING vs LEGACY LOADER
+# ============================================================
+# Synthetic orders.xlsx (cached in the temp dir per row count). Each
+# loader runs in a forked child against a fresh database, so its peak
+# RSS is its own:
+#   legacy     full workbook in memory, two execute() per row
+#   streaming  excel_loader.load_orders: read-only iter_rows, chunked
+#              executemany into staging, indexes built at the end,
+#              created events and rollups included
+# The legacy loader runs on a smaller file by default; it needs
+# minutes and gigabytes at 1M rows.
+#
+# cd backend && python -m benchmarks.bench_excel_ingest [rows] [legacy_rows]
+
+import multiprocessing
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from openpyxl import Workbook, load_workbook
+
+from benchmarks.common import print_section, temp_database
+from app.utils import excel_loader
+from app.utils.dates import normalize_purchase_date
+
+HEADER = ("Patient ID", "Patient Age", "Patient Gender", "Purchase Date", "Product Name",
+          "Quantity", "Total Price (EUR)", "Dosage Frequency", "Prescription Required")
+PRODUCTS = [f"Medicine {i} 500 mg" for i in range(2000)]
+
+
+def synthetic_orders(rows):
+    path = Path(tempfile.gettempdir()) / f"pharmacy-bench-orders-{rows}.xlsx"
+    if path.exists():
+        return path
+
+    rng = random.Random(29)
+    start = datetime(2024, 1, 1)
+
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet()
+    sheet.append(HEADER)
+    for _ in range(rows):
+        sheet.append((
+            f"PAT{rng.randrange(50000):05d}",
+            rng.randint(18, 90),
+            rng.choice("MF"),
+            start + timedelta(seconds=rng.randrange(365 * 86400)),
+            rng.choice(PRODUCTS),
+            1 + rng.randrange(3),
+            round(rng.uniform(2, 80), 2),
+            "1x daily",
+            "No",
+        ))
+    wb.save(path)
+    return path
+
+
+def legacy_load_orders(path):
+    # The loader before streaming ingestion, unchanged apart from the path
+    conn = excel_loader.get_db()
+    cursor = conn.cursor()
+
+    wb = load_workbook(path)
+    sheet = wb.active
+
+    for row in sheet.iter_rows(min_row=2, values_only=True):
+        if not row or all(cell is None for cell in row):
+            continue
+        try:
+            (patient_id, age, gender, purchase_date, product_name, quantity,
+             total_price, dosage_frequency, prescription_required) = row
+        except ValueError:
+            continue
+        if not patient_id or not product_name or quantity is None or total_price is None:
+            continue
+        try:
+            quantity = int(quantity)
+            total_price = float(total_price)
+        except (ValueError, TypeError):
+            continue
+
+        cursor.execute("""
+            INSERT OR IGNORE INTO customers (id, age, gender)
+            VALUES (?, ?, ?)
+        """, (patient_id, age, gender))
+
+        purchase_text, purchase_ts = normalize_purchase_date(purchase_date)
+        cursor.execute("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date, purchase_ts,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (patient_id, product_name, quantity, purchase_text, purchase_ts,
+              total_price, dosage_frequency, prescription_required))
+
+    conn.commit()
+    conn.close()
+
+
+def _child(loader, path, results):
+    db = temp_database(profile="balanced")
+    started = time.perf_counter()
+
+    if loader == "legacy":
+        legacy_load_orders(path)
+    else:
+        excel_loader.load_orders(path, quiet=True)
+
+    seconds = time.perf_counter() - started
+    with db.db_connection(readonly=True) as conn:
+        count = conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    results.put((seconds, count, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def measure(loader, path):
+    results = multiprocessing.get_context("fork").Queue()
+    child = multiprocessing.get_context("fork").Process(target=_child, args=(loader, path, results))
+    child.start()
+    seconds, count, peak_mb = results.get()
+    child.join()
+    return seconds, count, peak_mb
+
+
+def report(label, rows, seconds, count, peak_mb):
+    print(f"{label:<10} {rows:>9,} rows  {seconds:8.1f} s  {count / seconds:>9,.0f} rows/s  "
+          f"peak RSS {peak_mb:7.0f} MB")
+
+
+def run(rows=1000000, legacy_rows=100000):
+    print_section(f"EXCEL INGESTION ({rows:,} orders)")
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"parent RSS before fork: {baseline:.0f} MB")
+
+    started = time.perf_counter()
+    big = synthetic_orders(rows)
+    small = synthetic_orders(legacy_rows) if legacy_rows else None
+    print(f"workbooks ready in {time.perf_counter() - started:.1f} s")
+
+    if small:
+        report("legacy", legacy_rows, *measure("legacy", small))
+        report("streaming", legacy_rows, *measure("streaming", small))
+    report("streaming", rows, *measure("streaming", big))
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,77 @@
+# ============================================================
+# FUZZY MEDICINE MATCH BENCHMARK
+# ============================================================
+# cd backend && python -m benchmarks.bench_fuzzy_match [catalog_size]
+
+import random
+import sys
+import time
+
+from benchmarks.common import print_section
+from app.services.fuzzy_match_service import TrigramIndex
+
+SYLLABLES = [
+    "pa", "ra", "ce", "ta", "mol", "ibu", "pro", "fen", "mi", "pril", "lo",
+    "xi", "dil", "ti", "ri", "zin", "ome", "zol", "me", "for", "min", "am",
+    "di", "pin", "sim", "va", "sta", "tin", "bi", "so", "ol", "na", "dro",
+    "xa", "ben", "cla", "vu", "cil",
+]
+FORMS = ["Tabletten", "Kapseln", "Salbe", "Tropfen", "Spray"]
+QUERIES = 1000
+
+
+def misspell(rng, word):
+    position = rng.randrange(len(word))
+    action = rng.choice(("drop", "swap", "replace"))
+
+    if action == "drop":
+        return word[:position] + word[position + 1:]
+    if action == "swap" and position < len(word) - 1:
+        return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    return word[:position] + rng.choice("aeiouy") + word[position + 1:]
+
+
+def run(catalog_size=100_000):
+    rng = random.Random(11)
+    stems = sorted({
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        for _ in range(catalog_size // 5)
+    })
+
+    names = [
+        f"{rng.choice(stems).capitalize()} {rng.randint(1, 1000)} mg {rng.choice(FORMS)}"
+        for _ in range(catalog_size)
+    ]
+
+    print_section(f"BUILDING INDEX: {catalog_size:,} PRODUCTS, {len(stems):,} STEMS")
+    started = time.perf_counter()
+    index = TrigramIndex()
+    for medicine_id, name in enumerate(names):
+        index.add(medicine_id, name)
+    print(f"build: {time.perf_counter() - started:.2f} s")
+
+    queries = []
+    for _ in range(QUERIES):
+        target = rng.randrange(len(names))
+        queries.append((target, misspell(rng, names[target].split()[0].lower())))
+
+    print_section(f"{QUERIES} MISSPELLED LOOKUPS")
+    samples = []
+    hits = 0
+
+    for target, query in queries:
+        started = time.perf_counter()
+        results = index.search(query)
+        samples.append((time.perf_counter() - started) * 1000)
+
+        stem = names[target].split()[0]
+        hits += any(r["name"].split()[0] == stem for r in results)
+
+    samples.sort()
+    print(f"median: {samples[len(samples) // 2]:.3f} ms")
+    print(f"p95:    {samples[int(len(samples) * 0.95)]:.3f} ms")
+    print(f"stem recall@5: {hits / QUERIES:.1%}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,90 @@
+# ============================================================
+# INCREMENTAL RE-IMPORT BENCHMARK
+# ============================================================
+# The same catalog and order sheets imported three ways into one
+# database, against the old workflow of deleting the database and
+# loading everything again:
+#   unchanged   identical file, skipped on its fingerprint
+#   delta       1% of products repriced / 1% new orders appended;
+#               the whole sheet is parsed, only the delta is written
+#   full        fresh database, every row written
+# "parse only" is a bare read_rows pass over the sheet, the floor for
+# any import that has to open the file.
+#
+# cd backend && python -m benchmarks.bench_incremental_import [products] [orders]
+
+import random
+import sys
+import time
+
+from openpyxl import Workbook
+
+from benchmarks.bench_excel_ingest import synthetic_orders
+from benchmarks.common import print_section, synthetic_medicines, temp_database
+from app.utils import excel_loader
+
+HEADER = ("product id", "product name", "pzn", "price rec", "package size", "descriptions")
+
+
+def write_products(path, rows):
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet()
+    sheet.append(HEADER)
+    for row in rows:
+        sheet.append(row)
+    wb.save(path)
+    return path
+
+
+def timed(label, fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - started
+
+    detail = ""
+    if isinstance(result, dict):
+        detail = (f"{result['status']:<9} +{result['inserted']:,} ~{result['updated']:,} "
+                  f"={result['unchanged']:,}")
+    print(f"  {label:<12} {seconds:8.2f} s  {detail}")
+    return seconds
+
+
+def parse_only(path):
+    return sum(1 for _ in excel_loader.read_rows(path))
+
+
+def run(products=100000, orders=100000):
+    workdir = temp_database().DB_PATH.parent
+    rng = random.Random(3)
+
+    catalog = [row[:6] for row in synthetic_medicines(products)]
+    v1 = write_products(workdir / "products-v1.xlsx", catalog)
+
+    repriced = [row[:3] + (round(row[3] * 1.1, 2),) + row[4:] if rng.random() < 0.01 else row
+                for row in catalog]
+    v2 = write_products(workdir / "products-v2.xlsx", repriced)
+
+    print_section(f"CATALOG RE-IMPORT ({products:,} products)")
+    timed("parse only", parse_only, v2)
+    timed("first", excel_loader.load_products, v1, True)
+    timed("unchanged", excel_loader.load_products, v1, True)
+    timed("delta", excel_loader.load_products, v2, True)
+    temp_database()
+    timed("full", excel_loader.load_products, v2, True)
+
+    # Orders: a sheet and the same sheet with 1% more rows appended
+    appended = orders + orders // 100
+    base, grown = synthetic_orders(orders), synthetic_orders(appended)
+
+    print_section(f"ORDER RE-IMPORT ({orders:,} + {appended - orders:,} orders)")
+    temp_database()
+    timed("parse only", parse_only, grown)
+    timed("first", excel_loader.load_orders, base, True)
+    timed("unchanged", excel_loader.load_orders, base, True)
+    timed("delta", excel_loader.load_orders, grown, True)
+    temp_database()
+    timed("full", excel_loader.load_orders, grown, True)
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:3]))
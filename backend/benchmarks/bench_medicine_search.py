@@ -0,0 +1,38 @@
+# ============================================================
+# MEDICINE SEARCH BENCHMARK: LIKE vs FTS5
+# ============================================================
+# cd backend && python -m benchmarks.bench_medicine_search [catalog_size]
+
+import sys
+
+from benchmarks.common import insert_medicines, print_section, temp_database, timed
+from app.services.inventory_service import search_medicines
+
+QUERIES = ["para", "ibuprofen 400", "nasenspray", "vitamin tabl", "zz"]
+REPEAT = 20
+
+
+def run(catalog_size=100_000):
+    db = temp_database()
+
+    print_section(f"LOADING {catalog_size:,} PRODUCTS")
+    with db.db_connection() as conn:
+        insert_medicines(conn, catalog_size)
+
+    print_section("QUERY            LIKE median/p95     FTS median/p95    rows")
+    for query in QUERIES:
+        like = timed(lambda: search_medicines(query, "like"), REPEAT)
+        fts = timed(lambda: search_medicines(query, "fts"), REPEAT)
+
+        like_rows = len(like["result"][0]["data"])
+        fts_rows = len(fts["result"][0]["data"])
+
+        print(
+            f"{query:<16} {like['median_ms']:>8.2f}/{like['p95_ms']:<8.2f} ms"
+            f" {fts['median_ms']:>8.2f}/{fts['p95_ms']:<8.2f} ms"
+            f"  {like_rows}/{fts_rows}"
+        )
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,56 @@
+# ============================================================
+# PARALLEL MULTI-FILE INGESTION BENCHMARK
+# ============================================================
+# A directory of supplier order sheets (copies of one synthetic sheet,
+# cached in the temp dir) imported into a fresh database per worker
+# count: workers parse the sheets in a process pool and stream batches
+# to the single writer, which stages, diffs and inserts them, events
+# and rollups included. workers=1 parses in-process (no pool).
+# Parsing dominates (bench_excel_ingest), so the speedup is bounded by
+# the cores available and by the writer's share of the run.
+#
+# cd backend && python -m benchmarks.bench_parallel_ingest [files] [rows_per_file] [workers...]
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_excel_ingest import synthetic_orders
+from benchmarks.common import print_section, temp_database
+from app.utils import excel_loader
+
+
+def supplier_directory(files, rows):
+    directory = Path(tempfile.gettempdir()) / f"pharmacy-bench-suppliers-{files}x{rows}"
+    if not directory.exists():
+        sheet = synthetic_orders(rows)
+        directory.mkdir()
+        for n in range(files):
+            shutil.copy(sheet, directory / f"supplier-{n:02d}.xlsx")
+    return directory
+
+
+def run(files=8, rows=25000, *worker_counts):
+    directory = supplier_directory(files, rows)
+    worker_counts = worker_counts or (1, 2, 4, 8)
+
+    print_section(f"PARALLEL INGESTION ({files} files x {rows:,} orders, {os.cpu_count()} CPUs)")
+
+    baseline = None
+    for workers in worker_counts:
+        temp_database()
+        started = time.perf_counter()
+        report = excel_loader.load_orders(directory, quiet=True, workers=workers)
+        seconds = time.perf_counter() - started
+
+        baseline = baseline or seconds
+        print(f"  workers {report['workers']:>2}  {seconds:8.2f} s  "
+              f"{report['read'] / seconds:9,.0f} rows/s  x{baseline / seconds:4.2f}  "
+              f"({report['inserted']:,} inserted)")
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:]))
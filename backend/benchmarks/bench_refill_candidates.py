@@ -0,0 +1,118 @@
+# ============================================================
+# REFILL CANDIDATES BENCHMARK: BATCH ENGINE vs PER-CUSTOMER LOOP
+# ============================================================
+# 1M orders, 50k customers, 2000 medicines of which 200 carry a refill
+# rule. Compares
+#   per-customer  the predictor's approach: fetch each customer's
+#                 history, check it against the rules (sampled, then
+#                 extrapolated to every customer; no HTTP hop, so the
+#                 agent's real loop is slower still)
+#   batch         compute_refill_candidates: one indexed read of the
+#                 orders for rule medicines
+#   table         the same plus writing refill_candidates
+#
+# cd backend && python -m benchmarks.bench_refill_candidates [orders]
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import insert_medicines, print_section, temp_database
+from app.services import refill_service
+from app.services.order_service import get_customer_history
+from app.utils.dates import format_timestamp
+
+N_CUSTOMERS = 50000
+N_MEDICINES = 2000
+N_RULES = 200
+SAMPLE = 200
+
+
+def seed(db, orders):
+    rng = random.Random(23)
+    now = int(time.time())
+
+    with db.db_connection() as conn:
+        insert_medicines(conn, N_MEDICINES)
+        names = [row[0] for row in conn.execute("SELECT name FROM medicines ORDER BY id")]
+
+        def rows():
+            for _ in range(orders):
+                ts = now - rng.randrange(365 * 86400)
+                yield (
+                    f"PAT{rng.randrange(N_CUSTOMERS):05d}",
+                    names[rng.randrange(N_MEDICINES)],
+                    1 + rng.randrange(3),
+                    format_timestamp(ts),
+                    ts,
+                )
+
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date, purchase_ts,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, ?, ?, ?, 9.99, 'N/A', 'No')
+        """, rows())
+        conn.commit()
+
+    path = Path(tempfile.mkdtemp(prefix="refill-rules-")) / "medicine_rules.csv"
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write("medicine,refill_days,max_monthly_quantity\n")
+        for name in rng.sample(names, N_RULES):
+            handle.write(f"\"{name}\",{rng.choice([14, 30, 60, 90])},5\n")
+
+    return path
+
+
+def per_customer(customer_id, rules, now):
+    # What analyze_refill_opportunity does, minus the HTTP hop
+    response, _ = get_customer_history(customer_id)
+    last = {}
+    for order in response.get("data", []):
+        # Newest first, so the first date seen per medicine is the last purchase
+        last.setdefault(order["medicine"].lower(), order["date"])
+
+    due = 0
+    for key, date in last.items():
+        rule = rules.get(key)
+        if rule and date:
+            days = (now - time.mktime(time.strptime(date[:19], "%Y-%m-%d %H:%M:%S"))) // 86400
+            due += days >= rule[1]
+    return due
+
+
+def run(orders=1000000):
+    db = temp_database(profile="balanced")
+
+    started = time.perf_counter()
+    refill_service.RULES_PATH = seed(db, orders)
+    print_section(f"REFILL CANDIDATES ({orders} orders, {N_CUSTOMERS} customers)")
+    print(f"seed:                     {time.perf_counter() - started:8.1f} s")
+
+    rules = refill_service.load_refill_rules()
+    now = time.time()
+
+    sample = [f"PAT{i:05d}" for i in random.Random(3).sample(range(N_CUSTOMERS), SAMPLE)]
+    started = time.perf_counter()
+    for customer_id in sample:
+        per_customer(customer_id, rules, now)
+    loop = (time.perf_counter() - started) / SAMPLE * N_CUSTOMERS
+
+    started = time.perf_counter()
+    candidates = refill_service.compute_refill_candidates()
+    batch = time.perf_counter() - started
+
+    started = time.perf_counter()
+    refill_service.write_refill_candidates(candidates)
+    table = time.perf_counter() - started + batch
+
+    print(f"per-customer (estimated): {loop:8.2f} s")
+    print(f"batch engine:             {batch:8.2f} s")
+    print(f"batch + table write:      {table:8.2f} s")
+    print(f"candidates:               {len(candidates):8d}")
+    print(f"speedup vs loop:          {loop / batch:8.1f}x")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
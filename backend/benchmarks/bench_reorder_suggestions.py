@@ -0,0 +1,83 @@
+# ============================================================
+# REORDER SUGGESTIONS BENCHMARK
+# ============================================================
+# 100k-product catalog, 90 days of orders. Times the full
+# /admin/reorder-suggestions request: cold (catalog snapshot loaded on
+# the first call) and warm (snapshot cached; the forecast re-reads the
+# demand rollup window on every call).
+#
+# cd backend && python -m benchmarks.bench_reorder_suggestions [products] [orders]
+
+import random
+import sys
+import time
+
+from flask import Flask
+
+from benchmarks.common import (admin_authorization, insert_medicines, print_section,
+                               temp_database, timed)
+from app.routes.analytics import analytics_bp
+from app.services.order_event_service import backfill_order_events
+from app.utils.dates import format_timestamp
+
+
+def seed(db, products, orders):
+    rng = random.Random(19)
+    now = int(time.time())
+
+    with db.db_connection() as conn:
+        insert_medicines(conn, products)
+        names = [row[0] for row in conn.execute("SELECT name FROM medicines")]
+
+        # Skewed demand: a few products sell most units
+        def rows():
+            for _ in range(orders):
+                ts = now - rng.randrange(90 * 86400)
+                yield (
+                    f"PAT{rng.randrange(20000):05d}",
+                    names[min(int(rng.paretovariate(1.2)) - 1, products - 1)
+                          if rng.random() < 0.5 else rng.randrange(products)],
+                    1 + rng.randrange(3),
+                    format_timestamp(ts),
+                    ts,
+                )
+
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date, purchase_ts,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, ?, ?, ?, 9.99, 'N/A', 'No')
+        """, rows())
+        conn.commit()
+
+    # Imported orders: the backfill logs them and builds the rollups
+    backfill_order_events()
+
+
+def run(products=100000, orders=500000):
+    db = temp_database(profile="balanced")
+
+    started = time.perf_counter()
+    seed(db, products, orders)
+    print_section(f"REORDER SUGGESTIONS ({products} products, {orders} orders)")
+    print(f"seed:                 {time.perf_counter() - started:8.1f} s")
+
+    app = Flask(__name__)
+    app.register_blueprint(analytics_bp)
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = admin_authorization()
+
+    started = time.perf_counter()
+    response = client.get("/admin/reorder-suggestions")
+    cold = (time.perf_counter() - started) * 1000
+    assert response.status_code == 200, response.json
+
+    warm = timed(lambda: client.get("/admin/reorder-suggestions?all=true&limit=1000"), 5)
+
+    print(f"cold request:         {cold:8.1f} ms")
+    print(f"warm request median:  {warm['median_ms']:8.1f} ms")
+    print(f"warm request p95:     {warm['p95_ms']:8.1f} ms")
+    print(f"needing reorder:      {response.json['count']:8d}")
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:3]))
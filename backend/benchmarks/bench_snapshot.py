@@ -0,0 +1,122 @@
+# ============================================================
+# COLUMNAR SNAPSHOT BENCHMARK
+# ============================================================
+# Full snapshot round trip on a synthetic database:
+#   export    stream medicines / customers / orders / prescriptions
+#             into the columnar directory
+#   restore   import it into a fresh database, indexes, created events
+#             and rollups included
+#   analytics revenue per medicine from the memory-mapped columns
+#             (bincount over dictionary codes) vs GROUP BY in SQLite
+# For scale: openpyxl needs ~16 s per 100k order rows just to parse
+# orders.xlsx (bench_excel_ingest).
+#
+# cd backend && python -m benchmarks.bench_snapshot [orders]
+
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import insert_medicines, print_section, temp_database
+from app.utils.dates import format_timestamp
+from app.utils.snapshot import export_snapshot, import_snapshot, open_snapshot
+
+N_MEDICINES = 20000
+N_CUSTOMERS = 50000
+
+
+def seed(db, orders):
+    rng = random.Random(41)
+    now = int(time.time())
+
+    with db.db_connection() as conn:
+        insert_medicines(conn, N_MEDICINES)
+        names = [row[0] for row in conn.execute("SELECT name FROM medicines ORDER BY id")]
+
+        conn.executemany(
+            "INSERT INTO customers (id, age, gender) VALUES (?, ?, ?)",
+            ((f"PAT{i:05d}", rng.randint(18, 90), rng.choice("MF")) for i in range(N_CUSTOMERS))
+        )
+
+        def rows():
+            for _ in range(orders):
+                ts = now - rng.randrange(365 * 86400)
+                yield (
+                    f"PAT{rng.randrange(N_CUSTOMERS):05d}",
+                    names[rng.randrange(N_MEDICINES)],
+                    1 + rng.randrange(3),
+                    format_timestamp(ts),
+                    ts,
+                    round(rng.uniform(2, 80), 2),
+                )
+
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date, purchase_ts,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, ?, ?, ?, ?, '1x daily', 'No')
+        """, rows())
+        conn.commit()
+
+
+def directory_mb(path):
+    return sum(file.stat().st_size for file in Path(path).rglob("*") if file.is_file()) / 1e6
+
+
+def best_ms(func, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return min(samples), result
+
+
+def run(orders=1000000):
+    db = temp_database(profile="balanced")
+    seed(db, orders)
+    db_mb = db.DB_PATH.stat().st_size / 1e6
+
+    workdir = Path(tempfile.mkdtemp(prefix="pharmacy-snapshot-"))
+    path = workdir / "snapshot"
+
+    print_section(f"SNAPSHOT ROUND TRIP ({orders:,} orders)")
+
+    started = time.perf_counter()
+    export_snapshot(path)
+    print(f"  export     {time.perf_counter() - started:7.2f} s   {directory_mb(path):7.1f} MB "
+          f"(database {db_mb:.1f} MB)")
+
+    # Analytics on the source database vs the mapped snapshot
+    def sql_revenue():
+        with db.db_connection(readonly=True) as conn:
+            return dict(conn.execute(
+                "SELECT product_name, SUM(total_price) FROM orders GROUP BY product_name"
+            ).fetchall())
+
+    def mmap_revenue():
+        table = open_snapshot(path).table("orders")
+        revenue = np.bincount(table.array("product_name"), weights=table.array("total_price"))
+        return dict(zip(table.dictionary("product_name"), revenue.tolist()))
+
+    sql_ms, expected = best_ms(sql_revenue)
+    mmap_ms, actual = best_ms(mmap_revenue)
+    assert expected.keys() == actual.keys()
+
+    temp_database(profile="balanced")
+    started = time.perf_counter()
+    import_snapshot(path)
+    print(f"  restore    {time.perf_counter() - started:7.2f} s   (indexes, events, rollups)")
+
+    print(f"  revenue by medicine: SQLite GROUP BY {sql_ms:7.1f} ms, "
+          f"mmap bincount {mmap_ms:7.1f} ms")
+
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:2]))
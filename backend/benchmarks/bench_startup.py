@@ -0,0 +1,134 @@
+# ============================================================
+# WORKER STARTUP BENCHMARK
+# ============================================================
+# Time from "modules imported" to "app ready" for one worker, against
+# a populated database. Each measurement runs in a forked child (the
+# way gunicorn --preload starts workers), so per-process caches and
+# pools start cold:
+#   legacy   what create_app() used to run in every worker: init_db,
+#            the user seed (SELECTs; the password hashes only on a
+#            cold database), the Excel loader's table checks, the
+#            event backfill, the eager medicine index build
+#   fast     create_app() now: schema version check, blueprints, the
+#            index warmed in a background thread
+# Importing the app package is reported separately: it is the same for
+# both and paid once in the master with --preload.
+#
+# cd backend && python -m benchmarks.bench_startup [products] [orders]
+
+import multiprocessing
+import random
+import subprocess
+import sys
+import time
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks.common import BACKEND_DIR, ROOT_DIR, insert_medicines, print_section, temp_database
+from app import create_app
+from app.manage import seed_users
+from app.models import database
+from app.services.fuzzy_match_service import rebuild_medicine_index
+from app.services.order_event_service import backfill_order_events
+from app.utils.dates import format_timestamp
+
+REPEAT = 5
+
+
+def seed(db, products, orders):
+    rng = random.Random(31)
+    now = int(time.time())
+
+    with db.db_connection() as conn:
+        insert_medicines(conn, products)
+        names = [row[0] for row in conn.execute("SELECT name FROM medicines ORDER BY id")]
+
+        def rows():
+            for _ in range(orders):
+                ts = now - rng.randrange(365 * 86400)
+                yield (
+                    f"PAT{rng.randrange(50000):05d}",
+                    names[rng.randrange(len(names))],
+                    1 + rng.randrange(3),
+                    format_timestamp(ts),
+                    ts,
+                )
+
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date, purchase_ts,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, ?, ?, ?, 9.99, 'N/A', 'No')
+        """, rows())
+        conn.commit()
+
+    seed_users()
+    backfill_order_events()
+
+
+def legacy_boot():
+    database.init_db()
+    seed_users()
+    for table in ("medicines", "orders"):
+        with database.db_connection(readonly=True) as conn:
+            conn.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()
+    backfill_order_events()
+    rebuild_medicine_index()
+
+
+def fast_boot():
+    create_app()
+
+
+def _child(boot, results):
+    started = time.perf_counter()
+    boot()
+    results.put((time.perf_counter() - started) * 1000)
+
+
+def forked_ms(boot):
+    context = multiprocessing.get_context("fork")
+    samples = []
+
+    for _ in range(REPEAT):
+        results = context.Queue()
+        child = context.Process(target=_child, args=(boot, results))
+        child.start()
+        samples.append(results.get())
+        child.join()
+
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def import_seconds():
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "import app"],
+        cwd=BACKEND_DIR, env={"PYTHONPATH": ROOT_DIR, "LANGSMITH_TRACING": "false"},
+        check=True, capture_output=True
+    )
+    return time.perf_counter() - started
+
+
+def run(products=20000, orders=500000):
+    db = temp_database(profile="balanced")
+    started = time.perf_counter()
+    seed(db, products, orders)
+    print(f"seeded {products:,} medicines / {orders:,} orders in {time.perf_counter() - started:.1f} s")
+
+    print_section("WORKER STARTUP (median of forked workers)")
+    print(f"  import app package      {import_seconds() * 1000:9.0f} ms  (once per master)")
+
+    started = time.perf_counter()
+    for password in ("admin123", "clerk123"):
+        generate_password_hash(password)
+    hashing = (time.perf_counter() - started) * 1000
+
+    legacy = forked_ms(legacy_boot)
+    print(f"  legacy, warm database   {legacy:9.1f} ms")
+    print(f"  legacy, cold database   {legacy + hashing:9.1f} ms  (+ two password hashes)")
+    print(f"  fast create_app()       {forked_ms(fast_boot):9.1f} ms")
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:3]))
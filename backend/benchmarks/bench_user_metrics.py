@@ -0,0 +1,112 @@
+# ============================================================
+# USER METRICS BENCHMARK: BATCH vs PER-CUSTOMER LOOP
+# ============================================================
+# Dashboard case: metrics for a few hundred customers. Compares
+#   legacy   the original four queries per customer, in a loop
+#   loop     GET /user-metrics/<id> per customer (summary table)
+#   batch    one POST /user-metrics with every id
+#
+# cd backend && python -m benchmarks.bench_user_metrics [customers]
+
+import random
+import sys
+import time
+
+from flask import Flask
+
+from benchmarks.common import insert_medicines, print_section, temp_database
+from app.routes.analytics import analytics_bp
+from app.services.order_event_service import backfill_order_events
+
+N_CUSTOMERS = 5000
+N_ORDERS = 200000
+
+
+def seed(db):
+    rng = random.Random(11)
+
+    with db.db_connection() as conn:
+        insert_medicines(conn, 1000)
+
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, ?, ?, ?, 'N/A', 'No')
+        """, (
+            (f"PAT{rng.randrange(N_CUSTOMERS):05d}", f"Medicine {rng.randrange(1000)}",
+             1 + rng.randrange(3), f"2024-{1 + rng.randrange(12):02d}-{1 + rng.randrange(28):02d} 10:00:00",
+             round(rng.uniform(2, 80), 2))
+            for _ in range(N_ORDERS)
+        ))
+
+        conn.executemany("""
+            INSERT OR IGNORE INTO prescriptions (customer_id, medicine_id, status, expires_at)
+            VALUES (?, ?, 'Approved', '2099-01-01T00:00:00')
+        """, ((f"PAT{rng.randrange(N_CUSTOMERS):05d}", rng.randrange(1000)) for _ in range(20000)))
+        conn.commit()
+
+    backfill_order_events()
+
+
+def legacy_user_metrics(db, customer_id):
+    conn = db.get_db(readonly=True)
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT COUNT(*) FROM orders WHERE customer_id = ?", (customer_id,))
+    total_orders = cursor.fetchone()[0]
+    cursor.execute("SELECT COALESCE(SUM(total_price), 0) FROM orders WHERE customer_id = ?", (customer_id,))
+    total_spent = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT purchase_date FROM orders WHERE customer_id = ?
+        ORDER BY purchase_date DESC LIMIT 1
+    """, (customer_id,))
+    last = cursor.fetchone()
+    cursor.execute("""
+        SELECT COUNT(*) FROM prescriptions
+        WHERE customer_id = ? AND expires_at > datetime('now')
+    """, (customer_id,))
+    active = cursor.fetchone()[0]
+
+    conn.close()
+    return total_orders, total_spent, last, active
+
+
+def run(customers=300):
+    db = temp_database(profile="balanced")
+    seed(db)
+
+    app = Flask(__name__)
+    app.register_blueprint(analytics_bp)
+    client = app.test_client()
+
+    ids = [f"PAT{i:05d}" for i in random.Random(3).sample(range(N_CUSTOMERS), customers)]
+
+    print_section(f"METRICS FOR {customers} CUSTOMERS ({N_ORDERS} orders)")
+
+    started = time.perf_counter()
+    for customer_id in ids:
+        legacy_user_metrics(db, customer_id)
+    legacy = time.perf_counter() - started
+
+    started = time.perf_counter()
+    looped = {}
+    for customer_id in ids:
+        response = client.get(f"/user-metrics/{customer_id}")
+        looped[customer_id] = response.json["data"]
+    loop = time.perf_counter() - started
+
+    started = time.perf_counter()
+    response = client.post("/user-metrics", json={"customer_ids": ids})
+    batch = time.perf_counter() - started
+
+    assert response.json["data"] == looped
+
+    print(f"legacy 4 queries x N: {legacy * 1000:8.1f} ms")
+    print(f"route loop x N:       {loop * 1000:8.1f} ms")
+    print(f"one batched request:  {batch * 1000:8.1f} ms")
+    print(f"speedup vs loop:      {loop / batch:8.1f}x")
+    print(f"speedup vs legacy:    {legacy / batch:8.1f}x")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,97 @@
+# ============================================================
+# SHARED BENCHMARK HELPERS
+# ============================================================
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import jwt
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+for path in (ROOT_DIR, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from app.models import database
+from app.utils.auth_utils import SECRET_KEY
+
+WORDS = [
+    "Paracetamol", "Ibuprofen", "Ramipril", "Minoxidil", "Cetirizin",
+    "Omeprazol", "Pantoprazol", "Diclofenac", "Metformin", "Amlodipin",
+    "Simvastatin", "Bisoprolol", "Loratadin", "Aciclovir", "Panthenol",
+    "Vitamin", "Magnesium", "Zink", "Nasenspray", "Augentropfen",
+]
+FORMS = ["Tabletten", "Kapseln", "Tropfen", "Salbe", "Spray", "Gel", "Sirup"]
+
+
+def print_section(title):
+    print("\n" + "=" * 60)
+    print(title)
+    print("=" * 60)
+
+
+def temp_database(profile="fast"):
+    path = Path(tempfile.mkdtemp(prefix="pharmacy-bench-")) / "pharmacy.db"
+    database.configure_pool(path, profile=profile)
+    database.init_db()
+    return database
+
+
+def admin_authorization():
+    # Authorization header value for @require_role("admin") routes
+    token = jwt.encode({
+        "user_id": 1,
+        "role": "admin",
+        "exp": datetime.utcnow() + timedelta(hours=1)
+    }, SECRET_KEY, algorithm="HS256")
+    return f"Bearer {token}"
+
+
+def synthetic_medicines(count, seed=7):
+    rng = random.Random(seed)
+
+    for i in range(1, count + 1):
+        name = f"{rng.choice(WORDS)} {rng.choice(WORDS).lower()} {rng.randint(1, 1000)} mg {rng.choice(FORMS)}"
+        yield (
+            i,
+            name,
+            f"{10000000 + i}",
+            round(rng.uniform(1, 80), 2),
+            f"{rng.choice([10, 20, 50, 100])} St",
+            f"{rng.choice(WORDS)} {rng.choice(FORMS)} zur Anwendung",
+            rng.randint(0, 200),
+            "Yes" if i % 20 == 0 else "No",
+        )
+
+
+def insert_medicines(conn, count):
+    conn.executemany("""
+        INSERT INTO medicines
+        (product_id, name, pzn, price, package_size, description, stock, prescription_required)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, synthetic_medicines(count))
+    conn.commit()
+
+
+def timed(func, repeat):
+    samples = []
+    result = None
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    samples.sort()
+    return {
+        "median_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "result": result,
+    }
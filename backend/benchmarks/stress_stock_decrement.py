@@ -0,0 +1,106 @@
+# ============================================================
+# MULTI-PROCESS STOCK STRESS TEST
+# ============================================================
+# Several worker processes (like gunicorn workers) order one unit of
+# the same medicine in a tight loop until it sells out. Stock must end
+# at exactly zero, never below, with one order row per unit sold.
+#
+# cd backend && python -m benchmarks.stress_stock_decrement [workers] [stock]
+
+import multiprocessing
+import sys
+import time
+
+from benchmarks.common import print_section, temp_database
+from app.models import database
+from app.services.order_service import create_order
+
+MEDICINE_ID = 1
+
+
+def _worker(db_path, start, results):
+    database.configure_pool(db_path)
+
+    sold = rejected = failed = 0
+    start.wait()
+
+    while True:
+        body, status = create_order(f"PAT{multiprocessing.current_process().pid}", MEDICINE_ID, 1)
+
+        if status == 201:
+            sold += 1
+        elif body.get("code") == "insufficient_stock":
+            rejected += 1
+            break
+        else:
+            failed += 1
+            if failed > 100:
+                break
+
+    results.put((sold, rejected, failed))
+
+
+def run_stress(workers=8, initial_stock=2000):
+    db = temp_database(profile="balanced")
+
+    with db.db_connection() as conn:
+        conn.execute("""
+            INSERT INTO medicines (id, product_id, name, price, stock, prescription_required)
+            VALUES (?, 1, 'Paracetamol 500 mg', 2.0, ?, 'No')
+        """, (MEDICINE_ID, initial_stock))
+        conn.commit()
+
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+
+    start = ctx.Event()
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=_worker, args=(str(db.DB_PATH), start, results))
+        for _ in range(workers)
+    ]
+
+    for process in processes:
+        process.start()
+
+    started = time.perf_counter()
+    start.set()
+
+    outcomes = [results.get(timeout=300) for _ in processes]
+    elapsed = time.perf_counter() - started
+
+    for process in processes:
+        process.join()
+
+    with db.db_connection(readonly=True) as conn:
+        final_stock = conn.execute(
+            "SELECT stock FROM medicines WHERE id = ?", (MEDICINE_ID,)
+        ).fetchone()[0]
+        order_rows = conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    sold = sum(outcome[0] for outcome in outcomes)
+
+    return {
+        "workers": workers,
+        "initial_stock": initial_stock,
+        "final_stock": final_stock,
+        "sold": sold,
+        "order_rows": order_rows,
+        "failed": sum(outcome[2] for outcome in outcomes),
+        "elapsed_s": round(elapsed, 3),
+        "orders_per_s": round(sold / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    stock = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    print_section(f"{workers} PROCESSES RACING FOR {stock} UNITS")
+    report = run_stress(workers, stock)
+
+    for key, value in report.items():
+        print(f"{key:<14} {value}")
+
+    assert report["final_stock"] == 0
+    assert report["sold"] == report["order_rows"] == stock
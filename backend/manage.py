@@ -0,0 +1,10 @@
+import sys
+import os
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+from app.manage import main
+
+if __name__ == "__main__":
+    main()
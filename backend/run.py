@@ -6,7 +6,13 @@ sys.path.insert(0, ROOT_DIR)
 
 from app import create_app
 
+if __name__ == "__main__":
+    # Dev server: migrate, seed and import in-process first
+    # (deployments run `python manage.py setup` once instead)
+    from app.manage import setup
+    setup()
+
 app = create_app()
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
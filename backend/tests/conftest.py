@@ -0,0 +1,114 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+from flask import Flask
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+for path in (ROOT_DIR, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from app.models import database
+from app.routes.inventory import response_cache
+from app.services.catalog_cache import catalog_cache
+from app.utils.auth_utils import SECRET_KEY
+
+# (id, product_id, name, price, stock, prescription_required)
+CATALOG = [
+    (1, 1, "Paracetamol 500 mg", 2.0, 10, "No"),
+    (2, 2, "Ibuprofen 400 mg", 3.0, 4, "No"),
+    (3, 3, "Ramipril 5 mg", 9.0, 50, "Yes"),
+]
+
+# Mounted like create_app() does
+URL_PREFIXES = {"inventory": "/inventory"}
+
+
+# -------------------------------------------------
+# FRESH DATABASE PER TEST
+# -------------------------------------------------
+
+@pytest.fixture
+def db(tmp_path):
+    database.configure_pool(tmp_path / "pharmacy.db")
+    database.init_db()
+
+    yield database
+
+    database.configure_pool(database.BASE_DIR / "data" / "pharmacy.db")
+
+
+# -------------------------------------------------
+# SEEDED CATALOG
+# -------------------------------------------------
+
+def seed_medicines(db, rows):
+    with db.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO medicines (id, product_id, name, price, stock, prescription_required)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+
+
+@pytest.fixture
+def medicines():
+    """Rows `catalog` seeds; a test module overrides this for its own."""
+    return CATALOG
+
+
+@pytest.fixture
+def catalog(db, medicines):
+    seed_medicines(db, medicines)
+    catalog_cache.invalidate()
+    return db
+
+
+# -------------------------------------------------
+# APP CLIENT: just the blueprints under test
+# -------------------------------------------------
+
+@pytest.fixture
+def make_client():
+    def make(*blueprints, headers=None):
+        app = Flask(__name__)
+        for blueprint in blueprints:
+            app.register_blueprint(blueprint, url_prefix=URL_PREFIXES.get(blueprint.name))
+
+        # Cached responses belong to the previous test's database
+        response_cache.clear()
+
+        client = app.test_client()
+        for name, value in (headers or {}).items():
+            client.environ_base["HTTP_" + name.upper().replace("-", "_")] = value
+        return client
+
+    return make
+
+
+# -------------------------------------------------
+# AUTH: headers for @require_role routes
+# -------------------------------------------------
+
+def auth_headers(role):
+    token = jwt.encode({
+        "user_id": 1,
+        "role": role,
+        "exp": datetime.utcnow() + timedelta(hours=1)
+    }, SECRET_KEY, algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def admin_headers():
+    return auth_headers("admin")
+
+
+@pytest.fixture
+def user_headers():
+    return auth_headers("user")
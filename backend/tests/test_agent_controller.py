@@ -0,0 +1,98 @@
+# ============================================================
+# AGENT CONTROLLER: FUZZY NAME CORRECTIONS, IDEMPOTENT WRITES
+# ============================================================
+
+import pytest
+from langsmith import tracing_context
+
+from agents.core import agent_runner, controller
+from agents.models.schemas import StructuredRequest
+
+NOT_FOUND = {
+    "status": "error",
+    "code": "not_found",
+    "message": "Medicine not found",
+    "suggestions": [
+        {"medicine_id": 7, "name": "Paracetamol 500 mg", "price": 2.0, "stock": 10,
+         "available": True, "prescription_required": "No", "score": 0.71},
+    ]
+}
+
+
+@pytest.fixture(autouse=True)
+def no_tracing():
+    # handle_intent is @traceable; keep test runs out of LangSmith
+    with tracing_context(enabled=False):
+        yield
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    calls = []
+
+    def record(name, result):
+        def tool(*args, **kwargs):
+            calls.append((name, args, kwargs))
+            return result
+        monkeypatch.setattr(controller, name, tool)
+
+    record("check_inventory", NOT_FOUND)
+    record("reserve_stock", {"status": "success", "data": {"hold_id": "h1"}})
+    record("confirm_reservation", {"status": "success", "data": {"order_id": 1}})
+    record("verify_prescription", {"status": "verified"})
+    record("cancel_order", {"status": "success"})
+    return calls
+
+
+def test_stock_check_accepts_the_corrected_name(tools):
+    result = controller.handle_intent(StructuredRequest(intent="inventory", medicine_name="paracetmol"))
+
+    assert result["status"] == "success"
+    assert result["corrected_from"] == "paracetmol"
+    assert result["data"][0]["name"] == "Paracetamol 500 mg"
+
+
+@pytest.mark.parametrize("intent", ["order", "upload_prescription"])
+def test_actions_ask_before_using_a_corrected_name(tools, intent):
+    result = controller.handle_intent(
+        StructuredRequest(intent=intent, medicine_name="paracetmol", quantity=1)
+    )
+
+    assert result["code"] == "confirm_medicine"
+    assert "Paracetamol 500 mg" in result["message"]
+    assert [name for name, *_ in tools] == ["check_inventory"]
+
+
+def test_writes_are_keyed_by_the_message(tools, monkeypatch):
+    monkeypatch.setattr(controller, "check_inventory", lambda medicine: {
+        "status": "success", "data": NOT_FOUND["suggestions"]
+    })
+    order = StructuredRequest(intent="order", medicine_name="Paracetamol 500 mg", quantity=1)
+
+    for message_id in ("msg-1", "msg-1", "msg-2", None):
+        controller.handle_intent(order, message_id=message_id)
+    controller.handle_intent(StructuredRequest(intent="cancel"), "cancel order 5", "msg-1")
+
+    keys = [kwargs["idempotency_key"] for name, _, kwargs in tools if name == "reserve_stock"]
+    # A redelivered message reuses its key; another message gets its own
+    assert keys[0] == keys[1] != keys[2]
+    assert keys[3] is None
+
+    cancel = [args for name, args, _ in tools if name == "cancel_order"]
+    assert cancel == [(5, controller.idempotency_key("msg-1", "cancel"))]
+    assert cancel[0][1] != keys[0]
+
+
+def test_agent_run_extracts_and_handles_each_message_once(monkeypatch):
+    extracted, handled = [], []
+    monkeypatch.setattr(agent_runner, "extract_structured_request",
+                        lambda text: extracted.append(text) or StructuredRequest(intent="smalltalk"))
+    monkeypatch.setattr(agent_runner, "handle_intent",
+                        lambda request, text, message_id: handled.append(message_id)
+                        or {"status": "smalltalk"})
+
+    result = agent_runner.run_agent("hello", "msg-1")
+
+    assert result["status"] == "success"
+    assert extracted == ["hello"]
+    assert handled == ["msg-1"]
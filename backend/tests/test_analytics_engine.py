@@ -0,0 +1,140 @@
+# ============================================================
+# COLUMNAR ANALYTICS ENGINE
+# ============================================================
+
+import numpy as np
+import pytest
+
+from app.routes.analytics import analytics_bp
+from app.services import analytics_service, order_event_service, order_service
+from app.services.analytics_engine import OrderAnalyticsEngine, OrderColumns
+
+IMPORTED = [
+    ("PAT001", "Paracetamol 500 mg", 1, "2024-01-05 10:00:00", 2.0),
+    ("PAT001", "Ibuprofen 400 mg", 2, "2024-01-29 10:00:00", 6.0),
+    ("PAT002", "Ibuprofen 400 mg", 3, "2024-02-01 10:00:00", 9.0),
+    ("PAT003", "Paracetamol 500 mg", 12, "2024-02-14 10:00:00", 24.0),
+    ("PAT003", "Ramipril 5 mg", 1, "not a date", 9.0),
+]
+
+
+@pytest.fixture
+def client(catalog, make_client, admin_headers):
+    with catalog.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, ?, ?, ?, 'N/A', 'No')
+        """, IMPORTED)
+        conn.commit()
+
+    order_event_service.backfill_order_events()
+
+    # Every /admin/analytics/* route is admin-only
+    return make_client(analytics_bp, headers=admin_headers)
+
+
+def test_monthly_revenue_matches_rollups(client, db):
+    order_service.create_order("PAT001", 1, 2)
+
+    engine = client.get("/admin/analytics/revenue").json["data"]
+    rollup = analytics_service.get_admin_revenue()[0]["data"]
+
+    # The rollup also books the undated order under its raw prefix
+    dated = [row for row in rollup if row["month"][:4].isdigit()]
+    assert [(row["period"], row["revenue"]) for row in engine] == [
+        (row["month"], row["revenue"]) for row in dated
+    ]
+
+
+def test_weekly_and_daily_buckets(client):
+    weeks = client.get("/admin/analytics/revenue?period=week&end=2024-02-01").json["data"]
+    assert [(row["period"], row["revenue"]) for row in weeks] == [
+        ("2024-01-01", 2.0),
+        ("2024-01-29", 15.0),
+    ]
+
+    days = client.get("/admin/analytics/revenue?period=day&start=2024-02-01").json["data"]
+    assert [row["period"] for row in days] == ["2024-02-01", "2024-02-14"]
+
+    assert client.get("/admin/analytics/revenue?period=year").status_code == 400
+    assert client.get("/admin/analytics/revenue?start=yesterday").status_code == 400
+
+
+def test_top_medicines_and_customers(client):
+    top = client.get("/admin/analytics/top-medicines?limit=2").json["data"]
+    assert top == [
+        {"name": "Paracetamol 500 mg", "orders": 2, "quantity": 13, "revenue": 26.0},
+        {"name": "Ibuprofen 400 mg", "orders": 2, "quantity": 5, "revenue": 15.0},
+    ]
+
+    by_orders = client.get("/admin/analytics/customers?by=orders&limit=1").json["data"]
+    assert by_orders[0]["orders"] == 2
+
+    spenders = client.get("/admin/analytics/customers").json["data"]
+    assert [row["name"] for row in spenders] == ["PAT003", "PAT002", "PAT001"]
+
+    assert client.get("/admin/analytics/customers?by=age").status_code == 400
+    assert client.get("/admin/analytics/customers?limit=0").status_code == 400
+
+
+def test_reversals_cancel_out(client, db):
+    order_id = order_service.create_order("PAT004", 2, 4)[0]["data"]["order_id"]
+    before = client.get("/admin/analytics/quantity-histogram?max_quantity=5").json["data"]
+    assert {"quantity": "4", "orders": 1} in before
+
+    order_service.cancel_order(order_id)
+
+    histogram = client.get("/admin/analytics/quantity-histogram?max_quantity=5").json["data"]
+    assert histogram == [
+        {"quantity": "1", "orders": 2},
+        {"quantity": "2", "orders": 1},
+        {"quantity": "3", "orders": 1},
+        {"quantity": "4", "orders": 0},
+        {"quantity": "5+", "orders": 1},
+    ]
+
+    customers = [row["name"] for row in client.get("/admin/analytics/customers").json["data"]]
+    assert "PAT004" not in customers
+
+
+def test_incremental_refresh(client, db):
+    engine = OrderAnalyticsEngine()
+
+    assert engine.refresh() == len(IMPORTED)
+    assert engine.refresh() == 0
+
+    order_service.create_order("PAT001", 1, 1)
+    order_service.create_order("PAT002", 2, 1)
+
+    assert engine.refresh() == 2
+    summary = engine.summary()
+    assert summary["orders"] == len(IMPORTED) + 2
+    assert summary["revenue"] == 55.0
+    assert summary["last_seq"] == len(IMPORTED) + 2
+
+
+def test_summary_route(client):
+    summary = client.get("/admin/analytics/summary").json["data"]
+    assert summary["customers"] == 3
+    assert summary["medicines"] == 3
+
+
+@pytest.mark.parametrize("path", [
+    "revenue", "top-medicines", "customers", "quantity-histogram", "summary"
+])
+def test_routes_require_admin(client, path):
+    del client.environ_base["HTTP_AUTHORIZATION"]
+    assert client.get(f"/admin/analytics/{path}").status_code == 401
+
+
+def test_columns_grow():
+    columns = OrderColumns(capacity=2)
+
+    for start in range(0, 10, 3):
+        batch = np.arange(start, start + 3)
+        columns.append({"day": batch, "amount": batch * 1.5})
+
+    assert len(columns) == 12
+    assert columns.capacity >= 12
+    assert columns["day"].tolist() == list(range(12))
@@ -0,0 +1,95 @@
+# ============================================================
+# MULTI-LINE CART ORDERS
+# ============================================================
+
+import pytest
+
+from app.routes.order import order_bp
+
+
+@pytest.fixture
+def client(catalog, make_client):
+    return make_client(order_bp)
+
+
+def stock(db):
+    with db.db_connection(readonly=True) as conn:
+        return dict(conn.execute("SELECT id, stock FROM medicines").fetchall())
+
+
+def order_count(db):
+    with db.db_connection(readonly=True) as conn:
+        return conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+
+def test_cart_creates_every_line_in_one_go(client, db):
+    response = client.post("/create-order", json={
+        "customer_id": "PAT001",
+        "items": [
+            {"medicine_id": 1, "quantity": 2},
+            {"medicine_id": 2, "quantity": 1},
+            {"medicine_id": 1, "quantity": 3},
+        ]
+    })
+
+    assert response.status_code == 201
+    data = response.json["data"]
+    assert [line["status"] for line in data["lines"]] == ["created"] * 3
+    assert len(set(data["order_ids"])) == 3
+    assert data["total_price"] == 13.0
+    assert stock(db) == {1: 5, 2: 3, 3: 50}
+
+
+def test_rejected_line_rejects_whole_cart(client, db):
+    response = client.post("/create-order", json={
+        "customer_id": "PAT001",
+        "items": [
+            {"medicine_id": 1, "quantity": 1},
+            {"medicine_id": 2, "quantity": 3},
+            {"medicine_id": 2, "quantity": 3},
+            {"medicine_id": 3, "quantity": 1},
+            {"medicine_id": 99, "quantity": 1},
+        ]
+    })
+
+    assert response.status_code == 400
+    lines = response.json["lines"]
+    assert [line["status"] for line in lines] == ["ok", "error", "error", "error", "error"]
+    assert lines[1]["code"] == "insufficient_stock"
+    assert lines[3]["code"] == "prescription_required"
+    assert lines[4]["code"] == "not_found"
+
+    assert stock(db) == {1: 10, 2: 4, 3: 50}
+    assert order_count(db) == 0
+
+
+def test_verified_prescription_allows_line(client, db):
+    with db.db_connection() as conn:
+        conn.execute("""
+            INSERT INTO prescriptions (customer_id, medicine_id, status, expires_at)
+            VALUES ('PAT001', 3, 'Approved', '2099-01-01T00:00:00')
+        """)
+        conn.commit()
+
+    response = client.post("/create-order", json={
+        "customer_id": "PAT001",
+        "items": [{"medicine_id": 3, "quantity": 2}]
+    })
+
+    assert response.status_code == 201
+    assert stock(db)[3] == 48
+
+
+@pytest.mark.parametrize("items", [[], "1,2", [{"medicine_id": "x"}], [{"medicine_id": 1, "quantity": 0}]])
+def test_invalid_carts_rejected(client, items):
+    response = client.post("/create-order", json={"customer_id": "PAT001", "items": items})
+    assert response.status_code == 400
+
+
+def test_single_line_payload_still_supported(client, db):
+    response = client.post("/create-order", json={
+        "customer_id": "PAT001", "medicine_id": 1, "quantity": 1
+    })
+
+    assert response.status_code == 201
+    assert response.json["data"]["order_id"]
@@ -0,0 +1,114 @@
+# ============================================================
+# READ-THROUGH CATALOG CACHE
+# ============================================================
+
+import pytest
+
+from app.services import inventory_service, order_service
+from app.services.catalog_cache import STOCK, catalog_cache
+
+
+@pytest.fixture
+def medicines():
+    return [
+        (1, 1, "Paracetamol 500 mg", 2.0, 10, "No"),
+        (2, 2, "Ibuprofen 400 mg", 3.0, 5, "No"),
+    ]
+
+
+def stock_of(name):
+    body, status = inventory_service.get_all_medicines()
+    assert status == 200
+    return {row["name"]: row["stock"] for row in body["data"]}[name]
+
+
+def counters():
+    stats = catalog_cache.stats()
+    return stats["hits"], stats["misses"], stats["patches"]
+
+
+def test_repeated_reads_hit_cache(catalog):
+    inventory_service.get_all_medicines()
+    hits, misses, _ = counters()
+
+    inventory_service.get_all_medicines()
+    inventory_service.search_medicines("para")
+    inventory_service.check_inventory("ibuprofen")
+
+    assert counters()[:2] == (hits + 3, misses)
+
+
+def test_order_and_cancel_patch_cache(catalog):
+    assert stock_of("Paracetamol 500 mg") == 10
+    _, misses, patches = counters()
+
+    body, status = order_service.create_order("PAT001", 1, 3)
+    assert status == 201
+    assert stock_of("Paracetamol 500 mg") == 7
+
+    order_service.cancel_order(body["data"]["order_id"])
+    assert stock_of("Paracetamol 500 mg") == 10
+
+    _, new_misses, new_patches = counters()
+    assert new_misses == misses
+    assert new_patches == patches + 2
+
+
+def test_patch_leaves_held_snapshot_untouched(catalog):
+    with catalog.db_connection(readonly=True) as conn:
+        held = catalog_cache.snapshot(conn.cursor())
+    rows = list(held.iter_rows())
+    version = held.version
+
+    order_service.create_order("PAT001", 1, 3)
+
+    assert list(held.iter_rows()) == rows
+    assert held.version == version
+    assert held.get(1)[STOCK] == 10
+    assert stock_of("Paracetamol 500 mg") == 7
+
+
+def test_update_stock_patches_cache(catalog):
+    stock_of("Ibuprofen 400 mg")
+    inventory_service.update_stock("ibuprofen", 20)
+
+    assert stock_of("Ibuprofen 400 mg") == 25
+
+
+def test_external_write_reloads_cache(catalog):
+    assert stock_of("Ibuprofen 400 mg") == 5
+    _, misses, _ = counters()
+
+    # Another worker process writing directly to the database
+    with catalog.db_connection() as conn:
+        conn.execute("UPDATE medicines SET stock = 99 WHERE product_id = 2")
+        conn.commit()
+
+    assert stock_of("Ibuprofen 400 mg") == 99
+    assert counters()[1] == misses + 1
+
+
+def test_interleaved_write_evicts_instead_of_patching(catalog):
+    stock_of("Paracetamol 500 mg")
+    patch = None
+
+    with catalog.db_connection() as conn:
+        conn.execute("UPDATE medicines SET stock = 1 WHERE product_id = 2")
+        conn.execute("UPDATE medicines SET stock = 2 WHERE product_id = 1")
+        patch = catalog_cache.capture_patch(conn.cursor(), [1], 1)
+        conn.commit()
+
+    evictions = catalog_cache.stats()["evictions"]
+    catalog_cache.apply_patch(patch)
+
+    assert catalog_cache.stats()["evictions"] == evictions + 1
+    assert stock_of("Ibuprofen 400 mg") == 1
+
+
+def test_rows_are_compact_tuples(catalog):
+    with catalog.db_connection(readonly=True) as conn:
+        snapshot = catalog_cache.snapshot(conn.cursor())
+
+    row = snapshot.get(1)
+    assert isinstance(row, tuple)
+    assert row[STOCK] == 10
@@ -0,0 +1,261 @@
+# ============================================================
+# STREAMING EXCEL INGESTION
+# ============================================================
+
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook
+
+from app.services.order_event_service import ROLLUPS, rebuild_order_projections
+from app.utils import excel_loader
+
+PRODUCT_HEADER = ("product id", "product name", "pzn", "price rec", "package size", "descriptions")
+ORDER_HEADER = ("Patient ID", "Age", "Gender", "Purchase Date", "Product Name",
+                "Quantity", "Total Price", "Dosage Frequency", "Prescription Required")
+
+
+def write_sheet(path, rows):
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet()
+    for row in rows:
+        sheet.append(row)
+    wb.save(path)
+    return path
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(excel_loader, "CHUNK_ROWS", 3)
+    monkeypatch.setattr(excel_loader, "COMMIT_ROWS", 5)
+
+
+def query(db, sql):
+    with db.db_connection(readonly=True) as conn:
+        return [tuple(row) for row in conn.execute(sql)]
+
+
+def test_orders_stream_in_chunks(db, tmp_path, small_chunks):
+    rows = [ORDER_HEADER, ("Consumer Order History",) + (None,) * 8]
+    rows += [
+        (f"PAT{i % 4:03d}", 30 + i % 4, "F", datetime(2024, 1, 1 + i, 9, 30),
+         "Ramipril 5 mg", 1 + i % 2, 9.5, "1x daily", "Yes")
+        for i in range(11)
+    ]
+    rows += [
+        ("PAT900", 40, "M", "05.02.2024", "Zink 10 mg", 1, 4.0, "N/A", "No"),
+        ("PAT901", 41, "M", "2024-02-06", "Zink 10 mg", "many", 4.0, "N/A", "No"),  # bad quantity
+        (None,) * 9,
+    ]
+    path = write_sheet(tmp_path / "orders.xlsx", rows)
+
+    report = excel_loader.load_orders(path, quiet=True)
+
+    assert report["read"] == len(rows) - 1
+    assert report["inserted"] == 12
+    assert report["skipped"] == len(rows) - 1 - 12
+
+    assert query(db, "SELECT COUNT(*), COUNT(DISTINCT customer_id) FROM orders") == [(12, 5)]
+    assert query(db, "SELECT COUNT(*) FROM customers") == [(5,)]
+    assert query(db, "SELECT purchase_date, purchase_ts FROM orders WHERE customer_id = 'PAT900'") == [
+        ("2024-02-05 00:00:00", 1707091200)
+    ]
+
+    # Indexes dropped for the load are back
+    names = {name for (name,) in query(db, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert set(db.MANAGED_INDEXES) <= names
+
+    # Same file again: the fingerprint matches and nothing is parsed
+    again = excel_loader.load_orders(path, quiet=True)
+    assert (again["status"], again["read"], again["inserted"]) == ("unchanged", 0, 0)
+    assert query(db, "SELECT COUNT(*) FROM orders") == [(12,)]
+
+
+def test_products_stream(db, tmp_path, small_chunks):
+    path = write_sheet(tmp_path / "products.xlsx", [
+        PRODUCT_HEADER,
+        *[(1000 + i, f"Ramipril {i} mg" if i == 3 else f"Vitamin {i}", f"{i:08d}", "12,50" if i == 4 else 3.5,
+           "20 St", "Tabletten") for i in range(7)],
+        (1000, "Duplicate id", None, 1.0, None, None),
+        (None, "No id", None, 1.0, None, None),
+    ])
+
+    report = excel_loader.load_products(path, quiet=True)
+
+    assert (report["read"], report["inserted"]) == (9, 7)
+    assert query(db, "SELECT prescription_required, COUNT(*) FROM medicines GROUP BY 1") == [
+        ("No", 6), ("Yes", 1)
+    ]
+    assert query(db, "SELECT price FROM medicines WHERE product_id = 1004") == [(0.0,)]
+
+
+def test_missing_file(db, tmp_path):
+    assert excel_loader.load_orders(tmp_path / "nope.xlsx") is None
+
+
+# -------------------------------------------------
+# INCREMENTAL RE-IMPORT
+# -------------------------------------------------
+
+def product(i, price=3.5):
+    return (1000 + i, f"Vitamin {i}", f"{i:08d}", price, "20 St", "Tabletten")
+
+
+def rollups(db):
+    return {table: query(db, f"SELECT * FROM {table} ORDER BY 1, 2") for table, _, _ in ROLLUPS}
+
+
+def test_products_reimport_writes_only_the_delta(db, tmp_path):
+    excel_loader.load_products(write_sheet(tmp_path / "v1.xlsx", [
+        PRODUCT_HEADER, *[product(i) for i in range(5)]
+    ]), quiet=True)
+
+    # Stock is live data, not part of the sheet
+    with db.db_connection() as conn:
+        conn.execute("UPDATE medicines SET stock = 7 WHERE product_id = 1001")
+        conn.commit()
+
+    report = excel_loader.load_products(write_sheet(tmp_path / "v2.xlsx", [
+        PRODUCT_HEADER,
+        product(0), product(1, price=4.25), product(2), product(3),  # 1004 dropped
+        product(5),
+    ]), quiet=True)
+
+    assert report["status"] == "applied"
+    assert (report["inserted"], report["updated"], report["unchanged"], report["missing"]) == (1, 1, 3, 1)
+
+    assert query(db, "SELECT price, stock FROM medicines WHERE product_id = 1001") == [(4.25, 7)]
+    assert query(db, "SELECT COUNT(*) FROM medicines") == [(6,)]
+    assert query(db, "SELECT source, status, rows_read, inserted, updated FROM import_manifests") == [
+        ("medicines", "applied", 5, 5, 0),
+        ("medicines", "applied", 5, 1, 1),
+    ]
+
+
+def test_orders_reimport_appends_new_rows_and_events(db, tmp_path):
+    rows = [
+        ("PAT001", 30, "F", datetime(2024, 1, 1), "Ramipril 5 mg", 1, 9.5, "1x daily", "Yes"),
+        ("PAT001", 30, "F", datetime(2024, 1, 1), "Ramipril 5 mg", 1, 9.5, "1x daily", "Yes"),
+        ("PAT002", 41, "M", datetime(2024, 1, 2), "Zink 10 mg", 2, 8.0, "N/A", "No"),
+    ]
+    excel_loader.load_orders(write_sheet(tmp_path / "v1.xlsx", [ORDER_HEADER, *rows]), quiet=True)
+
+    rows += [
+        # A third identical row is a third order
+        ("PAT001", 30, "F", datetime(2024, 1, 1), "Ramipril 5 mg", 1, 9.5, "1x daily", "Yes"),
+        ("PAT003", 52, "F", datetime(2024, 1, 3), "Zink 10 mg", 1, 4.0, "N/A", "No"),
+    ]
+    report = excel_loader.load_orders(write_sheet(tmp_path / "v2.xlsx", [ORDER_HEADER, *rows]), quiet=True)
+
+    assert (report["inserted"], report["unchanged"], report["missing"]) == (2, 3, 0)
+    assert query(db, "SELECT COUNT(*) FROM orders") == [(5,)]
+    assert query(db, "SELECT COUNT(*) FROM order_events WHERE event_type = 'created'") == [(5,)]
+    assert query(db, "SELECT COUNT(*) FROM customers") == [(3,)]
+
+    # New events were folded in incrementally: same as a full rebuild
+    folded = rollups(db)
+    rebuild_order_projections()
+    assert rollups(db) == folded
+    assert query(db, "SELECT order_count, revenue FROM customer_order_totals WHERE customer_id = 'PAT001'") == [
+        (3, 28.5)
+    ]
+
+
+def test_reimport_adopts_rows_loaded_before_manifests(db, tmp_path):
+    with db.db_connection() as conn:
+        conn.execute("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date, purchase_ts,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES ('PAT001', 'Zink 10 mg', 2, '2024-01-02 00:00:00', 1704153600, 8.0, 'N/A', 'No')
+        """)
+        conn.commit()
+
+    report = excel_loader.load_orders(write_sheet(tmp_path / "orders.xlsx", [
+        ORDER_HEADER,
+        ("PAT001", 41, "M", datetime(2024, 1, 2), "Zink 10 mg", 2, 8.0, "N/A", "No"),
+        ("PAT001", 41, "M", datetime(2024, 1, 5), "Zink 10 mg", 1, 4.0, "N/A", "No"),
+    ]), quiet=True)
+
+    assert (report["inserted"], report["unchanged"]) == (1, 1)
+    assert query(db, "SELECT COUNT(*) FROM orders") == [(2,)]
+
+
+# -------------------------------------------------
+# MULTI-FILE, PARALLEL INGESTION
+# -------------------------------------------------
+
+def order(i, patient="PAT001"):
+    return (patient, 30, "F", datetime(2024, 1, 1 + i % 28), f"Vitamin {i % 3}", 1 + i % 2, 3.5, "N/A", "No")
+
+
+def supplier_sheets(directory):
+    directory.mkdir()
+    for n in range(3):
+        write_sheet(directory / f"supplier-{n}.xlsx",
+                    [ORDER_HEADER, *[order(i, f"PAT{n}{i % 4}") for i in range(10 * n, 10 * n + 7)]])
+    # The same rows as supplier-0: repeated rows are orders too
+    write_sheet(directory / "supplier-3.xlsx",
+                [ORDER_HEADER, *[order(i, f"PAT0{i % 4}") for i in range(7)]])
+    (directory / "broken.xlsx").write_bytes(b"not a workbook")
+    write_sheet(directory / "catalog.xlsx", [PRODUCT_HEADER, product(1), product(2)])
+    return directory
+
+
+def test_directory_parsed_by_workers_with_per_file_reports(db, tmp_path, small_chunks):
+    sheets = supplier_sheets(tmp_path / "suppliers")
+
+    report = excel_loader.load_orders(sheets, quiet=True, workers=2)
+
+    assert (report["status"], report["workers"], report["inserted"]) == ("applied", 2, 28)
+    files = {entry["file"]: entry for entry in report["files"]}
+    assert [entry["file"] for entry in report["files"]] == sorted(files)
+    assert files["supplier-1.xlsx"]["inserted"] == 7
+    assert files["broken.xlsx"]["status"] == "failed"
+    assert "BadZipFile" in files["broken.xlsx"]["error"]
+    assert files["catalog.xlsx"]["status"] == "failed"
+    assert "layout" in files["catalog.xlsx"]["error"]
+
+    # Single writer, deterministic order: file by file, line by line
+    stored = query(db, "SELECT customer_id, purchase_date FROM orders ORDER BY id")
+    assert stored[:7] == [(f"PAT0{i % 4}", f"2024-01-0{1 + i} 00:00:00") for i in range(7)]
+    assert query(db, "SELECT COUNT(*) FROM order_events") == [(28,)]
+    assert query(db, "SELECT COUNT(*) FROM import_manifests") == [(4,)]
+
+    # The failed files have no manifest, so the next run retries them
+    again = excel_loader.load_orders(sheets, quiet=True, workers=2)
+    assert (again["status"], again["inserted"], again["unchanged"]) == ("applied", 0, 28)
+
+    (sheets / "broken.xlsx").unlink()
+    (sheets / "catalog.xlsx").unlink()
+    assert excel_loader.load_orders(sheets, quiet=True, workers=2)["status"] == "unchanged"
+
+
+def test_worker_count_does_not_change_the_result(db, tmp_path):
+    sheets = supplier_sheets(tmp_path / "suppliers")
+    results = []
+
+    for workers in (1, 3):
+        db.configure_pool(tmp_path / f"workers-{workers}.db")
+        db.init_db()
+        excel_loader.load_orders(str(sheets / "supplier-*.xlsx"), quiet=True, workers=workers)
+        results.append((
+            query(db, "SELECT * FROM orders ORDER BY id"),
+            query(db, "SELECT source, row_key, row_hash FROM import_rows ORDER BY row_key"),
+        ))
+
+    assert results[0] == results[1]
+    assert len(results[0][0]) == 28
+
+
+def test_first_listing_of_a_product_wins(db, tmp_path):
+    directory = tmp_path / "catalogs"
+    directory.mkdir()
+    write_sheet(directory / "a.xlsx", [PRODUCT_HEADER, product(1), product(2)])
+    write_sheet(directory / "b.xlsx", [PRODUCT_HEADER, product(2, price=9.0), product(3)])
+
+    report = excel_loader.load_products(directory, quiet=True, workers=2)
+
+    assert [(entry["file"], entry["inserted"]) for entry in report["files"]] == [("a.xlsx", 2), ("b.xlsx", 1)]
+    assert query(db, "SELECT product_id, price FROM medicines ORDER BY product_id") == [
+        (1001, 3.5), (1002, 3.5), (1003, 3.5)
+    ]
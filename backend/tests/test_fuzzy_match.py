@@ -0,0 +1,131 @@
+# ============================================================
+# TYPO-TOLERANT MEDICINE MATCHING
+# ============================================================
+
+import pytest
+
+from app.services import fuzzy_match_service, inventory_service, order_service
+from app.services.fuzzy_match_service import TrigramIndex
+
+
+@pytest.fixture
+def index():
+    index = TrigramIndex()
+    index.add(1, "Paracetamol apodiscounter 500 mg Tabletten")
+    index.add(2, "Ramipril - 1 A Pharma® 5 mg Tabletten")
+    index.add(3, "Ibuprofen 400 mg")
+    index.add(4, "Ramipril comp 10 mg/25 mg Tabletten")
+    return index
+
+
+@pytest.fixture
+def medicines():
+    return [
+        (1, 1, "Paracetamol apodiscounter 500 mg Tabletten", 2.06, 100, "No"),
+        (2, 2, "Ramipril - 1 A Pharma® 5 mg Tabletten", 9.5, 0, "Yes"),
+    ]
+
+
+def test_misspellings_rank_intended_medicine_first(index):
+    assert index.search("paracetmol")[0]["medicine_id"] == 1
+    assert index.search("ramipryl")[0]["medicine_id"] == 2
+    assert index.search("ibuprofn 400")[0]["medicine_id"] == 3
+
+
+def test_scores_are_sorted_and_bounded(index):
+    results = index.search("ramipril 5 mg", limit=3)
+    scores = [r["score"] for r in results]
+
+    assert scores == sorted(scores, reverse=True)
+    assert all(0 < score <= 1 for score in scores)
+
+
+def test_unrelated_query_returns_nothing(index):
+    assert index.search("xylophone") == []
+
+
+def test_index_updates_in_place(index):
+    index.add(3, "Ibuprofen akut 200 mg")
+    index.remove(1)
+
+    assert index.search("ibuprofen akut")[0]["name"] == "Ibuprofen akut 200 mg"
+    assert all(r["medicine_id"] != 1 for r in index.search("paracetamol"))
+
+
+def test_check_inventory_not_found_returns_suggestions(catalog):
+    body, status = inventory_service.check_inventory("paracetmol")
+
+    assert status == 404
+    assert body["suggestions"][0]["medicine_id"] == 1
+    assert body["suggestions"][0]["available"] is True
+
+
+def test_fuzzy_search_reads_live_stock(catalog):
+    with catalog.db_connection() as conn:
+        conn.execute("UPDATE medicines SET stock = 7 WHERE product_id = 2")
+        conn.commit()
+
+    body, status = inventory_service.fuzzy_search_medicines("ramipryl")
+
+    assert status == 200
+    assert body["data"][0]["stock"] == 7
+
+
+def test_index_rebuilt_when_database_changes(catalog, tmp_path):
+    assert fuzzy_match_service.fuzzy_match("paracetmol")
+
+    catalog.configure_pool(tmp_path / "other.db")
+    catalog.init_db()
+
+    assert fuzzy_match_service.fuzzy_match("paracetmol") == []
+
+
+def test_process_index_follows_catalog_writes_from_other_processes(catalog, monkeypatch):
+    index = fuzzy_match_service.get_medicine_index()
+    assert fuzzy_match_service.fuzzy_match("paracetmol")[0]["medicine_id"] == 1
+
+    builds = []
+    build = fuzzy_match_service.build_medicine_index
+    monkeypatch.setattr(fuzzy_match_service, "build_medicine_index",
+                        lambda names: builds.append(len(names)) or build(names))
+
+    # Written the way manage.py import or another worker would: straight
+    # to the table, nothing calls into this process
+    with catalog.db_connection() as conn:
+        conn.execute("UPDATE medicines SET stock = stock - 1 WHERE product_id = 1")
+        conn.execute("UPDATE medicines SET name = name WHERE product_id = 2")
+        conn.commit()
+
+    # Stock only (or a name rewritten unchanged): same index, no rebuild
+    assert fuzzy_match_service.get_medicine_index() is index
+    assert builds == []
+
+    with catalog.db_connection() as conn:
+        conn.execute("UPDATE medicines SET name = 'Ibuprofen 400 mg' WHERE product_id = 1")
+        conn.execute("""
+            INSERT INTO medicines (product_id, name, price, stock, prescription_required)
+            VALUES (3, 'Cetirizin 10 mg', 3.0, 5, 'No')
+        """)
+        conn.execute("DELETE FROM medicines WHERE product_id = 2")
+        conn.commit()
+
+    assert fuzzy_match_service.fuzzy_match("ibuprofn")[0]["name"] == "Ibuprofen 400 mg"
+    assert fuzzy_match_service.fuzzy_match("cetirzin")[0]["name"] == "Cetirizin 10 mg"
+    assert fuzzy_match_service.fuzzy_match("ramipryl") == []
+    assert builds == [2]
+
+    # Swapped, not patched: a search holding the old index still sees
+    # the names it was built from
+    assert fuzzy_match_service.get_medicine_index() is not index
+    assert index.search("paracetmol")[0]["medicine_id"] == 1
+
+
+def test_orders_do_not_rebuild_the_index(catalog, monkeypatch):
+    inventory_service.fuzzy_search_medicines("paracetmol")
+    monkeypatch.setattr(fuzzy_match_service, "build_medicine_index", None)
+
+    order_service.create_order("PAT001", 1, 2)
+    body, status = inventory_service.fuzzy_search_medicines("paracetmol")
+
+    assert status == 200
+    assert body["data"][0]["stock"] == 98
@@ -0,0 +1,140 @@
+# ============================================================
+# IDEMPOTENCY KEYS ON ORDER WRITES
+# ============================================================
+
+import time
+
+import pytest
+
+from app.routes.order import order_bp
+from app.services import idempotency_service, order_service
+
+
+@pytest.fixture
+def client(catalog, make_client):
+    return make_client(order_bp)
+
+
+def counts(db):
+    with db.db_connection(readonly=True) as conn:
+        return (
+            conn.execute("SELECT stock FROM medicines WHERE id = 1").fetchone()[0],
+            conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0],
+        )
+
+
+def order(client, key, quantity=2, **body):
+    return client.post(
+        "/create-order",
+        json={"customer_id": "PAT001", "medicine_id": 1, "quantity": quantity, **body},
+        headers={"Idempotency-Key": key} if key else {}
+    )
+
+
+def test_duplicate_order_is_replayed(client, db):
+    first = order(client, "retry-1")
+    second = order(client, "retry-1")
+
+    assert first.status_code == second.status_code == 201
+    assert first.json == second.json
+    assert counts(db) == (8, 1)
+
+
+def test_without_key_each_request_writes(client, db):
+    order(client, None)
+    order(client, None)
+
+    assert counts(db) == (6, 2)
+
+
+def test_reused_key_with_other_payload_conflicts(client, db):
+    order(client, "retry-1")
+    response = order(client, "retry-1", quantity=3)
+
+    assert response.status_code == 422
+    assert response.json["code"] == "idempotency_conflict"
+    assert counts(db) == (8, 1)
+
+
+def test_rejected_request_is_not_stored(client, db):
+    assert order(client, "retry-1", quantity=50).status_code == 400
+    assert order(client, "retry-1", quantity=2).status_code == 201
+
+
+def test_cart_replay(client, db):
+    body = {"customer_id": "PAT001", "items": [{"medicine_id": 1, "quantity": 1},
+                                               {"medicine_id": 2, "quantity": 1}]}
+    headers = {"Idempotency-Key": "cart-1"}
+
+    first = client.post("/create-order", json=body, headers=headers)
+    second = client.post("/create-order", json=body, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert first.json == second.json
+    assert counts(db) == (9, 2)
+
+
+def test_retried_cancel_replays_success(client, db):
+    order_id = order(client, None).json["data"]["order_id"]
+    headers = {"Idempotency-Key": "cancel-1"}
+
+    first = client.post("/cancel-order", json={"order_id": order_id}, headers=headers)
+    second = client.post("/cancel-order", json={"order_id": order_id}, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert counts(db) == (10, 0)
+
+    # Without the key the retry would have reported a missing order
+    assert client.post("/cancel-order", json={"order_id": order_id}).status_code == 404
+
+
+def test_invalid_key(client):
+    assert order(client, "x" * 300).status_code == 400
+
+
+def test_expired_key_is_reused(client, db, monkeypatch):
+    order(client, "retry-1")
+
+    later = time.time() + idempotency_service.IDEMPOTENCY_TTL + 1
+    monkeypatch.setattr(idempotency_service.time, "time", lambda: later)
+
+    assert order(client, "retry-1").status_code == 201
+    assert counts(db) == (6, 2)
+
+    with db.db_connection(readonly=True) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM idempotency_keys").fetchone()[0] == 1
+
+
+def test_concurrent_duplicate_rolls_back(client, db, monkeypatch):
+    # The other request committed the key after our lookup missed it
+    request_hash = idempotency_service.request_fingerprint("PAT001", "1", 2)
+
+    with db.db_connection() as conn:
+        idempotency_service.remember(conn.cursor(), "create-order", "retry-1", request_hash,
+                                     {"status": "success", "data": {"order_id": 99}}, 201)
+        conn.commit()
+
+    original = idempotency_service.lookup
+    calls = []
+
+    def missed_first(*args, **kwargs):
+        calls.append(args)
+        return None if len(calls) == 1 else original(*args, **kwargs)
+
+    monkeypatch.setattr(idempotency_service, "lookup", missed_first)
+
+    body, status = order_service.create_order("PAT001", 1, 2, "retry-1")
+
+    assert status == 201
+    assert body["data"]["order_id"] == 99
+    assert counts(db) == (10, 0)
+
+
+def test_purge_expired(db):
+    with db.db_connection() as conn:
+        cursor = conn.cursor()
+        idempotency_service.remember(cursor, "create-order", "old", "h", {}, 201, now=0.0)
+        idempotency_service.remember(cursor, "create-order", "new", "h", {}, 201)
+
+        assert idempotency_service.purge_expired(cursor) == 1
+        conn.commit()
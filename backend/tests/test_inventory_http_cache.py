@@ -0,0 +1,98 @@
+# ============================================================
+# CONDITIONAL GET / RESPONSE CACHE ON INVENTORY ENDPOINTS
+# ============================================================
+
+import pytest
+
+from app.routes import inventory
+from app.routes.inventory import inventory_bp, response_cache
+from app.services import order_service
+
+
+@pytest.fixture
+def client(catalog, make_client):
+    return make_client(inventory_bp)
+
+
+def test_medicines_carries_validators(client):
+    response = client.get("/inventory/medicines")
+
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+    assert response.headers["Cache-Control"] == "no-cache"
+
+
+def test_if_none_match_returns_304_without_body(client):
+    etag = client.get("/inventory/medicines").headers["ETag"]
+
+    response = client.get("/inventory/medicines", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_stock_write_changes_etag(client):
+    first = client.get("/inventory/medicines")
+
+    order_service.create_order("PAT001", 1, 2)
+
+    second = client.get("/inventory/medicines", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    stock = {row["id"]: row["stock"] for row in second.json["data"]}
+    assert stock[1] == 8
+
+
+def test_write_during_build_is_not_cached_under_old_version(client, monkeypatch):
+    before = client.get("/inventory/medicines").headers["ETag"]
+    response_cache.clear()
+    build = inventory.get_all_medicines
+
+    def write_then_build(*args):
+        order_service.create_order("PAT001", 1, 2)
+        return build(*args)
+
+    monkeypatch.setattr(inventory, "get_all_medicines", write_then_build)
+    racing = client.get("/inventory/medicines")
+    monkeypatch.setattr(inventory, "get_all_medicines", build)
+
+    assert racing.status_code == 200
+    assert "ETag" not in racing.headers
+    assert response_cache.stats()["entries"] == 0
+
+    # The old validator must not revalidate the new body
+    after = client.get("/inventory/medicines", headers={"If-None-Match": before})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before
+    assert after.json == racing.json
+
+
+def test_repeat_polls_reuse_serialized_bytes(client):
+    client.get("/inventory/medicines")
+    hits = response_cache.stats()["hits"]
+
+    response = client.get("/inventory/medicines")
+
+    assert response.status_code == 200
+    assert response_cache.stats()["hits"] == hits + 1
+
+
+def test_search_etag_depends_on_query(client):
+    para = client.get("/inventory/search?query=para")
+    ibu = client.get("/inventory/search?query=ibu")
+
+    assert para.headers["ETag"] != ibu.headers["ETag"]
+    assert para.json["data"][0]["name"] == "Paracetamol 500 mg"
+
+    again = client.get("/inventory/search?query=para", headers={"If-None-Match": para.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_errors_are_not_cached(client):
+    response = client.get("/inventory/search?query=para&mode=regex")
+
+    assert response.status_code == 400
+    assert "ETag" not in response.headers
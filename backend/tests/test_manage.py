@@ -0,0 +1,94 @@
+# ============================================================
+# OFFLINE SETUP + SCHEMA VERSION CHECK
+# ============================================================
+
+import sqlite3
+
+import pytest
+
+from app import manage
+from app.services.analytics_service import get_admin_revenue, get_user_metrics
+
+
+def test_check_schema_needs_a_migrated_database(db, tmp_path):
+    assert db.check_schema() == db.SCHEMA_VERSION
+
+    # A database created by an older build (user_version never stamped)
+    with db.db_connection() as conn:
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+
+    with pytest.raises(db.SchemaVersionError, match="version 0"):
+        db.check_schema()
+
+    manage.main(["migrate"])
+    assert db.check_schema() == db.SCHEMA_VERSION
+
+    db.configure_pool(tmp_path / "missing" / "pharmacy.db")
+    with pytest.raises(db.SchemaVersionError, match="No database"):
+        db.check_schema()
+
+
+def test_seed_users_once(db):
+    assert manage.seed_users() == 2
+    assert manage.seed_users() == 0
+
+    with db.db_connection(readonly=True) as conn:
+        roles = dict(conn.execute("SELECT email, role FROM users").fetchall())
+
+    assert roles == {"admin@pharmacy.com": "admin", "clerk@pharmacy.com": "user"}
+
+
+def test_migrate_upgrades_a_baseline_database(db, tmp_path):
+    # Tables and rows as the pre-event-log build left them
+    path = tmp_path / "baseline.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE medicines (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, product_id INTEGER UNIQUE, name TEXT NOT NULL,
+            pzn TEXT, price REAL, package_size TEXT, description TEXT, stock INTEGER DEFAULT 100,
+            prescription_required TEXT DEFAULT "No"
+        );
+        CREATE TABLE customers (id TEXT PRIMARY KEY, age INTEGER, gender TEXT);
+        CREATE TABLE orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, customer_id TEXT, product_name TEXT,
+            quantity INTEGER, purchase_date TEXT, total_price REAL, dosage_frequency TEXT,
+            prescription_required TEXT
+        );
+        INSERT INTO medicines (product_id, name, price) VALUES (1001, 'Zink 10 mg', 4.0);
+        INSERT INTO customers VALUES ('PAT001', 30, 'F');
+        INSERT INTO orders (customer_id, product_name, quantity, purchase_date, total_price,
+                            dosage_frequency, prescription_required)
+        VALUES ('PAT001', 'Zink 10 mg', 2, '2024-01-02 00:00:00', 8.0, 'N/A', 'No'),
+               ('PAT001', 'Zink 10 mg', 1, '2024-02-05 00:00:00', 4.0, 'N/A', 'No');
+    """)
+    conn.commit()
+    conn.close()
+
+    db.configure_pool(path)
+    manage.main(["migrate"])
+    assert db.check_schema() == db.SCHEMA_VERSION
+
+    metrics, status = get_user_metrics("PAT001")
+    assert status == 200
+    assert (metrics["data"]["total_orders"], metrics["data"]["total_spent"]) == (2, 12.0)
+
+    revenue, _ = get_admin_revenue("month")
+    assert revenue["data"] == [{"month": "2024-01", "revenue": 8.0}, {"month": "2024-02", "revenue": 4.0}]
+
+
+def test_rebuild_rollups_command(db, capsys):
+    with db.db_connection() as conn:
+        conn.execute("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date, total_price,
+                                dosage_frequency, prescription_required)
+            VALUES ('PAT001', 'Zink 10 mg', 2, '2024-01-02 00:00:00', 8.0, 'N/A', 'No')
+        """)
+        conn.commit()
+
+    manage.main(["rebuild-rollups"])
+
+    output = capsys.readouterr().out
+    assert "customer_order_totals: 1 rows" in output
+    assert "revenue_monthly: 1 rows" in output
+    assert get_user_metrics("PAT001")[0]["data"]["total_spent"] == 8.0
@@ -0,0 +1,100 @@
+# ============================================================
+# FTS5 MEDICINE SEARCH
+# ============================================================
+
+import pytest
+
+from app.services import inventory_service
+from app.utils import excel_loader
+
+
+def insert_medicine(conn, product_id, name, description="", pzn=None, stock=100):
+    conn.execute("""
+        INSERT INTO medicines (product_id, name, pzn, price, description, stock)
+        VALUES (?, ?, ?, 1.0, ?, ?)
+    """, (product_id, name, pzn, description, stock))
+
+
+@pytest.fixture
+def catalog(db):
+    with db.db_connection() as conn:
+        insert_medicine(conn, 1, "Paracetamol 500 mg Tabletten", "Schmerzmittel", "00001")
+        insert_medicine(conn, 2, "Ibuprofen 400 mg", "Paracetamol-frei", "00002")
+        insert_medicine(conn, 3, "Ramipril 5 mg", "Blutdruck", "04711")
+        conn.commit()
+    return db
+
+
+def names(response):
+    body, status = response
+    assert status == 200, body
+    return [row["name"] for row in body["data"]]
+
+
+def test_fts_prefix_search_ranks_name_matches_first(catalog):
+    result = names(inventory_service.search_medicines("parac", "fts"))
+    assert result == ["Paracetamol 500 mg Tabletten", "Ibuprofen 400 mg"]
+
+
+def test_fts_requires_every_term(catalog):
+    assert names(inventory_service.search_medicines("para 500", "fts")) == [
+        "Paracetamol 500 mg Tabletten"
+    ]
+
+
+def test_fts_matches_pzn(catalog):
+    assert names(inventory_service.search_medicines("0471", "fts")) == ["Ramipril 5 mg"]
+
+
+def test_fts_index_follows_catalog_writes(catalog):
+    with catalog.db_connection() as conn:
+        conn.execute("UPDATE medicines SET name = 'Ramipryl 5 mg' WHERE product_id = 3")
+        conn.execute("DELETE FROM medicines WHERE product_id = 1")
+        conn.commit()
+
+    assert names(inventory_service.search_medicines("ramipryl", "fts")) == ["Ramipryl 5 mg"]
+    assert names(inventory_service.search_medicines("ramipril", "fts")) == []
+    assert names(inventory_service.search_medicines("tablet", "fts")) == []
+
+
+def test_fts_rebuilds_rows_loaded_before_index(db):
+    with db.db_connection() as conn:
+        for trigger in ("medicines_fts_ai", "medicines_fts_ad", "medicines_fts_au"):
+            conn.execute(f"DROP TRIGGER {trigger}")
+        conn.execute("DROP TABLE medicines_fts")
+        insert_medicine(conn, 9, "Minoxidil 5%")
+        conn.commit()
+
+    db.init_db()
+
+    assert names(inventory_service.search_medicines("minox", "fts")) == ["Minoxidil 5%"]
+
+
+def test_check_inventory_matches_name_substrings(catalog):
+    body, status = inventory_service.check_inventory("cetamol")
+    assert status == 200
+    assert body["data"][0]["name"] == "Paracetamol 500 mg Tabletten"
+
+
+@pytest.mark.parametrize("text", [
+    "1 A", "10%", "vitamin", "tabletten", "Tabl_tten", "para", "ä", "Ä", "mg", "_", "zzz"
+])
+def test_check_inventory_matches_the_name_like_query_on_the_shipped_catalog(db, text):
+    excel_loader.load_products(excel_loader.PRODUCTS_FILE, quiet=True)
+
+    # The lookup the agent has always used (a table scan: id order)
+    with db.db_connection(readonly=True) as conn:
+        expected = [row[0] for row in conn.execute(
+            "SELECT id FROM medicines WHERE LOWER(name) LIKE LOWER(?) ORDER BY id", (f"%{text}%",)
+        )]
+
+    body, status = inventory_service.check_inventory(text)
+
+    assert status == (200 if expected else 404)
+    assert [row["medicine_id"] for row in body.get("data", [])] == expected
+
+
+def test_unknown_search_mode_rejected(catalog):
+    body, status = inventory_service.search_medicines("para", "regex")
+    assert status == 400
+    assert body["code"] == "validation_error"
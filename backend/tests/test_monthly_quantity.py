@@ -0,0 +1,77 @@
+# ============================================================
+# MONTH-TO-DATE QUANTITY (MONTHLY LIMIT CHECK)
+# ============================================================
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.routes.order import order_bp
+from app.services import order_service
+from app.utils.dates import month_bounds
+
+NOW = datetime(2024, 3, 15, 12, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def client(db, make_client):
+    with db.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, ?, ?, 1.0, 'N/A', 'No')
+        """, [
+            ("PAT001", "Ramipril 5 mg", 2, "2024-03-01 00:00:00"),
+            ("PAT001", "RAMIPRIL 10 mg", 1, "2024-03-14 18:30:00"),
+            ("PAT001", "Ramipril 5 mg", 5, "2024-02-29 23:59:59"),   # last month
+            ("PAT001", "Ramipril 5 mg", 7, "2024-04-01 00:00:00"),   # next month
+            ("PAT001", "Metformin 500 mg", 3, "2024-03-02 10:00:00"),
+            ("PAT002", "Ramipril 5 mg", 4, "2024-03-03 10:00:00"),
+        ])
+        conn.commit()
+
+    return make_client(order_bp)
+
+
+def test_month_bounds_roll_over_year():
+    start, end = month_bounds(datetime(2024, 12, 31, 23, tzinfo=timezone.utc).timestamp())
+    assert datetime.fromtimestamp(start, timezone.utc) == datetime(2024, 12, 1, tzinfo=timezone.utc)
+    assert datetime.fromtimestamp(end, timezone.utc) == datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def test_sums_current_month_by_substring(client):
+    response, status = order_service.get_monthly_quantity("PAT001", " ramipril ", now=NOW)
+
+    assert status == 200
+    assert response["data"] == {
+        "customer_id": "PAT001",
+        "medicine": "ramipril",
+        "month": "2024-03",
+        "quantity": 3,
+        "orders": 2
+    }
+
+    unused = order_service.get_monthly_quantity("PAT003", "ramipril", now=NOW)[0]
+    assert unused["data"]["quantity"] == 0
+
+
+def test_non_ascii_names_match_in_any_case(client, db):
+    with db.db_connection() as conn:
+        conn.execute("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES ('PAT004', 'ÄSKULAP ÖL 10 ml', 2, '2024-03-05 10:00:00', 1.0, 'N/A', 'No')
+        """)
+        conn.commit()
+
+    for medicine in ("äskulap öl", "ÄSKULAP", "Äskulap Öl"):
+        response = order_service.get_monthly_quantity("PAT004", medicine, now=NOW)[0]
+        assert response["data"]["quantity"] == 2, medicine
+
+
+def test_route(client):
+    response = client.get("/monthly-quantity/PAT001?medicine=Metformin")
+    assert response.status_code == 200
+    assert response.json["data"]["medicine"] == "metformin"
+
+    assert client.get("/monthly-quantity/PAT001").status_code == 400
@@ -0,0 +1,195 @@
+# ============================================================
+# ORDER EVENT LOG + PROJECTIONS
+# ============================================================
+
+import sqlite3
+
+import pytest
+
+from app.routes.analytics import analytics_bp
+from app.routes.order import order_bp
+from app.services import order_event_service, order_service
+
+
+@pytest.fixture
+def medicines():
+    return [
+        (1, 1, "Paracetamol 500 mg", 2.0, 10, "No"),
+        (2, 2, "Ibuprofen 400 mg", 3.0, 10, "No"),
+    ]
+
+
+@pytest.fixture
+def client(catalog, make_client):
+    return make_client(order_bp, analytics_bp)
+
+
+def query(db, sql, *params):
+    with db.db_connection(readonly=True) as conn:
+        return [tuple(row) for row in conn.execute(sql, params).fetchall()]
+
+
+def test_order_lifecycle_is_logged(client, db):
+    first, _ = order_service.create_order("PAT001", 1, 2)
+    second, _ = order_service.create_order("PAT001", 2, 1)
+    order_service.cancel_order(first["data"]["order_id"])
+
+    events = query(db, "SELECT event_type, order_id, quantity, amount FROM order_events ORDER BY seq")
+    assert events == [
+        ("created", first["data"]["order_id"], 2, 4.0),
+        ("created", second["data"]["order_id"], 1, 3.0),
+        ("cancelled", first["data"]["order_id"], -2, -4.0),
+    ]
+
+    # Live projection keeps only the open order, stock restored by id
+    assert query(db, "SELECT id FROM orders") == [(second["data"]["order_id"],)]
+    assert query(db, "SELECT stock FROM medicines WHERE id = 1") == [(10,)]
+
+    assert query(db, "SELECT order_count, quantity, revenue FROM customer_order_totals") == [
+        (1, 1, 3.0)
+    ]
+    assert query(db, """
+        SELECT product_name, order_count, quantity, revenue
+        FROM medicine_order_totals ORDER BY product_name
+    """) == [
+        ("Ibuprofen 400 mg", 1, 1, 3.0),
+        ("Paracetamol 500 mg", 0, 0, 0.0),
+    ]
+
+
+def test_cancelled_order_status_comes_from_log(client, db):
+    order_id = order_service.create_order("PAT001", 1, 2)[0]["data"]["order_id"]
+    order_service.cancel_order(order_id)
+
+    response = client.get(f"/order-status/{order_id}")
+
+    assert response.status_code == 200
+    assert response.json["data"]["status"] == "Cancelled"
+    assert response.json["data"]["quantity"] == 2
+
+
+def test_refund_keeps_stock(client, db):
+    order_id = order_service.create_order("PAT001", 1, 2)[0]["data"]["order_id"]
+
+    body, status = order_service.refund_order(order_id)
+
+    assert status == 200
+    assert body["refunded_amount"] == 4.0
+    assert query(db, "SELECT stock FROM medicines WHERE id = 1") == [(8,)]
+    assert query(db, "SELECT COUNT(*) FROM orders") == [(0,)]
+    assert order_service.refund_order(order_id)[1] == 404
+    assert order_service.cancel_order(order_id)[1] == 404
+
+
+def test_refund_route_requires_admin(client):
+    assert client.post("/refund-order", json={"order_id": 1}).status_code == 401
+
+
+def test_events_since(client, db, admin_headers):
+    for _ in range(5):
+        order_service.create_order("PAT001", 1, 1)
+
+    page = client.get("/admin/order-events?since=0&limit=3", headers=admin_headers).json["data"]
+    assert [event["seq"] for event in page["events"]] == [1, 2, 3]
+    assert page["has_more"]
+
+    rest = client.get(f"/admin/order-events?since={page['last_seq']}", headers=admin_headers).json["data"]
+    assert [event["seq"] for event in rest["events"]] == [4, 5]
+    assert not rest["has_more"]
+
+    empty = client.get(f"/admin/order-events?since={rest['last_seq']}", headers=admin_headers).json["data"]
+    assert empty == {"events": [], "last_seq": 5, "has_more": False}
+
+    assert client.get("/admin/order-events?since=-1", headers=admin_headers).status_code == 400
+    assert client.get("/admin/order-events?since=0").status_code == 401
+
+
+def test_log_is_append_only(client, db):
+    order_service.create_order("PAT001", 1, 1)
+
+    with db.db_connection() as conn:
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("UPDATE order_events SET amount = 0")
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("DELETE FROM order_events")
+
+
+def test_backfill_imported_orders(client, db):
+    order_service.create_order("PAT001", 1, 1)
+
+    with db.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, ?, '2024-01-01 10:00:00', ?, 'N/A', 'No')
+        """, [("PAT002", "Ibuprofen 400 mg", 2, 6.0), ("PAT001", "Unknown", 1, 1.0)])
+        conn.commit()
+
+    assert order_event_service.backfill_order_events() == 2
+    assert order_event_service.backfill_order_events() == 0
+
+    assert query(db, """
+        SELECT customer_id, order_count, quantity, revenue
+        FROM customer_order_totals ORDER BY customer_id
+    """) == [("PAT001", 2, 2, 3.0), ("PAT002", 1, 2, 6.0)]
+
+    # Imported order with a known name restores stock by its resolved id
+    imported = query(db, "SELECT order_id, medicine_id FROM order_events WHERE customer_id = 'PAT002'")
+    assert imported[0][1] == 2
+
+    order_service.cancel_order(imported[0][0])
+    assert query(db, "SELECT stock FROM medicines WHERE id = 2") == [(12,)]
+
+
+def test_incremental_totals_match_rebuild(client, db):
+    ids = [order_service.create_order(f"PAT00{i % 3}", 1 + i % 2, 1)[0]["data"]["order_id"]
+           for i in range(12)]
+    order_service.cancel_order(ids[0])
+    order_service.refund_order(ids[5])
+
+    tables = [table for table, _, _ in order_event_service.ROLLUPS]
+    before = {table: query(db, f"SELECT * FROM {table} ORDER BY 1") for table in tables}
+
+    with db.db_connection() as conn:
+        order_event_service.rebuild_order_totals(conn.cursor())
+        conn.commit()
+
+    for table in tables:
+        assert query(db, f"SELECT * FROM {table} ORDER BY 1") == before[table]
+
+
+def test_events_outside_a_rollup_do_not_force_rebuilds(client, db, monkeypatch):
+    rebuilds = []
+    rebuild = order_event_service.rebuild_order_totals
+    monkeypatch.setattr(order_event_service, "rebuild_order_totals",
+                        lambda cursor: rebuilds.append(1) or rebuild(cursor))
+
+    def import_order(product_name, purchase_date):
+        with db.db_connection() as conn:
+            conn.execute("""
+                INSERT INTO orders (customer_id, product_name, quantity, purchase_date,
+                                    total_price, dosage_frequency, prescription_required)
+                VALUES ('PAT009', ?, 1, ?, 2.0, 'N/A', 'No')
+            """, (product_name, purchase_date))
+            conn.commit()
+        return order_event_service.backfill_order_events()
+
+    order_service.create_order("PAT001", 1, 1)
+
+    # Not in the catalogue (no medicine id), then no parseable date: both
+    # skip medicine_demand_daily, which stays current all the same
+    assert import_order("Not In Catalogue 5 mg", "2024-01-01 10:00:00") == 1
+    assert import_order("Paracetamol 500 mg", "unknown") == 1
+    assert query(db, "SELECT COUNT(*) FROM order_events WHERE medicine_id IS NULL") == [(1,)]
+
+    with db.db_connection(readonly=True) as conn:
+        assert not order_event_service.projections_stale(conn.cursor())
+
+    assert import_order("Ibuprofen 400 mg", "2024-01-02 10:00:00") == 1
+    assert rebuilds == []
+
+    # Still detected when a table really lags
+    with db.db_connection() as conn:
+        conn.execute("DELETE FROM medicine_demand_daily")
+        assert order_event_service.projections_stale(conn.cursor())
+        conn.rollback()
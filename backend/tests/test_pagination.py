@@ -0,0 +1,102 @@
+# ============================================================
+# KEYSET PAGINATION AND NDJSON STREAMING
+# ============================================================
+
+import json
+
+import pytest
+
+from app.routes.inventory import inventory_bp
+from app.routes.order import order_bp
+
+
+@pytest.fixture
+def medicines():
+    return [(i, i, f"Medicine {i}", 1.0, 10, "No") for i in range(1, 26)]
+
+
+@pytest.fixture
+def client(catalog, make_client):
+    with catalog.db_connection() as conn:
+        # Two orders share each date to exercise the id tie-break
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date, total_price)
+            VALUES ('PAT001', ?, 1, ?, 1.0)
+        """, [(f"Medicine {i}", f"2024-01-{1 + i // 2:02d} 10:00:00") for i in range(17)])
+        conn.commit()
+
+    return make_client(inventory_bp, order_bp)
+
+
+def walk(client, url, key):
+    seen, cursor = [], None
+
+    while True:
+        page_url = f"{url}{'&' if '?' in url else '?'}limit=4"
+        if cursor:
+            page_url += f"&cursor={cursor}"
+
+        body = client.get(page_url).json
+        assert len(body["data"]) <= 4
+        seen.extend(row[key] for row in body["data"])
+
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return seen
+
+
+def test_medicine_pages_cover_catalog_once(client):
+    ids = walk(client, "/inventory/medicines", "id")
+    assert ids == list(range(1, 26))
+
+
+def test_search_pages_follow_id_order(client):
+    names = walk(client, "/inventory/search?query=medicine 1", "name")
+    assert names == ["Medicine 1"] + [f"Medicine {i}" for i in range(10, 20)]
+
+
+def test_history_pages_are_newest_first_without_gaps(client):
+    full = client.get("/customer-history/PAT001").json["data"]
+    paged = walk(client, "/customer-history/PAT001", "order_id")
+
+    assert sorted(paged) == sorted(row["order_id"] for row in full)
+    assert len(set(paged)) == len(paged) == 17
+
+    dates = [row["date"] for row in full]
+    assert dates == sorted(dates, reverse=True)
+
+
+def test_unpaged_responses_keep_old_shape(client):
+    body = client.get("/inventory/medicines").json
+    assert "next_cursor" not in body
+    assert len(body["data"]) == 25
+
+
+def test_ndjson_streams_from_cursor(client):
+    first = client.get("/inventory/medicines?limit=10").json
+
+    response = client.get(f"/inventory/medicines?format=ndjson&cursor={first['next_cursor']}")
+
+    assert response.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.data.splitlines()]
+    assert [row["id"] for row in rows] == list(range(11, 26))
+
+
+def test_history_ndjson_stream(client):
+    response = client.get("/customer-history/PAT001?format=ndjson&limit=5")
+    rows = [json.loads(line) for line in response.data.splitlines()]
+
+    assert len(rows) == 5
+    assert rows[0]["date"] >= rows[-1]["date"]
+
+
+@pytest.mark.parametrize("url", [
+    "/inventory/medicines?cursor=not-a-cursor",
+    "/inventory/medicines?limit=0",
+    "/customer-history/PAT001?limit=abc",
+    "/customer-history/PAT001?format=ndjson&cursor=WzFd",
+])
+def test_bad_page_requests_rejected(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert response.json["code"] == "validation_error"
@@ -0,0 +1,230 @@
+# ============================================================
+# QUERY PLAN REGRESSION CHECK
+# ============================================================
+# Runs every service function against a seeded database, captures the
+# SQL they execute and fails if EXPLAIN QUERY PLAN shows a full table
+# scan on one of the large tables.
+
+import sqlite3
+
+import pytest
+
+from app.models import database
+from app.services import analytics_service, inventory_service, order_service
+from app.services import fuzzy_match_service, prescription_service, reservation_service
+from app.services import forecast_service, order_event_service, refill_service
+from app.services.catalog_cache import catalog_cache
+from app.models import inventory_model
+
+LARGE_TABLES = {"medicines", "orders", "customers", "prescriptions", "stock_holds",
+                "order_events"}
+
+# Queries that must read every row by definition
+FULL_SCAN_ALLOWED = {
+    "get_all_medicines",
+}
+
+# Whole-table aggregates: reading a covering index end to end is the floor
+COVERING_SCAN_ALLOWED = set()
+
+# Substring LIKE cannot use a b-tree index
+KNOWN_SCANS = {
+    "update_stock",
+    "search_medicines",
+    "get_medicine_by_name",
+}
+
+N_MEDICINES = 2000
+N_CUSTOMERS = 500
+N_ORDERS = 20000
+
+
+# ------------------------------------------------------------
+# Fixtures
+# ------------------------------------------------------------
+
+@pytest.fixture
+def seeded_db(db):
+    with db.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO medicines (product_id, name, pzn, price, stock, prescription_required)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (i, f"Medicine {i} 500 mg", str(10000000 + i), 1.5 + i % 40, 100,
+             "Yes" if i % 10 == 0 else "No")
+            for i in range(1, N_MEDICINES + 1)
+        ])
+
+        conn.executemany("""
+            INSERT INTO customers (id, age, gender) VALUES (?, ?, ?)
+        """, [(f"PAT{i:04d}", 20 + i % 60, "F" if i % 2 else "M") for i in range(N_CUSTOMERS)])
+
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (f"PAT{i % N_CUSTOMERS:04d}", f"Medicine {1 + i % N_MEDICINES} 500 mg", 1 + i % 3,
+             f"2024-{1 + i % 12:02d}-{1 + i % 28:02d} 10:00:00", 9.99, "N/A", "No")
+            for i in range(N_ORDERS)
+        ])
+        db.normalize_purchase_dates(conn.cursor())
+
+        conn.executemany("""
+            INSERT INTO prescriptions (customer_id, medicine_id, status, expires_at)
+            VALUES (?, ?, 'Approved', '2099-01-01T00:00:00')
+        """, [(f"PAT{i:04d}", 10, ) for i in range(N_CUSTOMERS)])
+
+        conn.commit()
+        conn.execute("ANALYZE")
+
+    return db
+
+
+@pytest.fixture
+def captured_sql(seeded_db, monkeypatch):
+    statements = []
+    original_connect = database.ConnectionPool._connect
+
+    def traced_connect(self):
+        conn = original_connect(self)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    # The fuzzy index and catalog cache read the whole catalog once, not per query
+    fuzzy_match_service.rebuild_medicine_index()
+    with database.db_connection(readonly=True) as conn:
+        catalog_cache.snapshot(conn.cursor())
+
+    # New connections only: drop the warm ones created while seeding
+    database.configure_pool(database.DB_PATH)
+    monkeypatch.setattr(database.ConnectionPool, "_connect", traced_connect)
+
+    return statements
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+
+SERVICE_CALLS = {
+    "check_inventory": lambda: inventory_service.check_inventory("Medicine 42"),
+    "update_stock": lambda: inventory_service.update_stock("Medicine 42", 5),
+    "get_all_medicines": lambda: inventory_service.get_all_medicines(),
+    "search_medicines": lambda: inventory_service.search_medicines("medicine 7"),
+    "search_medicines_fts": lambda: inventory_service.search_medicines("medicine 7", "fts"),
+    "fuzzy_search_medicines": lambda: inventory_service.fuzzy_search_medicines("medicne 42"),
+    "get_medicine_by_name": lambda: inventory_model.get_medicine_by_name("Medicine 42"),
+    "create_order": lambda: order_service.create_order("PAT0007", 10, 1),
+    "get_customer_history": lambda: order_service.get_customer_history("PAT0007"),
+    "get_customer_history_page": lambda: order_service.get_customer_history(
+        "PAT0007", 10, "WyIyMDI0LTA2LTE1IDEwOjAwOjAwIiwxMDAwMF0"
+    ),
+    "get_order_status": lambda: order_service.get_order_status(15),
+    "cancel_order": lambda: order_service.cancel_order(15),
+    "refund_order": lambda: order_service.refund_order(16),
+    "get_events_since": lambda: order_event_service.get_events_since(100, 50),
+    "is_verified": lambda: prescription_service.is_verified("PAT0007", 10),
+    "get_prescription_status": lambda: prescription_service.get_prescription_status("PAT0007", 10),
+    "reserve_stock": lambda: reservation_service.reserve_stock("PAT0007", 42, 1),
+    "expire_holds": lambda: reservation_service.expire_holds(),
+    "get_user_metrics": lambda: analytics_service.get_user_metrics("PAT0007"),
+    "get_user_metrics_batch": lambda: analytics_service.get_user_metrics_batch(
+        [f"PAT{i:04d}" for i in range(0, N_CUSTOMERS, 5)]
+    ),
+    "get_admin_revenue": lambda: analytics_service.get_admin_revenue(),
+    "get_reorder_suggestions": lambda: forecast_service.get_reorder_suggestions(),
+    "get_customer_refills": lambda: refill_service.get_customer_refills("PAT0042"),
+    "get_monthly_quantity": lambda: order_service.get_monthly_quantity("PAT0042", "Medicine 7"),
+    "get_revenue_timeseries": lambda: analytics_service.get_revenue_timeseries(
+        "week", "2024-03-01", "2024-05-31"),
+    "get_revenue_timeseries_medicine": lambda: analytics_service.get_revenue_timeseries(
+        "day", "2024-03-01", "2024-03-31", medicine_id=42),
+}
+
+PLANNED_PREFIXES = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def plan_for(sql):
+    with database.db_connection(readonly=True) as conn:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    return [row["detail"] for row in rows]
+
+
+def full_scans(plan, allow_covering=False):
+    scans = []
+    for detail in plan:
+        parts = detail.split()
+        if len(parts) >= 2 and parts[0] == "SCAN" and parts[1] in LARGE_TABLES:
+            # "SCAN orders USING COVERING INDEX ..." never touches the table
+            if allow_covering and "USING COVERING INDEX" in detail:
+                continue
+            scans.append(detail)
+    return scans
+
+
+def service_queries(name, statements):
+    del statements[:]
+    status = SERVICE_CALLS[name]()
+    if isinstance(status, tuple):
+        assert status[1] < 500, status
+
+    return [
+        sql for sql in statements
+        if sql.lstrip().upper().startswith(PLANNED_PREFIXES)
+        and "sqlite_master" not in sql
+    ]
+
+
+# ------------------------------------------------------------
+# Tests
+# ------------------------------------------------------------
+
+def test_managed_indexes_created(db):
+    with db.db_connection(readonly=True) as conn:
+        names = {
+            row["name"] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+
+    assert set(db.MANAGED_INDEXES) <= names
+
+
+def test_stale_managed_index_dropped(db):
+    with db.db_connection() as conn:
+        conn.execute("CREATE INDEX idx_orders_legacy ON orders (product_name)")
+        conn.commit()
+
+    db.init_db()
+
+    with db.db_connection(readonly=True) as conn:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'idx_orders_legacy'"
+        ).fetchone()
+
+    assert row is None
+
+
+@pytest.mark.parametrize("name", sorted(SERVICE_CALLS))
+def test_service_queries_avoid_full_scans(captured_sql, name):
+    queries = service_queries(name, captured_sql)
+    assert queries, f"{name} executed no plannable queries"
+
+    if name in FULL_SCAN_ALLOWED or name in KNOWN_SCANS:
+        return
+
+    for sql in queries:
+        scans = full_scans(plan_for(sql), allow_covering=name in COVERING_SCAN_ALLOWED)
+        assert not scans, f"{name} regressed to a full scan:\n{sql}\n{scans}"
+
+
+def test_trace_captures_bound_values(captured_sql):
+    queries = service_queries("get_customer_history", captured_sql)
+    assert any("'PAT0007'" in sql for sql in queries)
+
+
+def test_readonly_pool_rejects_writes(db):
+    with db.db_connection(readonly=True) as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("UPDATE medicines SET stock = 0")
@@ -0,0 +1,156 @@
+# ============================================================
+# BATCH REFILL ENGINE
+# ============================================================
+
+import json
+import os
+import random
+import time
+
+import pytest
+
+from app import manage
+from app.routes.analytics import analytics_bp
+from app.services import refill_service
+from app.utils.dates import format_timestamp
+
+NOW = int(time.time())
+DAY = 86400
+
+RULES = """medicine,refill_days,max_monthly_quantity
+Ramipril 5 mg,30,3
+Metformin 500 mg,60,4
+Paracetamol 500 mg,0,10
+"""
+
+
+@pytest.fixture
+def rules_path(tmp_path, monkeypatch):
+    path = tmp_path / "medicine_rules.csv"
+    path.write_text(RULES, encoding="utf-8")
+    monkeypatch.setattr(refill_service, "RULES_PATH", path)
+    return path
+
+
+def insert_orders(db, rows):
+    # (customer_id, product_name, days_ago)
+    with db.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date, purchase_ts,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, 1, ?, ?, 1.0, 'N/A', 'No')
+        """, [
+            (customer_id, name, format_timestamp(NOW - days_ago * DAY), NOW - days_ago * DAY)
+            for customer_id, name, days_ago in rows
+        ])
+        conn.commit()
+
+
+@pytest.fixture
+def client(db, rules_path, make_client):
+    return make_client(analytics_bp)
+
+
+def test_rules_cached_until_file_changes(rules_path):
+    rules = refill_service.load_refill_rules()
+    assert rules == {"ramipril 5 mg": ("Ramipril 5 mg", 30),
+                     "metformin 500 mg": ("Metformin 500 mg", 60)}
+    assert refill_service.load_refill_rules() is rules
+
+    rules_path.write_text(RULES + "Zink 10 mg,14,1\n", encoding="utf-8")
+    future = time.time() + 5
+    os.utime(rules_path, (future, future))
+
+    assert "zink 10 mg" in refill_service.load_refill_rules()
+    assert refill_service.load_refill_rules(rules_path.parent / "missing.csv") == {}
+
+
+def test_last_purchase_per_medicine_decides(db, rules_path):
+    insert_orders(db, [
+        ("PAT002", "Ramipril 5 mg", 45),
+        ("PAT002", "ramipril 5 MG", 10),       # recent refill: not due
+        ("PAT001", "Ramipril 5 mg", 31),
+        ("PAT001", "Metformin 500 mg", 61),
+        ("PAT001", "Paracetamol 500 mg", 90),  # no refill interval
+        ("PAT003", "Metformin 500 mg", 20),
+        ("PAT004", "Unknown 1 mg", 400),
+    ])
+
+    candidates = refill_service.compute_refill_candidates(now=NOW)
+    items = list(candidates.items())
+
+    assert [(item["customer_id"], item["medicine"]) for item in items] == [
+        ("PAT001", "Metformin 500 mg"),
+        ("PAT001", "Ramipril 5 mg"),
+    ]
+    assert items[1]["days_overdue"] == 1
+    assert items[1]["due_date"] == format_timestamp(NOW - DAY)
+
+
+def test_matches_per_customer_check(db, rules_path):
+    rng = random.Random(4)
+    names = ["Ramipril 5 mg", "Metformin 500 mg", "Paracetamol 500 mg", "Other 1 mg"]
+    rows = [(f"PAT{rng.randrange(40):03d}", rng.choice(names), rng.randrange(120))
+            for _ in range(600)]
+    insert_orders(db, rows)
+
+    # The predictor's rule, one (customer, medicine) at a time
+    rules = refill_service.load_refill_rules()
+    last = {}
+    for customer_id, name, days_ago in rows:
+        key = (customer_id, name.lower())
+        last[key] = max(last.get(key, 0), NOW - days_ago * DAY)
+    expected = sorted(
+        (customer_id, rules[name][0])
+        for (customer_id, name), ts in last.items()
+        if name in rules and NOW - ts >= rules[name][1] * DAY
+    )
+
+    candidates = refill_service.compute_refill_candidates(now=NOW)
+    assert [(row[0], row[1]) for row in candidates.rows()] == expected
+
+
+def test_batch_job_sinks(client, db, admin_headers):
+    insert_orders(db, [("PAT001", "Ramipril 5 mg", 40), ("PAT002", "Metformin 500 mg", 70)])
+
+    # Every customer's medication history: admins only
+    assert client.get("/admin/refill-candidates").status_code == 401
+
+    response = client.get("/admin/refill-candidates", headers=admin_headers)
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.data.splitlines()]
+    assert [line["customer_id"] for line in lines] == ["PAT001", "PAT002"]
+
+    # Nothing stored until the batch job runs
+    assert client.get("/refill-candidates/PAT001").json["data"] == []
+
+    written = refill_service.write_refill_candidates(refill_service.compute_refill_candidates())
+    assert written == 2
+
+    stored = client.get("/refill-candidates/PAT001").json["data"]
+    assert [row["medicine"] for row in stored] == ["Ramipril 5 mg"]
+    assert stored[0]["refill_days"] == 30
+
+
+def test_no_rules_no_candidates(client, db, rules_path, admin_headers):
+    rules_path.unlink()
+    insert_orders(db, [("PAT001", "Ramipril 5 mg", 400)])
+
+    assert len(refill_service.compute_refill_candidates()) == 0
+    assert client.get("/admin/refill-candidates", headers=admin_headers).data == b""
+
+
+def test_batch_job_command(client, db, tmp_path, capsys):
+    insert_orders(db, [("PAT001", "Ramipril 5 mg", 40), ("PAT002", "Metformin 500 mg", 70)])
+
+    output = tmp_path / "candidates.ndjson"
+    manage.main(["refill-candidates", "--output", str(output)])
+    lines = [json.loads(line) for line in output.read_bytes().splitlines()]
+    assert [line["customer_id"] for line in lines] == ["PAT001", "PAT002"]
+    assert client.get("/refill-candidates/PAT001").json["data"] == []
+
+    manage.main(["refill-candidates"])
+    assert "2 refill candidates." in capsys.readouterr().out
+    assert [row["medicine"] for row in client.get("/refill-candidates/PAT001").json["data"]] == [
+        "Ramipril 5 mg"
+    ]
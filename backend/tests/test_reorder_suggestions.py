@@ -0,0 +1,123 @@
+# ============================================================
+# DEMAND FORECAST + REORDER SUGGESTIONS
+# ============================================================
+
+import random
+import time
+
+import pytest
+
+from app.routes.analytics import analytics_bp
+from app.services import forecast_service, order_event_service
+from app.utils.dates import format_timestamp
+
+NOW = time.time()
+
+
+def insert_orders(db, rows):
+    # (product_name, days_ago, quantity), imported like the Excel loader does
+    with db.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date, purchase_ts,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES ('PAT001', ?, ?, ?, ?, 1.0, 'N/A', 'No')
+        """, [
+            (name, quantity, format_timestamp(int(NOW) - days_ago * 86400),
+             int(NOW) - days_ago * 86400)
+            for name, days_ago, quantity in rows
+        ])
+        conn.commit()
+    order_event_service.backfill_order_events()
+
+
+@pytest.fixture
+def medicines():
+    return [
+        (1, 1, "Paracetamol 500 mg", 1.0, 50, "No"),
+        (2, 2, "Ibuprofen 400 mg", 1.0, 1000, "No"),
+        (3, 3, "Cetirizin 10 mg", 1.0, 100, "No"),
+        (4, 4, "Ramipril 5 mg", 1.0, 3, "No"),
+    ]
+
+
+@pytest.fixture
+def client(catalog, make_client, admin_headers):
+
+    # 10/day for Paracetamol and Ibuprofen, 1/day for Ramipril, Cetirizin unsold
+    insert_orders(catalog, [(name, day, qty)
+                            for day in range(30)
+                            for name, qty in (("Paracetamol 500 mg", 10),
+                                              ("IBUPROFEN 400 MG", 10),
+                                              ("Ramipril 5 mg", 1))])
+    # Older than the window: ignored
+    insert_orders(catalog, [("Cetirizin 10 mg", 45, 500)])
+
+    return make_client(analytics_bp, headers=admin_headers)
+
+
+def test_suggestions_flag_low_cover_first(client):
+    response = client.get("/admin/reorder-suggestions?window=30&lead_time=7&coverage_days=14")
+    assert response.status_code == 200
+
+    rows = response.json["data"]
+    assert [row["medicine_id"] for row in rows] == [4, 1]
+    assert response.json["count"] == 2
+
+    paracetamol = rows[1]
+    assert paracetamol["avg_daily_demand"] == 10.0
+    assert paracetamol["demand_std"] == 0.0
+    assert paracetamol["daily_demand"] == pytest.approx(10.0, abs=0.01)
+    assert paracetamol["days_of_cover"] == 5.0
+    assert paracetamol["reorder_point"] == 70.0
+    # Up to 21 days of demand
+    assert paracetamol["suggested_order_quantity"] == 160
+
+
+def test_all_lists_every_selling_medicine(client):
+    rows = client.get("/admin/reorder-suggestions?window=30&all=true").json["data"]
+
+    assert [row["medicine_id"] for row in rows] == [4, 1, 2]
+    assert rows[-1]["needs_reorder"] is False
+    assert rows[-1]["suggested_order_quantity"] == 0
+
+
+def test_forecast_matches_recursive_smoothing(db):
+    with db.db_connection() as conn:
+        conn.execute("""
+            INSERT INTO medicines (id, product_id, name, price, stock, prescription_required)
+            VALUES (1, 1, 'Paracetamol 500 mg', 1.0, 10, 'No')
+        """)
+        conn.commit()
+
+    rng = random.Random(5)
+    daily = [rng.choice([0, 0, 1, 2, 5]) for _ in range(20)]  # index = days ago
+    insert_orders(db, [("Paracetamol 500 mg", day, qty) for day, qty in enumerate(daily) if qty])
+
+    forecast = forecast_service.demand_forecast(window=20, alpha=0.3, now=NOW)
+
+    mean = sum(daily) / 20
+    level = mean
+    for qty in reversed(daily):
+        level = 0.3 * qty + 0.7 * level
+
+    assert forecast["sma"][0] == pytest.approx(mean)
+    assert forecast["sma_7"][0] == pytest.approx(sum(daily[:7]) / 7)
+    assert forecast["ewma"][0] == pytest.approx(level)
+    assert forecast["std"][0] == pytest.approx(
+        (sum(q * q for q in daily) / 20 - mean * mean) ** 0.5
+    )
+
+
+def test_validation(client):
+    url = "/admin/reorder-suggestions"
+    assert client.get(url + "?service_level=1.5").status_code == 400
+    assert client.get(url + "?lead_time=soon").status_code == 400
+    assert client.get(url + "?limit=0").status_code == 400
+
+
+def test_route_requires_admin(client, user_headers):
+    url = "/admin/reorder-suggestions"
+    assert client.get(url, headers=user_headers).status_code == 403
+
+    del client.environ_base["HTTP_AUTHORIZATION"]
+    assert client.get(url).status_code == 401
@@ -0,0 +1,171 @@
+# ============================================================
+# STOCK RESERVATIONS
+# ============================================================
+
+import time
+
+import pytest
+
+from app.routes.order import order_bp
+from app.services import reservation_service
+from app.services.reservation_service import HoldSweeper, expire_holds
+
+
+@pytest.fixture
+def client(catalog, make_client):
+    return make_client(order_bp)
+
+
+def stock(db):
+    with db.db_connection(readonly=True) as conn:
+        return conn.execute("SELECT stock FROM medicines WHERE id = 1").fetchone()[0]
+
+
+def order_count(db):
+    with db.db_connection(readonly=True) as conn:
+        return conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+
+def reserve(client, quantity=3, medicine_id=1, **body):
+    return client.post("/reserve-stock", json={
+        "customer_id": "PAT001", "medicine_id": medicine_id, "quantity": quantity, **body
+    })
+
+
+def test_reserve_takes_stock_and_confirm_creates_order(client, db):
+    hold = reserve(client)
+    assert hold.status_code == 201
+    assert stock(db) == 7
+
+    hold_id = hold.json["data"]["hold_id"]
+    confirmed = client.post("/confirm-reservation", json={"hold_id": hold_id})
+
+    assert confirmed.status_code == 201
+    assert confirmed.json["data"]["total_price"] == 6.0
+    assert stock(db) == 7
+    assert order_count(db) == 1
+
+    # Retried confirm returns the same order, body and status included
+    again = client.post("/confirm-reservation", json={"hold_id": hold_id})
+    assert again.status_code == 201
+    assert again.json == confirmed.json
+    assert order_count(db) == 1
+
+
+def test_repeated_confirm_after_cancel_replays_the_order(client, db):
+    hold_id = reserve(client).json["data"]["hold_id"]
+    confirmed = client.post("/confirm-reservation", json={"hold_id": hold_id})
+    assert confirmed.json["data"]["medicine"] == "Paracetamol 500 mg"
+
+    client.post("/cancel-order", json={"order_id": confirmed.json["data"]["order_id"]})
+    again = client.post("/confirm-reservation", json={"hold_id": hold_id})
+
+    assert (again.status_code, again.json) == (201, confirmed.json)
+    assert order_count(db) == 0
+
+
+def test_reserve_replays_a_repeated_key(client, db):
+    headers = {"Idempotency-Key": "agent-reserve-msg-1"}
+    first = client.post("/reserve-stock", headers=headers, json={
+        "customer_id": "PAT001", "medicine_id": 1, "quantity": 3
+    })
+    again = client.post("/reserve-stock", headers=headers, json={
+        "customer_id": "PAT001", "medicine_id": 1, "quantity": 3
+    })
+
+    assert first.status_code == again.status_code == 201
+    assert again.json["data"]["hold_id"] == first.json["data"]["hold_id"]
+    assert stock(db) == 7
+
+    changed = client.post("/reserve-stock", headers=headers, json={
+        "customer_id": "PAT001", "medicine_id": 1, "quantity": 4
+    })
+    assert changed.status_code == 422
+    assert stock(db) == 7
+
+
+def test_reserve_more_than_available(client, db):
+    reserve(client, 8)
+    response = reserve(client, 3)
+
+    assert response.status_code == 400
+    assert response.json["available_stock"] == 2
+
+
+def test_reserve_requires_prescription(client, db):
+    response = reserve(client, 1, medicine_id=3)
+
+    assert response.status_code == 403
+    assert response.json["code"] == "prescription_required"
+
+
+def test_release_restores_stock_once(client, db):
+    hold_id = reserve(client).json["data"]["hold_id"]
+
+    assert client.post("/release-reservation", json={"hold_id": hold_id}).status_code == 200
+    assert client.post("/release-reservation", json={"hold_id": hold_id}).status_code == 200
+    assert stock(db) == 10
+
+    confirmed = client.post("/confirm-reservation", json={"hold_id": hold_id})
+    assert confirmed.status_code == 410
+
+
+def test_confirmed_hold_cannot_be_released(client, db):
+    hold_id = reserve(client).json["data"]["hold_id"]
+    client.post("/confirm-reservation", json={"hold_id": hold_id})
+
+    assert client.post("/release-reservation", json={"hold_id": hold_id}).status_code == 409
+    assert stock(db) == 7
+
+
+def test_hold_belongs_to_customer(client, db):
+    hold_id = reserve(client).json["data"]["hold_id"]
+    response = client.post("/confirm-reservation", json={"hold_id": hold_id, "customer_id": "PAT002"})
+
+    assert response.status_code == 404
+
+
+def test_sweeper_expires_holds_in_bulk(client, db):
+    for _ in range(3):
+        reserve(client, 2, ttl=1)
+    kept = reserve(client, 1, ttl=600).json["data"]["hold_id"]
+
+    assert stock(db) == 3
+    assert expire_holds(now=time.time() + 5) == 3
+    assert expire_holds(now=time.time() + 5) == 0
+    assert stock(db) == 9
+
+    held = client.get(f"/reservation/{kept}")
+    assert held.json["data"]["status"] == "held"
+
+
+def test_expired_hold_cannot_be_confirmed(client, db, monkeypatch):
+    hold_id = reserve(client, ttl=1).json["data"]["hold_id"]
+
+    later = time.time() + 5
+    monkeypatch.setattr(reservation_service.time, "time", lambda: later)
+
+    assert client.post("/confirm-reservation", json={"hold_id": hold_id}).status_code == 410
+    assert expire_holds() == 1
+    assert stock(db) == 10
+    assert order_count(db) == 0
+
+
+def test_invalid_ttl(client):
+    assert reserve(client, ttl=0).status_code == 400
+    assert reserve(client, ttl=reservation_service.MAX_HOLD_TTL + 1).status_code == 400
+
+
+def test_background_sweeper(client, db):
+    reserve(client, 4, ttl=1)
+    time.sleep(1.1)
+
+    sweeper = HoldSweeper(interval=0.05).start()
+    try:
+        deadline = time.time() + 5
+        while stock(db) != 10 and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        sweeper.stop(timeout=2)
+
+    assert stock(db) == 10
@@ -0,0 +1,162 @@
+# ============================================================
+# REVENUE ROLLUPS + CUSTOMER SUMMARY
+# ============================================================
+
+import pytest
+
+from app.routes.analytics import analytics_bp
+from app.services import analytics_service, order_event_service, order_service
+
+
+@pytest.fixture
+def client(catalog, make_client):
+    return make_client(analytics_bp)
+
+
+def import_orders(db, rows):
+    # Bulk path used by the Excel loader: no events until the backfill
+    with db.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, ?, ?, ?, 'N/A', 'No')
+        """, rows)
+        conn.commit()
+    order_event_service.backfill_order_events()
+
+
+def live_revenue(db):
+    # What get_admin_revenue used to compute on every request
+    with db.db_connection(readonly=True) as conn:
+        return [
+            {"month": row[0], "revenue": round(row[1], 2)}
+            for row in conn.execute("""
+                SELECT substr(purchase_date, 1, 7) AS month, SUM(total_price)
+                FROM orders GROUP BY month ORDER BY month
+            """)
+        ]
+
+
+def test_monthly_revenue_tracks_orders(client, db):
+    import_orders(db, [
+        ("PAT001", "Paracetamol 500 mg", 1, "2024-01-05 10:00:00", 2.0),
+        ("PAT002", "Ibuprofen 400 mg", 2, "2024-01-20 10:00:00", 6.0),
+        ("PAT001", "Ibuprofen 400 mg", 1, "2024-02-01 09:00:00", 3.0),
+    ])
+    created = order_service.create_order("PAT001", 1, 3)[0]["data"]["order_id"]
+
+    response = client.get("/admin/revenue")
+    assert response.json["data"] == live_revenue(db)
+
+    # Cancelling the only February order removes the month
+    with db.db_connection(readonly=True) as conn:
+        february = conn.execute(
+            "SELECT id FROM orders WHERE purchase_date LIKE '2024-02%'"
+        ).fetchone()[0]
+    order_service.cancel_order(february)
+    order_service.refund_order(created)
+
+    response = client.get("/admin/revenue")
+    assert response.json["data"] == live_revenue(db) == [{"month": "2024-01", "revenue": 8.0}]
+
+
+def test_daily_revenue(client, db):
+    import_orders(db, [
+        ("PAT001", "Paracetamol 500 mg", 1, "2024-01-05 10:00:00", 2.0),
+        ("PAT001", "Paracetamol 500 mg", 1, "2024-01-05 18:00:00", 2.0),
+        ("PAT002", "Ibuprofen 400 mg", 2, "2024-01-06 10:00:00", 6.0),
+    ])
+
+    response = client.get("/admin/revenue?period=day")
+    assert response.json["data"] == [
+        {"day": "2024-01-05", "revenue": 4.0},
+        {"day": "2024-01-06", "revenue": 6.0},
+    ]
+    assert client.get("/admin/revenue?period=year").status_code == 400
+
+
+def test_user_metrics_from_summary(client, db):
+    import_orders(db, [
+        ("PAT001", "Paracetamol 500 mg", 1, "2024-01-05 10:00:00", 2.0),
+        ("PAT001", "Ibuprofen 400 mg", 2, "2024-03-01 10:00:00", 6.0),
+    ])
+    latest = order_service.create_order("PAT001", 2, 1)[0]["data"]["order_id"]
+
+    metrics = client.get("/user-metrics/PAT001").json["data"]
+    assert metrics["total_orders"] == 3
+    assert metrics["total_spent"] == 11.0
+    assert metrics["last_order_date"] > "2024-03-01"
+
+    # Cancelling the latest order falls back to the previous date
+    order_service.cancel_order(latest)
+    metrics = client.get("/user-metrics/PAT001").json["data"]
+    assert metrics["total_orders"] == 2
+    assert metrics["last_order_date"] == "2024-03-01 10:00:00"
+
+    unknown = client.get("/user-metrics/PAT404").json["data"]
+    assert unknown == {
+        "total_orders": 0,
+        "total_spent": 0,
+        "active_prescriptions": 0,
+        "last_order_date": None
+    }
+
+
+def test_stale_rollups_rebuilt_on_sync(client, db):
+    order_service.create_order("PAT001", 1, 1)
+
+    with db.db_connection() as conn:
+        conn.execute("DELETE FROM revenue_monthly")
+        conn.commit()
+        assert order_event_service.projections_stale(conn.cursor())
+
+    order_event_service.backfill_order_events()
+
+    assert analytics_service.get_admin_revenue()[0]["data"][0]["revenue"] == 2.0
+
+
+def test_rebuild_command_counts(client, db):
+    import_orders(db, [
+        ("PAT001", "Paracetamol 500 mg", 1, "2024-01-05 10:00:00", 2.0),
+        ("PAT002", "Ibuprofen 400 mg", 2, "2024-02-06 10:00:00", 6.0),
+    ])
+
+    assert order_event_service.rebuild_order_projections() == {
+        "customer_order_totals": 2,
+        "medicine_order_totals": 2,
+        "revenue_daily": 2,
+        "revenue_monthly": 2,
+        "medicine_demand_daily": 2,
+    }
+
+
+def test_batched_user_metrics_match_single(client, db):
+    import_orders(db, [
+        ("PAT001", "Paracetamol 500 mg", 1, "2024-01-05 10:00:00", 2.0),
+        ("PAT001", "Ibuprofen 400 mg", 2, "2024-03-01 10:00:00", 6.0),
+        ("PAT002", "Ibuprofen 400 mg", 1, "2024-02-01 10:00:00", 3.0),
+    ])
+
+    with db.db_connection() as conn:
+        conn.execute("""
+            INSERT INTO prescriptions (customer_id, medicine_id, status, expires_at)
+            VALUES ('PAT002', 1, 'Approved', '2099-01-01T00:00:00')
+        """)
+        conn.commit()
+
+    ids = ["PAT001", "PAT002", "PAT404", "PAT001"]
+    response = client.post("/user-metrics", json={"customer_ids": ids})
+
+    assert response.status_code == 200
+    assert response.json["count"] == 3
+    for customer_id in ids:
+        single = client.get(f"/user-metrics/{customer_id}").json["data"]
+        assert response.json["data"][customer_id] == single
+
+
+def test_batched_user_metrics_validation(client):
+    assert client.post("/user-metrics", json={"customer_ids": []}).status_code == 400
+    assert client.post("/user-metrics", json={"customer_ids": "PAT001"}).status_code == 400
+
+    too_many = [f"PAT{i}" for i in range(analytics_service.MAX_METRICS_BATCH + 1)]
+    assert client.post("/user-metrics", json={"customer_ids": too_many}).status_code == 400
@@ -0,0 +1,107 @@
+# ============================================================
+# REVENUE TIME SERIES + PURCHASE DATE NORMALIZATION
+# ============================================================
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.routes.analytics import analytics_bp
+from app.services import order_service
+from app.utils.dates import normalize_purchase_date, parse_range_bound, to_timestamp
+
+
+@pytest.fixture
+def client(catalog, make_client, admin_headers):
+    with catalog.db_connection() as conn:
+        # Raw sheet values in every shape the loader has seen
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, ?, ?, ?, 'N/A', 'No')
+        """, [
+            ("PAT001", "Paracetamol 500 mg", 1, "2024-01-01 09:15:00", 2.0),
+            ("PAT002", "Paracetamol 500 mg", 2, "01.01.2024 09:45", 4.0),
+            ("PAT001", "Ibuprofen 400 mg", 1, "2024-01-03T12:00:00Z", 3.0),
+            ("PAT003", "Ibuprofen 400 mg", 2, 45299.5, 6.0),  # 2024-01-08 12:00
+            ("PAT003", "Paracetamol 500 mg", 1, "2024/02/10", 2.0),
+        ])
+        catalog.normalize_purchase_dates(conn.cursor())
+        conn.commit()
+
+    return make_client(analytics_bp, headers=admin_headers)
+
+
+def series(client, **params):
+    response = client.get("/admin/revenue/timeseries", query_string=params)
+    assert response.status_code == 200, response.json
+    return [(row["bucket"], row["orders"], row["revenue"]) for row in response.json["data"]]
+
+
+def test_date_shapes_normalize_to_utc():
+    expected = int(datetime(2024, 1, 8, 12, tzinfo=timezone.utc).timestamp())
+
+    assert to_timestamp(45299.5) == expected
+    assert to_timestamp("08.01.2024 12:00") == expected
+    assert to_timestamp("2024-01-08T13:00:00+01:00") == expected
+    assert to_timestamp(datetime(2024, 1, 8, 12)) == expected
+    assert to_timestamp("not a date") is None
+
+    assert normalize_purchase_date("08.01.2024 12:00") == ("2024-01-08 12:00:00", expected)
+    assert normalize_purchase_date("garbage") == ("garbage", None)
+
+    # A bare end date covers the whole day
+    assert parse_range_bound("2024-01-08", "to", end=True) - expected == 12 * 3600
+    with pytest.raises(ValueError):
+        parse_range_bound("soon", "from")
+
+
+def test_buckets(client):
+    assert series(client, bucket="hour", to="2024-01-01") == [
+        ("2024-01-01 09:00", 2, 6.0),
+    ]
+    assert series(client, bucket="day", **{"from": "2024-01-01", "to": "2024-01-08"}) == [
+        ("2024-01-01", 2, 6.0),
+        ("2024-01-03", 1, 3.0),
+        ("2024-01-08", 1, 6.0),
+    ]
+    # 2024-01-01 was a Monday
+    assert series(client, bucket="week") == [
+        ("2024-01-01", 3, 9.0),
+        ("2024-01-08", 1, 6.0),
+        ("2024-02-05", 1, 2.0),
+    ]
+    assert series(client, bucket="month") == [
+        ("2024-01", 4, 15.0),
+        ("2024-02", 1, 2.0),
+    ]
+
+
+def test_range_is_half_open(client):
+    rows = series(client, bucket="day", **{"from": "2024-01-01 09:45:00",
+                                           "to": "2024-01-08 12:00:00"})
+    assert rows == [("2024-01-01", 1, 4.0), ("2024-01-03", 1, 3.0)]
+
+
+def test_medicine_filter_and_live_orders(client):
+    order_service.create_order("PAT009", 2, 2)
+    today = datetime.now(timezone.utc).strftime("%Y-%m")
+
+    by_id = series(client, bucket="month", medicine_id=2)
+    assert by_id == [("2024-01", 2, 9.0), (today, 1, 6.0)]
+    assert series(client, bucket="month", medicine="ibuprofen 400 MG") == by_id
+
+
+def test_validation(client):
+    url = "/admin/revenue/timeseries"
+    assert client.get(url, query_string={"bucket": "year"}).status_code == 400
+    assert client.get(url, query_string={"from": "yesterday"}).status_code == 400
+    assert client.get(url, query_string={"medicine_id": 99}).status_code == 404
+
+
+def test_route_requires_admin(client, user_headers):
+    url = "/admin/revenue/timeseries"
+    assert client.get(url, headers=user_headers).status_code == 403
+
+    del client.environ_base["HTTP_AUTHORIZATION"]
+    assert client.get(url).status_code == 401
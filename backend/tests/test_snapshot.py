@@ -0,0 +1,95 @@
+# ============================================================
+# COLUMNAR SNAPSHOT EXPORT / MMAP READ / RESTORE
+# ============================================================
+
+import numpy as np
+import pytest
+
+from app.utils import snapshot
+
+TABLES = {
+    "medicines": "SELECT * FROM medicines ORDER BY id",
+    "customers": "SELECT * FROM customers ORDER BY id",
+    "orders": "SELECT * FROM orders ORDER BY id",
+    "prescriptions": "SELECT * FROM prescriptions ORDER BY id",
+}
+
+
+def query(db, sql):
+    with db.db_connection(readonly=True) as conn:
+        return [tuple(row) for row in conn.execute(sql)]
+
+
+@pytest.fixture
+def seeded(db):
+    with db.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO medicines (product_id, name, pzn, price, package_size, description, stock,
+                                   prescription_required)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (1001, "Ramipril 5 mg", "00000001", 9.5, "20 St", "Tabletten", 12, "Yes"),
+            (1002, "Zink 10 mg", None, 4.0, None, "Brausetabletten ä", 100, "No"),
+        ])
+        conn.executemany("INSERT INTO customers (id, age, gender) VALUES (?, ?, ?)", [
+            ("PAT001", 30, "F"),
+            ("PAT002", "unknown", None),  # text in an INTEGER column
+        ])
+        conn.executemany("""
+            INSERT INTO orders (customer_id, product_name, quantity, purchase_date, purchase_ts,
+                                total_price, dosage_frequency, prescription_required)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            ("PAT001", "Ramipril 5 mg", 2, "2024-01-01 09:30:00", 1704101400, 19.0, "1x daily", "Yes"),
+            ("PAT002", "Zink 10 mg", 1, None, None, 4.0, "N/A", "No"),
+            ("PAT001", "Zink 10 mg", 3, "2024-01-03 00:00:00", 1704240000, 12.0, "N/A", "No"),
+        ])
+        conn.execute("""
+            INSERT INTO prescriptions (customer_id, medicine_id, file_path, status)
+            VALUES ('PAT001', 1, 'uploads/a.png', 'Approved')
+        """)
+        conn.commit()
+
+    return db
+
+
+def test_round_trip_into_a_fresh_database(seeded, tmp_path):
+    before = {table: query(seeded, sql) for table, sql in TABLES.items()}
+
+    manifest = snapshot.export_snapshot(tmp_path / "snap")
+    assert {table: meta["rows"] for table, meta in manifest["tables"].items()} == {
+        "medicines": 2, "customers": 2, "orders": 3, "prescriptions": 1
+    }
+    assert manifest["tables"]["customers"]["columns"]["age"]["kind"] == "utf8"
+    assert manifest["tables"]["orders"]["columns"]["purchase_ts"] == {"kind": "int64", "nulls": 1}
+
+    seeded.configure_pool(tmp_path / "restored.db")
+    seeded.init_db()
+    counts = snapshot.import_snapshot(tmp_path / "snap")
+
+    assert counts == {"medicines": 2, "customers": 2, "orders": 3, "prescriptions": 1}
+    assert {table: query(seeded, sql) for table, sql in TABLES.items()} == before
+    assert query(seeded, "SELECT COUNT(*), SUM(amount) FROM order_events") == [(3, 35.0)]
+
+    with pytest.raises(snapshot.SnapshotError, match="not empty"):
+        snapshot.import_snapshot(tmp_path / "snap")
+
+
+def test_columns_are_memory_mapped(seeded, tmp_path):
+    snapshot.export_snapshot(tmp_path / "snap")
+    orders = snapshot.open_snapshot(tmp_path / "snap").table("orders")
+
+    quantity = orders.array("quantity")
+    assert isinstance(quantity, np.memmap)
+    assert quantity.tolist() == [2, 1, 3]
+
+    # Revenue per medicine straight from the dictionary codes
+    names = orders.dictionary("product_name")
+    revenue = np.bincount(orders.array("product_name"), weights=orders.array("total_price"))
+    assert dict(zip(names, revenue.tolist())) == {"Ramipril 5 mg": 19.0, "Zink 10 mg": 16.0}
+
+    assert orders.valid("purchase_ts").tolist() == [True, False, True]
+    assert orders.to_pylist("purchase_date", 1) == [None, "2024-01-03 00:00:00"]
+
+    with pytest.raises(snapshot.SnapshotError, match="already exists"):
+        snapshot.export_snapshot(tmp_path / "snap")
@@ -0,0 +1,76 @@
+# ============================================================
+# RACE-FREE STOCK DECREMENT
+# ============================================================
+
+import sqlite3
+
+import pytest
+
+from app.services import inventory_service, order_service
+from app.services.order_service import decrement_stock
+from benchmarks.stress_stock_decrement import run_stress
+
+
+@pytest.fixture
+def medicine(db):
+    with db.db_connection() as conn:
+        conn.execute("""
+            INSERT INTO medicines (id, product_id, name, price, stock, prescription_required)
+            VALUES (1, 1, 'Paracetamol 500 mg', 2.0, 3, 'No')
+        """)
+        conn.commit()
+    return db
+
+
+def test_conditional_decrement_refuses_to_oversell(medicine):
+    with medicine.db_connection() as conn:
+        cursor = conn.cursor()
+
+        assert decrement_stock(cursor, [(1, 2)])
+        assert not decrement_stock(cursor, [(1, 2)])
+        conn.commit()
+
+        assert conn.execute("SELECT stock FROM medicines WHERE id = 1").fetchone()[0] == 1
+
+
+def test_stale_precheck_loses_race_cleanly(medicine, monkeypatch):
+    # Simulate another worker selling out between the SELECT and UPDATE
+    original = order_service.decrement_stock
+
+    def sold_out_first(cursor, lines):
+        cursor.execute("UPDATE medicines SET stock = 0 WHERE id = 1")
+        return original(cursor, lines)
+
+    monkeypatch.setattr(order_service, "decrement_stock", sold_out_first)
+
+    body, status = order_service.create_order("PAT001", 1, 2)
+
+    assert status == 400
+    assert body["code"] == "insufficient_stock"
+
+    with medicine.db_connection(readonly=True) as conn:
+        assert conn.execute("SELECT stock FROM medicines").fetchone()[0] == 3
+        assert conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 0
+
+
+def test_update_stock_cannot_go_negative(medicine):
+    body, status = inventory_service.update_stock("paracetamol", -5)
+    assert status == 400
+
+    body, status = inventory_service.update_stock("paracetamol", -3)
+    assert status == 200
+    assert body["data"]["new_stock"] == 0
+
+
+def test_stock_guard_trigger(medicine):
+    with medicine.db_connection() as conn:
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("UPDATE medicines SET stock = -1 WHERE id = 1")
+
+
+def test_parallel_workers_never_oversell(db):
+    report = run_stress(workers=4, initial_stock=200)
+
+    assert report["final_stock"] == 0
+    assert report["sold"] == report["order_rows"] == 200
+    assert report["failed"] == 0